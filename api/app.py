@@ -5,9 +5,18 @@ from middleware.service_log_middleware import ServiceLogMiddleware
 import logging
 from logging.handlers import TimedRotatingFileHandler
 from utils.dynamodb_utils import setup_dynamodb
-from utils.api_utils import get_dynamodb_table
+from utils.api_utils import get_dynamodb_table, claim_device_names
 from endpoints.get_all_routes import get_all_routes
 from utils.request_context import RequestIdFilter
+from utils.ingest_queue import start_ingest_queue, stop_ingest_queue
+from utils.air_stats_utils import warm_air_stats
+from utils.health_utils import get_health_monitor, warm_device_health
+from utils.issue_utils import get_issue_coalescer
+from utils.cold_archive_utils import get_cold_archiver, invalidate_cold_items
+from utils.snapshot_utils import get_snapshot_writer
+from utils.door_analytics_utils import invalidate_door_analytics_items
+from utils.response_utils import FastJSONResponse
+from constants.database import DATA_TABLE, DEVICE_TABLE, ISSUE_TABLE, WRITE_BEHIND_INGEST, COLD_ARCHIVE, DYNAMODB_IN_MEMORY
 import os
 import uvicorn
 import sys
@@ -44,10 +53,22 @@ def setup_logging():
 
 
 
+def invalidate_flushed_items(items):
+    """Drop cached and archived history that write-behind items change.
+
+    Runs once the items are in DynamoDB, so a read in between cannot cache
+    the old state again.
+    """
+    invalidate_door_analytics_items(items)
+    if COLD_ARCHIVE:
+        invalidate_cold_items(items)
+
+
 app = FastAPI(
     title="PAT API",
     description="API for PAT with DynamoDB integration",
     version="1.0.0",
+    default_response_class=FastJSONResponse,
 )
 
 
@@ -72,6 +93,49 @@ except Exception as e:
     logger.error(f"Failed to set up DynamoDB: {e}")
     raise SystemExit("Critical error: Unable to initialize DynamoDB. Exiting.")
 
+if DYNAMODB_IN_MEMORY:
+    logger.info("DynamoDB Local is in memory, snapshotting tables periodically.")
+    get_snapshot_writer().start(dynamodb)
+
+if WRITE_BEHIND_INGEST:
+    logger.info("Write-behind ingest enabled.")
+    start_ingest_queue(dynamodb.Table(DATA_TABLE), on_flushed=invalidate_flushed_items)
+
+try:
+    claim_device_names(dynamodb.Table(DEVICE_TABLE))
+except Exception as e:
+    logger.error(f"Failed to claim existing device names: {e}")
+
+try:
+    warm_air_stats(dynamodb.Table(DATA_TABLE), dynamodb.Table(DEVICE_TABLE))
+except Exception as e:
+    logger.error(f"Failed to warm air stats, starting cold: {e}")
+
+try:
+    warm_device_health(
+        dynamodb.Table(DATA_TABLE),
+        dynamodb.Table(DEVICE_TABLE),
+        dynamodb.Table(ISSUE_TABLE),
+    )
+except Exception as e:
+    logger.error(f"Failed to warm device health, starting cold: {e}")
+get_health_monitor().start()
+get_issue_coalescer().start(dynamodb.Table(ISSUE_TABLE))
+
+if COLD_ARCHIVE:
+    logger.info("Cold history archive enabled.")
+    get_cold_archiver().start(dynamodb.Table(DATA_TABLE), dynamodb.Table(DEVICE_TABLE))
+
+
+@app.on_event("shutdown")
+def shutdown_ingest_queue():
+    stop_ingest_queue()
+    get_health_monitor().stop()
+    get_issue_coalescer().stop()
+    get_cold_archiver().stop()
+    get_snapshot_writer().stop()  # After the ingest queue drains into the tables
+
+
 app = get_all_routes(app)
 
 app.dependency_overrides[get_dynamodb_table] = lambda: {
@@ -0,0 +1,156 @@
+"""
+Benchmark DynamoDB Local put_item and query latency, persisted vs in memory.
+
+By default a scratch DynamoDB Local is started for each mode on its own port
+(needs java and the JAR the API downloads into pat-air-data-local), with the
+persisted mode writing to a temporary directory. --endpoint measures an
+already running instance instead. Writes to a scratch table that is deleted
+afterwards.
+
+    cd api && python -m benchmarks.dynamodb_mode_benchmark --items 2000
+    cd api && python -m benchmarks.dynamodb_mode_benchmark --endpoint http://localhost:8000
+"""
+
+import argparse
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
+import boto3
+from utils.api_utils import create_event_id
+from utils.dynamodb_utils import dynamodb_local_command, get_dynamodb_local_jar_path
+from utils.snapshot_utils import wait_for_dynamodb_local
+from utils.time_utils import ms_to_timestamp
+
+BENCHMARK_TABLE = "PATDataBenchmark"
+START_MS = 1_700_000_000_000
+DEVICES = 10
+
+
+def make_client(endpoint):
+    return boto3.client(
+        "dynamodb",
+        region_name="us-west-2",
+        endpoint_url=endpoint,
+        aws_access_key_id="fakeAccessKey",
+        aws_secret_access_key="fakeSecretKey",
+    )
+
+
+@contextmanager
+def scratch_dynamodb_local(in_memory, port):
+    """Run a throwaway DynamoDB Local in the given mode, yielding its endpoint."""
+    dynamodb_local_jar = get_dynamodb_local_jar_path()
+    if not dynamodb_local_jar:
+        raise SystemExit("DynamoDB Local JAR not found; start the API once first.")
+
+    with tempfile.TemporaryDirectory() as db_path:
+        process = subprocess.Popen(
+            dynamodb_local_command(dynamodb_local_jar, in_memory, port, db_path),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            endpoint = f"http://localhost:{port}"
+            wait_for_dynamodb_local(make_client(endpoint))
+            yield endpoint
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench_endpoint(endpoint, items, queries):
+    """put_item and newest-100 query latencies, in seconds, against one endpoint."""
+    client = make_client(endpoint)
+    client.create_table(
+        TableName=BENCHMARK_TABLE,
+        KeySchema=[
+            {"AttributeName": "DeviceID", "KeyType": "HASH"},
+            {"AttributeName": "Timestamp", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "DeviceID", "AttributeType": "S"},
+            {"AttributeName": "Timestamp", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    client.get_waiter("table_exists").wait(TableName=BENCHMARK_TABLE)
+
+    try:
+        put_times = []
+        for i in range(items):
+            timestamp_ms = START_MS + i * 1000
+            item = {
+                "DeviceID": {"S": f"DEVICE#BENCH{i % DEVICES}"},
+                "Timestamp": {"S": ms_to_timestamp(timestamp_ms)},
+                "EpochMs": {"N": str(timestamp_ms)},
+                "EventID": {"S": create_event_id(timestamp_ms)},
+                "PM25": {"N": "12.3"},
+                "PM10": {"N": "45.6"},
+            }
+            put_times.append(
+                timed(lambda: client.put_item(TableName=BENCHMARK_TABLE, Item=item))
+            )
+
+        query_times = []
+        for i in range(queries):
+            query_params = {
+                "TableName": BENCHMARK_TABLE,
+                "KeyConditionExpression": "DeviceID = :device_id",
+                "ExpressionAttributeValues": {
+                    ":device_id": {"S": f"DEVICE#BENCH{i % DEVICES}"}
+                },
+                "ScanIndexForward": False,
+                "Limit": 100,
+            }
+            query_times.append(timed(lambda: client.query(**query_params)))
+    finally:
+        client.delete_table(TableName=BENCHMARK_TABLE)
+
+    return put_times, query_times
+
+
+def summarise(name, samples):
+    ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    mean = sum(ordered) / len(ordered)
+    return (
+        f"{name:<24} p50 {p50 * 1000:6.2f} ms  p95 {p95 * 1000:6.2f} ms  "
+        f"mean {mean * 1000:6.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DynamoDB Local mode benchmark")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--endpoint", help="Measure a running DynamoDB Local only")
+    args = parser.parse_args()
+
+    if args.endpoint:
+        targets = [(args.endpoint, nullcontext(args.endpoint))]
+    else:
+        targets = [
+            ("persisted (-dbPath)", scratch_dynamodb_local(False, args.port)),
+            ("in memory (-inMemory)", scratch_dynamodb_local(True, args.port)),
+        ]
+
+    print(f"Items: {args.items}  Queries: {args.queries} (newest 100 per device)")
+    for name, context in targets:
+        with context as endpoint:
+            put_times, query_times = bench_endpoint(endpoint, args.items, args.queries)
+        print(name)
+        print("  " + summarise("put_item", put_times))
+        print("  " + summarise("query", query_times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark sustained PATData ingest: synchronous put_item vs write-behind queue.
+
+Requires DynamoDB Local on localhost:8000 (start the API once, or run
+DynamoDB Local by hand). Writes to a scratch table that is deleted afterwards.
+
+    cd api && python -m benchmarks.ingest_benchmark --items 2000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from decimal import Decimal
+import boto3
+from utils.api_utils import create_event_id
+from utils.dynamodb_utils import create_dynamodb_table
+from utils.ingest_queue import WriteBehindQueue
+from utils.time_utils import get_current_utc_datetime
+
+BENCHMARK_TABLE = "PATDataBenchmark"
+
+
+def make_items(count, prefix):
+    return [
+        {
+            "DeviceID": f"DEVICE#{prefix}{i % 10}",
+            "Timestamp": f"{get_current_utc_datetime()}#{i:08d}",
+            "EventID": create_event_id(),
+            "DeviceName": f"bench_{i % 10}",
+            "PM25": Decimal("12.3"),
+            "PM10": Decimal("45.6"),
+        }
+        for i in range(count)
+    ]
+
+
+def bench_put_item(table, items):
+    start = time.perf_counter()
+    for item in items:
+        table.put_item(Item=item)
+    return time.perf_counter() - start
+
+
+def bench_write_behind(table, items):
+    with tempfile.TemporaryDirectory() as wal_dir:
+        queue = WriteBehindQueue(table, wal_path=os.path.join(wal_dir, "bench.wal"))
+        queue.start()
+        start = time.perf_counter()
+        for item in items:
+            queue.append(item)
+        acked = time.perf_counter() - start
+        queue.stop()
+        drained = time.perf_counter() - start
+    return acked, drained
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PATData ingest benchmark")
+    parser.add_argument("--items", type=int, default=2000)
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource(
+        "dynamodb",
+        region_name="us-west-2",
+        endpoint_url="http://localhost:8000",
+        aws_access_key_id="fakeAccessKey",
+        aws_secret_access_key="fakeSecretKey",
+    )
+    table = create_dynamodb_table(
+        dynamodb,
+        BENCHMARK_TABLE,
+        [
+            {"AttributeName": "DeviceID", "KeyType": "HASH"},
+            {"AttributeName": "Timestamp", "KeyType": "RANGE"},
+        ],
+        [
+            {"AttributeName": "DeviceID", "AttributeType": "S"},
+            {"AttributeName": "Timestamp", "AttributeType": "S"},
+        ],
+    )
+    try:
+        put_time = bench_put_item(table, make_items(args.items, "PUT"))
+        acked, drained = bench_write_behind(table, make_items(args.items, "WB"))
+    finally:
+        table.delete()
+
+    print(f"Items: {args.items}")
+    print(f"put_item:      {put_time:.2f}s  ({args.items / put_time:.0f} items/s)")
+    print(f"write-behind:  acked in {acked:.2f}s  ({args.items / acked:.0f} items/s)")
+    print(
+        f"               drained in {drained:.2f}s  ({args.items / drained:.0f} items/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark response serialization of full air histories.
+
+Compares the old path (convert_decimals_to_floats, then stdlib JSONResponse)
+with FastJSONResponse encoding the same content directly. Runs in memory and
+does not need DynamoDB Local.
+
+    cd api && python -m benchmarks.serialization_benchmark --samples 100000
+"""
+
+import argparse
+import time
+from decimal import Decimal
+from fastapi.responses import JSONResponse
+from utils.air_utils import convert_decimals_to_floats
+from utils.api_utils import create_event_id
+from utils.response_utils import FastJSONResponse, orjson
+from utils.time_utils import ms_to_timestamp
+
+START_MS = 1_700_000_000_000
+
+
+def make_raw_items(count):
+    """PATData items as boto3 returns them, with Decimal numbers."""
+    return [
+        {
+            "DeviceID": "DEVICE#BENCH",
+            "Timestamp": ms_to_timestamp(START_MS + i * 60_000),
+            "EventID": create_event_id(START_MS + i * 60_000),
+            "DeviceName": "bench_air",
+            "PM25": Decimal(str(round(5 + (i % 400) / 10, 1))),
+            "PM10": Decimal(str(round(10 + (i % 700) / 10, 1))),
+        }
+        for i in range(count)
+    ]
+
+
+def make_history(raw_items):
+    """The same samples as format_full_air_info returns them."""
+    return [
+        {
+            "device_id": "BENCH",
+            "event_id": item["EventID"].split("#")[1],
+            "timestamp": item["Timestamp"],
+            "pm25": float(item["PM25"]),
+            "pm10": float(item["PM10"]),
+        }
+        for item in raw_items
+    ]
+
+
+def best_of(runs, func):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        body = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--samples", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    raw_items = make_raw_items(args.samples)
+    history = make_history(raw_items)
+
+    cases = {
+        "raw items, convert + JSONResponse": lambda: JSONResponse(
+            content={"data": convert_decimals_to_floats(raw_items)}
+        ).body,
+        "raw items, FastJSONResponse": lambda: FastJSONResponse(
+            content={"data": raw_items}
+        ).body,
+        "history, JSONResponse": lambda: JSONResponse(
+            content={"all_info": history}
+        ).body,
+        "history, FastJSONResponse": lambda: FastJSONResponse(
+            content={"all_info": history}
+        ).body,
+    }
+
+    print(f"Samples: {args.samples}  (best of {args.runs})")
+    print(f"Encoder: {'orjson ' + orjson.__version__ if orjson else 'stdlib json'}")
+    for name, func in cases.items():
+        elapsed, size = best_of(args.runs, func)
+        print(f"{name:<36} {elapsed * 1000:8.1f} ms  {size / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -77,3 +77,37 @@ PM10_INFO = [
         "code": 5,
     },
 ]
+
+# Air quality alerting (see utils/air_alert_utils.py)
+AIR_ALERT_MIN_CODE = 3  # Levels at or above this code raise threshold alerts
+AIR_ALERT_SUSTAINED_MINUTES = 15  # Minutes above the threshold before alerting
+AIR_ALERT_RATE_WINDOW_SECONDS = 600  # Window for rate-of-change alerts
+AIR_ALERT_RATE_THRESHOLDS = {"PM2.5": 25.0, "PM10": 75.0}  # Rise within the window
+AIR_ALERT_COOLDOWN_SECONDS = 1800  # Minimum gap between rate-of-change alerts
+AIR_ALERT_BUFFER_SIZE = 64  # Readings kept per device for rate-of-change
+AIR_ALERT_WEBHOOK_WORKERS = 4  # Threads delivering alert webhooks off the ingest path
+
+# Rolling per-device statistics (see utils/air_stats_utils.py)
+AIR_STATS_WINDOWS = {"1h": 3600, "24h": 86400}  # Window name -> seconds
+AIR_STATS_EWMA_HALF_LIFE_SECONDS = 600
+AIR_STATS_HISTOGRAM_BIN_WIDTH = 0.5  # ug/m3 per percentile histogram bin
+AIR_STATS_HISTOGRAM_MAX = 1000.0  # Readings above this share the last bin
+
+# Field selection on /air/info/latest (see utils/air_utils.py). Stored fields
+# map to PATData attributes; derived fields are computed from PM and Timestamp
+AIR_LATEST_STORED_FIELDS = (
+    "DeviceID",
+    "EventID",
+    "DeviceName",
+    "Timestamp",
+    "EpochMs",
+    "PM25",
+    "PM10",
+    "PM25Min",
+    "PM25Max",
+    "PM10Min",
+    "PM10Max",
+    "SampleCount",
+)
+AIR_LATEST_DERIVED_FIELDS = ("message", "code", "staleness", "age", "stats")
+AIR_LATEST_REQUIRED_ATTRIBUTES = ("Timestamp", "EpochMs", "PM25", "PM10")
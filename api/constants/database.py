@@ -1,4 +1,75 @@
+import os
+
 # DynamoDB Table Names
 DATA_TABLE = "PATData"
 DEVICE_TABLE = "PATDevices"
 ISSUE_TABLE = "PATIssues"
+AIR_PACKED_TABLE = "PATAirPacked"
+
+# Write-behind ingest (see utils/ingest_queue.py)
+WRITE_BEHIND_INGEST = os.environ.get("PAT_WRITE_BEHIND", "false").lower() == "true"
+WRITE_BEHIND_WAL_PATH = "./pat-air-data-local/wal/ingest.wal"
+WRITE_BEHIND_FLUSH_INTERVAL = 0.5  # Seconds between group commits
+WRITE_BEHIND_MAX_LAG = 30  # Reject ingest once the oldest pending item is older
+
+# Ingest idempotency (see utils/idempotency_utils.py)
+IDEMPOTENCY_STORE_PATH = "./pat-air-data-local/wal/idempotency.log"
+IDEMPOTENCY_WINDOW = 86400  # Seconds a key is remembered
+IDEMPOTENCY_MAX_KEYS = 50000
+
+# Bulk device reads (see endpoints/pat/get_bulk_device_info.py)
+BULK_READ_MAX_DEVICES = 100  # batch_get_item accepts up to 100 keys per call
+BULK_READ_MAX_WORKERS = 8  # Parallel latest-reading queries
+
+# Issues API (see utils/issue_utils.py)
+ISSUES_PAGE_LIMIT = 50
+ISSUES_MAX_PAGE_LIMIT = 500
+FULL_INFO_ISSUE_LIMIT = 20  # Most recent issues inlined in /air/info/full
+
+# Issue coalescing and rate limiting (see utils/issue_utils.py)
+ISSUE_COALESCE_WINDOW_SECONDS = 3600  # Repeats within this merge into one item
+ISSUE_COALESCE_SWEEP_SECONDS = 60  # How often expired windows are flushed
+ISSUE_RATE_BURST = 10  # Issue writes a device may make back to back
+ISSUE_RATE_PER_MINUTE = 2  # Sustained issue writes per device
+
+# Field selection on the /info/device endpoints
+DEVICE_INFO_FIELDS = (
+    "DeviceID",
+    "DeviceName",
+    "DeviceType",
+    "DeviceManufacturer",
+    "DeviceModel",
+)
+
+# Packed air history (see utils/air_packed_utils.py). Run
+# migrations/pack_air_history.py before enabling on an existing database
+AIR_PACKED_STORAGE = os.environ.get("PAT_AIR_PACKED", "false").lower() == "true"
+AIR_PACKED_BUCKET_SECONDS = 86400  # One packed item per device-day
+
+# Cold history archive (see utils/cold_archive_utils.py)
+COLD_ARCHIVE = os.environ.get("PAT_COLD_ARCHIVE", "false").lower() == "true"
+COLD_ARCHIVE_PATH = "./pat-air-data-local/cold"
+COLD_ARCHIVE_GRACE_DAYS = 1  # Full days after a day ends before it is archived
+COLD_ARCHIVE_INTERVAL_SECONDS = 3600  # Between background archive runs
+
+# DynamoDB Local storage mode (see utils/snapshot_utils.py). In-memory mode
+# keeps every table in the JVM and persists it through periodic snapshots,
+# so up to PAT_SNAPSHOT_INTERVAL seconds of writes are lost on a crash.
+# Each interval writes only the items changed since the last snapshot; a
+# full snapshot rewrites the whole database and is taken far less often
+DYNAMODB_IN_MEMORY = os.environ.get("PAT_DYNAMODB_IN_MEMORY", "false").lower() == "true"
+SNAPSHOT_PATH = "./pat-air-data-local/snapshots"
+SNAPSHOT_INTERVAL_SECONDS = int(os.environ.get("PAT_SNAPSHOT_INTERVAL", "300"))
+SNAPSHOT_FULL_INTERVAL_SECONDS = int(
+    os.environ.get("PAT_SNAPSHOT_FULL_INTERVAL", "86400")
+)
+SNAPSHOT_KEEP = 3  # Newest full snapshots kept on disk, with their deltas
+SNAPSHOT_DELTA_MAX_KEYS = 200000  # More changed keys than this take a full snapshot
+SNAPSHOT_MIN_RETAINED = 0.5  # Refuse a full snapshot if a table lost more items
+SNAPSHOT_SHRINK_MIN_ITEMS = 100  # ...unless it held fewer than this many
+SNAPSHOT_RESTORE_TIMEOUT = 60  # Seconds to wait for DynamoDB Local to accept requests
+
+# Bulk import (see utils/import_utils.py)
+IMPORT_WORKERS = 8  # Parallel batch writers, within botocore's 10-connection pool
+IMPORT_BATCH_SIZE = 500  # Items handed to a worker at a time
+IMPORT_PROGRESS_EVERY = 50000  # Items written between progress reports
@@ -1,3 +1,10 @@
 DOOR_DEVICE_TYPE = "Door Sensor"
 DOOR_OPTIONS = ["OPEN", "CLOSED"]
 LOCK_OPTIONS = ["LOCKED", "UNLOCKED"]
+
+# Door analytics (see utils/door_analytics_utils.py)
+DOOR_ANALYTICS_BUCKET_SECONDS = 3600  # Summaries are cached per closed bucket
+DOOR_ANALYTICS_BUCKET_GRACE = 60  # Seconds after a bucket ends before it is closed
+DOOR_ANALYTICS_CACHE_SIZE = 50000  # Cached bucket summaries across all doors
+DOOR_ANALYTICS_DEFAULT_DAYS = 7
+DOOR_ANALYTICS_MAX_DAYS = 366
@@ -0,0 +1,13 @@
+from constants.air import AIR_QUALITY_DEVICE_TYPE
+from constants.door import DOOR_DEVICE_TYPE
+
+# Device health monitor (see utils/health_utils.py)
+# Seconds without a reading before a device counts as stale. Air sensors
+# report every few minutes; door sensors only report on state changes.
+HEALTH_STALE_SECONDS = {
+    AIR_QUALITY_DEVICE_TYPE: 20 * 60,
+    DOOR_DEVICE_TYPE: 3 * 24 * 3600,
+}
+HEALTH_DEFAULT_STALE_SECONDS = 24 * 3600
+HEALTH_ISSUE_WINDOW_SECONDS = 24 * 3600  # Issues counted as recent
+HEALTH_SWEEP_INTERVAL_SECONDS = 60
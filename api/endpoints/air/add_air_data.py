@@ -1,12 +1,33 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header
 from decimal import Decimal
 import logging
 import json
-from fastapi.responses import JSONResponse
+from utils.response_utils import FastJSONResponse
 from utils.api_utils import get_dynamodb_table, get_device_info, create_event_id
-from constants.database import DATA_TABLE, DEVICE_TABLE
+from constants.database import (
+    DATA_TABLE,
+    DEVICE_TABLE,
+    AIR_PACKED_STORAGE,
+    COLD_ARCHIVE,
+)
 from pydantic_models.air_models import AddAirDeviceData
-from utils.time_utils import get_current_utc_datetime
+from utils.time_utils import unique_sort_ms, ms_to_timestamp
+from utils.ingest_queue import (
+    write_data_item,
+    get_ingest_queue,
+    IngestBacklogError,
+)
+from utils.health_utils import record_device_reading
+from utils.cold_archive_utils import invalidate_cold_day
+from utils.air_alert_utils import evaluate_air_alerts, dispatch_air_alert_webhooks
+from utils.air_stats_utils import update_air_stats
+from utils.air_packed_utils import append_air_reading
+from utils.idempotency_utils import (
+    get_idempotency_cache,
+    ingest_idempotency_key,
+    duplicate_response,
+)
+from typing import Optional
 
 logger = logging.getLogger("pat_api")
 router = APIRouter()
@@ -21,6 +42,7 @@ async def add_air_data(
     data: AddAirDeviceData,
     data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
     device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
+    idempotency_key: Optional[str] = Header(None),
 ):
     """Add new door sensor data to DynamoDB."""
     logger.info("Called /doors/add_data endpoint.")
@@ -31,10 +53,14 @@ async def add_air_data(
             status_code=400, detail="device_name cannot be 'default_device'."
         )
 
-    if data.timestamp:
-        timestamp = data.timestamp
-    else:
-        timestamp = get_current_utc_datetime()
+    # Retries of an already stored reading are answered from the dedup window
+    dedup = get_idempotency_cache()
+    dedup_key = ingest_idempotency_key(
+        idempotency_key, data.device_name, data.timestamp, data.pm25, data.pm10
+    )
+    if dedup_key and dedup.seen(dedup_key):
+        logger.info(f"Duplicate reading for {data.device_name}, skipping write.")
+        return duplicate_response()
 
     try:
         logger.info(f"Fetching device info for device: {data.device_name}")
@@ -53,6 +79,10 @@ async def add_air_data(
         logger.error(f"Error fetching device info: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+    # The model already parsed any client timestamp to epoch milliseconds
+    timestamp_ms = unique_sort_ms(device_info.get("DeviceID"), data.timestamp_ms)
+    timestamp = ms_to_timestamp(timestamp_ms)
+
     try:
         logger.info(f"Cleaning up data: {json.dumps(data.dict(), default=str)}")
         clean_up_data = {
@@ -60,27 +90,97 @@ async def add_air_data(
             "EventID": create_event_id(),
             "DeviceName": data.device_name,
             "Timestamp": timestamp,
+            "EpochMs": timestamp_ms,
             "PM25": Decimal(str(data.pm25)),
             "PM10": Decimal(str(data.pm10)),
         }
 
+        # Window aggregates from samplers running in aggregate mode
+        aggregate_fields = {
+            "PM25Min": data.pm25_min,
+            "PM25Max": data.pm25_max,
+            "PM10Min": data.pm10_min,
+            "PM10Max": data.pm10_max,
+        }
+        for key, value in aggregate_fields.items():
+            if value is not None:
+                clean_up_data[key] = Decimal(str(value))
+        if data.sample_count is not None:
+            clean_up_data["SampleCount"] = data.sample_count
+
     except Exception as e:
         logger.error(f"Error converting floats to decimals: {e}")
         raise HTTPException(
             status_code=500, detail="Internal server error while converting floats"
         )
 
+    # Claim the key so a concurrent retry cannot write the reading twice
+    if dedup_key and not dedup.claim(dedup_key):
+        logger.info(f"Duplicate reading for {data.device_name}, skipping write.")
+        return duplicate_response()
+
     try:
         logger.info(
             f"Adding data to DynamoDB: {json.dumps(clean_up_data, default=str)}"
         )
-        data_table.put_item(Item=clean_up_data)
+        write_data_item(data_table, clean_up_data)
+        if dedup_key:
+            dedup.commit(dedup_key)
         logger.info("Data added successfully.")
-        return JSONResponse(
-            content={"message": "Data added successfully"}, status_code=200
+        record_device_reading(device_info, timestamp)
+        # With write-behind the queue invalidates once the item is flushed
+        if COLD_ARCHIVE and get_ingest_queue() is None:
+            invalidate_cold_day(device_info.get("DeviceID"), timestamp_ms)
+    except IngestBacklogError as e:
+        dedup.release(dedup_key)
+        logger.warning(f"Ingest backlog, rejecting data: {e}")
+        raise HTTPException(
+            status_code=503, detail="Ingest queue is backlogged, retry later"
         )
     except Exception as e:
+        dedup.release(dedup_key)
         logger.error(f"Error adding data to DynamoDB: {e}")
         raise HTTPException(
             status_code=500, detail="Internal server error while adding data"
         )
+
+    if AIR_PACKED_STORAGE:
+        try:
+            append_air_reading(
+                device_info.get("DeviceID"),
+                timestamp,
+                clean_up_data["EventID"],
+                data.pm25,
+                data.pm10,
+            )
+        except Exception as e:
+            # The PATData item is stored; the migration tool can rebuild the bucket
+            logger.error(f"Error appending to packed air history: {e}")
+
+    try:
+        update_air_stats(device_info.get("DeviceID"), timestamp, data.pm25, data.pm10)
+    except Exception as e:
+        logger.error(f"Error updating air stats: {e}")
+
+    try:
+        alerts = evaluate_air_alerts(
+            device_info.get("DeviceID"), timestamp, data.pm25, data.pm10
+        )
+        if alerts:
+            logger.info(
+                f"Raised {len(alerts)} air quality alerts for {data.device_name}"
+            )
+            dispatch_air_alert_webhooks(
+                device_table,
+                data.device_name,
+                device_info.get("DeviceID"),
+                timestamp,
+                alerts,
+            )
+    except Exception as e:
+        # Alerting must never fail an ingest that has already been stored
+        logger.error(f"Error evaluating air quality alerts: {e}")
+
+    return FastJSONResponse(
+        content={"message": "Data added successfully"}, status_code=200
+    )
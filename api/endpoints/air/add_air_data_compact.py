@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Header, Request, Response
+from typing import Optional
+import logging
+from utils.api_utils import get_dynamodb_table
+from utils.compact_ingest_utils import (
+    check_compact_devices,
+    compact_failure_response,
+    decode_air_records,
+    ingest_compact_records,
+)
+from constants.database import DATA_TABLE, DEVICE_TABLE
+from endpoints.air.add_air_data import add_air_data
+
+logger = logging.getLogger("pat_api")
+router = APIRouter()
+
+
+@router.post(
+    "/add_data/compact",
+    summary="Add Air Data (Compact)",
+    response_description="Add air quality data from fixed-layout binary records",
+    status_code=204,
+)
+async def add_air_data_compact(
+    request: Request,
+    data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
+    device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
+    idempotency_key: Optional[str] = Header(None),
+):
+    """Add air data sent as compact binary records.
+
+    Each record is decoded into AddAirDeviceData and written through the same
+    path as /air/add_data. The empty 204 response keeps parsing on the device
+    to the status line. If some records fail, the response lists them by
+    index; with an Idempotency-Key header the whole body can be resent and
+    only the missing records are stored.
+    """
+    logger.info("Called /air/add_data/compact endpoint.")
+    records = decode_air_records(await request.body())
+
+    # Nothing is written unless every record decodes and names a known device
+    check_compact_devices(device_table, records)
+
+    failed = await ingest_compact_records(
+        records,
+        lambda data, record_key: add_air_data(
+            data,
+            data_table=data_table,
+            device_table=device_table,
+            idempotency_key=record_key,
+        ),
+        idempotency_key,
+    )
+    if failed:
+        return compact_failure_response(len(records), failed)
+
+    logger.info(f"Added {len(records)} compact air records.")
+    return Response(status_code=204)
@@ -2,11 +2,17 @@ from fastapi import APIRouter, HTTPException, Depends
 from decimal import Decimal
 import logging
 import json
-from fastapi.responses import JSONResponse
-from utils.api_utils import get_dynamodb_table, get_device_info, create_event_id
+from utils.response_utils import FastJSONResponse
+from utils.api_utils import (
+    get_dynamodb_table,
+    get_device_info_cached,
+    create_event_id,
+)
+from utils.issue_utils import store_issue
 from constants.database import ISSUE_TABLE, DEVICE_TABLE
 from pydantic_models.air_models import AirDeviceIssue
 from utils.time_utils import get_current_utc_datetime
+from utils.health_utils import record_device_issue
 
 logger = logging.getLogger("pat_api")
 router = APIRouter()
@@ -33,7 +39,7 @@ async def add_air_issue(
     try:
         if data.device_name:
             logger.info(f"Fetching device info for device: {data.device_name}")
-            device_info = get_device_info(device_table, data.device_name)
+            device_info = get_device_info_cached(device_table, data.device_name)
 
             if not device_info:
                 logger.warning(f"No device found with ID: {data.device_name}")
@@ -77,13 +83,29 @@ async def add_air_issue(
         logger.info(
             f"Adding issue to DynamoDB: {json.dumps(clean_up_data, default=str)}"
         )
-        issue_table.put_item(Item=clean_up_data)
-        logger.info("Issue added successfully.")
-        return JSONResponse(
-            content={"message": "Issue added successfully"}, status_code=200
-        )
+        status, count = store_issue(issue_table, clean_up_data)
     except Exception as e:
         logger.error(f"Error adding issue to DynamoDB: {e}")
         raise HTTPException(
             status_code=500, detail="Internal server error while adding issue"
         )
+
+    if status == "rate_limited":
+        logger.warning(f"Issue rate limit reached for {data.device_name}, dropping.")
+        raise HTTPException(
+            status_code=429, detail="Too many issues from this device, retry later"
+        )
+
+    if device_id:
+        record_device_issue(device_info, timestamp)
+
+    if status == "created":
+        logger.info("Issue added successfully.")
+        return FastJSONResponse(
+            content={"message": "Issue added successfully"}, status_code=200
+        )
+
+    logger.info(f"Issue coalesced ({status}), seen {count} times in this window.")
+    return FastJSONResponse(
+        content={"message": "Issue coalesced", "count": count}, status_code=200
+    )
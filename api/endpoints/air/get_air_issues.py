@@ -0,0 +1,112 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from utils.response_utils import FastJSONResponse
+from typing import Optional
+import logging
+from utils.api_utils import get_dynamodb_table, get_device_info
+from utils.issue_utils import query_device_issues, count_device_issues
+from utils.time_utils import timestamp_to_ms
+from constants.database import (
+    DEVICE_TABLE,
+    ISSUE_TABLE,
+    ISSUES_PAGE_LIMIT,
+    ISSUES_MAX_PAGE_LIMIT,
+)
+
+logger = logging.getLogger("pat_api")
+router = APIRouter()
+
+
+@router.get(
+    "/issues",
+    summary="Get Device Issues",
+    response_description="Paginated issues and counts by exception for a device",
+)
+async def get_air_issues(
+    device_name: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    limit: int = Query(ISSUES_PAGE_LIMIT, ge=1, le=ISSUES_MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    order: str = "desc",
+    device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
+    issue_table=Depends(lambda: get_dynamodb_table(ISSUE_TABLE)),
+):
+    """Page through a device's issues, optionally between start and end (ISO 8601).
+
+    The range applies to when the API received each issue. Pass the returned
+    next_cursor to fetch the following page; counts grouped by exception
+    type for the whole range are included with the first page.
+    """
+    if not device_table or not issue_table:
+        logger.error("DynamoDB connection is unavailable.")
+        raise HTTPException(status_code=500, detail="DynamoDB is unavailable")
+
+    if device_name == "default_device":
+        logger.warning("Invalid device_id provided: default_device")
+        raise HTTPException(
+            status_code=400, detail="device_id cannot be 'default_device'."
+        )
+
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'.")
+
+    try:
+        start_ms = timestamp_to_ms(start) if start else None
+        end_ms = timestamp_to_ms(end) if end else None
+    except ValueError:
+        logger.warning(f"Invalid issues range provided: {start} - {end}")
+        raise HTTPException(
+            status_code=400, detail="start and end must be ISO 8601 datetimes."
+        )
+
+    if start_ms is not None and end_ms is not None and start_ms >= end_ms:
+        raise HTTPException(status_code=400, detail="start must be before end.")
+
+    try:
+        logger.info(f"Fetching device info for device: {device_name}")
+        device_info = get_device_info(device_table, device_name)
+
+        if not device_info:
+            logger.warning(f"No device found with ID: {device_name}")
+            raise HTTPException(
+                status_code=404, detail=f"No device found with ID: {device_name}"
+            )
+        device_id = device_info.get("DeviceID")
+
+    except HTTPException as http_exc:
+        raise http_exc
+
+    except Exception as e:
+        logger.error(f"Error fetching device info: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    try:
+        issues, next_cursor = query_device_issues(
+            issue_table,
+            device_id,
+            start_ms,
+            end_ms,
+            limit=limit,
+            cursor=cursor,
+            newest_first=order == "desc",
+        )
+    except ValueError as e:
+        logger.warning(f"Invalid issues cursor provided: {e}")
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    except Exception as e:
+        logger.error(f"Error retrieving issues: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    content = {"issues": issues, "next_cursor": next_cursor}
+
+    if not cursor:
+        try:
+            content["counts"] = count_device_issues(
+                issue_table, device_id, start_ms, end_ms
+            )
+        except Exception as e:
+            logger.error(f"Error counting issues: {e}")
+            raise HTTPException(status_code=500, detail="Internal server error")
+
+    logger.info(f"Retrieved {len(issues)} issues for device: {device_id}")
+    return FastJSONResponse(content=content, status_code=200)
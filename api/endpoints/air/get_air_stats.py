@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException
+from utils.response_utils import FastJSONResponse
+import logging
+from utils.api_utils import get_dynamodb_table, get_device_info
+from utils.air_stats_utils import get_air_stats
+from constants.database import DEVICE_TABLE
+from constants.air import AIR_QUALITY_DEVICE_TYPE
+
+logger = logging.getLogger("pat_api")
+router = APIRouter()
+
+
+@router.get(
+    "/info/stats",
+    summary="Get Rolling Stats",
+    response_description="Rolling means, percentiles and EWMA for a specific device",
+)
+async def get_air_stats_info(
+    device_name: str,
+    device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
+):
+    """Return the in-memory rolling statistics for an air quality device."""
+
+    if device_name == "default_device":
+        logger.warning("Invalid device_id provided: default_device")
+        raise HTTPException(
+            status_code=400, detail="device_id cannot be 'default_device'."
+        )
+
+    try:
+        logger.info(f"Fetching device info for device: {device_name}")
+        device_info = get_device_info(device_table, device_name)
+
+        if not device_info:
+            logger.warning(f"No device found with ID: {device_name}")
+            raise HTTPException(
+                status_code=404, detail=f"No device found with ID: {device_name}"
+            )
+        device_id = device_info.get("DeviceID")
+
+    except HTTPException as http_exc:
+        raise http_exc
+
+    except Exception as e:
+        logger.error(f"Error fetching device info: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    if device_info.get("DeviceType") != AIR_QUALITY_DEVICE_TYPE:
+        logger.warning(f"Device {device_name} is not an Air Quality device.")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Device {device_name} is not an Air Quality device.",
+        )
+
+    stats = get_air_stats(device_id)
+    if not stats:
+        logger.info(f"No stats available for device: {device_name}")
+        raise HTTPException(
+            status_code=404, detail=f"No data found for device {device_name}"
+        )
+
+    return FastJSONResponse(
+        content={"stats": stats, "device_info": device_info}, status_code=200
+    )
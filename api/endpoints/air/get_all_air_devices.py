@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
+from utils.response_utils import FastJSONResponse
 import logging
 from utils.api_utils import unique_device_names, get_dynamodb_table
 from constants.database import DEVICE_TABLE
@@ -19,14 +19,14 @@ async def get_all_door_devices(
 ):
     if not table:
         logger.error("DynamoDB connection is unavailable.")
-        return JSONResponse(
+        return FastJSONResponse(
             content={"error": "DynamoDB is unavailable"}, status_code=500
         )
 
     try:
         air_sensors = unique_device_names(table, AIR_QUALITY_DEVICE_TYPE)
         logger.info(f"Retrieved unique device IDs: {air_sensors}")
-        return JSONResponse(content={"devices": air_sensors}, status_code=200)
+        return FastJSONResponse(content={"devices": air_sensors}, status_code=200)
     except Exception as e:
         logger.error(f"Error retrieving devices: {e}")
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return FastJSONResponse(content={"error": str(e)}, status_code=500)
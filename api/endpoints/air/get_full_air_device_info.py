@@ -1,9 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from typing import Optional
+from utils.response_utils import FastJSONResponse
 import logging
-from utils.api_utils import get_dynamodb_table, get_device_info
+from utils.api_utils import get_dynamodb_table, get_device_info, parse_fields
 from utils.air_utils import format_full_air_info
-from constants.database import DATA_TABLE, DEVICE_TABLE, ISSUE_TABLE
+from utils.issue_utils import query_device_issues
+from utils.raw_read_utils import AIR_RECORD_FIELDS
+from constants.database import (
+    DATA_TABLE,
+    DEVICE_TABLE,
+    ISSUE_TABLE,
+    FULL_INFO_ISSUE_LIMIT,
+)
 
 logger = logging.getLogger("pat_api")
 router = APIRouter()
@@ -16,10 +24,15 @@ router = APIRouter()
 )
 async def get_full_air_device_info(
     device_name: str,
+    fields: Optional[str] = None,
     data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
     device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
     issue_table=Depends(lambda: get_dynamodb_table(ISSUE_TABLE)),
 ):
+    """Full history, device info and recent issues for an air device.
+
+    fields (comma separated) limits each database entry to the named values.
+    """
     if not data_table:
         logger.error("DynamoDB connection is unavailable.")
         raise HTTPException(status_code=500, detail="DynamoDB is unavailable")
@@ -38,6 +51,12 @@ async def get_full_air_device_info(
             status_code=400, detail="device_id cannot be 'default_device'."
         )
 
+    try:
+        selected_fields = parse_fields(fields, list(AIR_RECORD_FIELDS))
+    except ValueError as e:
+        logger.warning(f"Invalid fields provided: {fields}")
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         logger.info(f"Fetching device info for device: {device_name}")
         device_info = get_device_info(device_table, device_name)
@@ -59,15 +78,13 @@ async def get_full_air_device_info(
 
     try:
         logger.info(f"Retrieving latest info for device: {device_id}")
-        all_info = format_full_air_info(data_table, device_id)
+        all_info = format_full_air_info(data_table, device_id, selected_fields)
 
-        # Retrieve issues for the device
+        # Only the most recent issues are inlined; /air/issues pages the rest
         logger.info(f"Retrieving issues for device: {device_id}")
-        issues_response = issue_table.query(
-            KeyConditionExpression="DeviceID = :device_id",
-            ExpressionAttributeValues={":device_id": device_id},
+        issues, issues_next_cursor = query_device_issues(
+            issue_table, device_id, limit=FULL_INFO_ISSUE_LIMIT
         )
-        issues = issues_response.get("Items", [])
         logger.info(f"Retrieved {len(issues)} issues for device: {device_id}")
 
         if not all_info:
@@ -77,11 +94,12 @@ async def get_full_air_device_info(
             )
 
         logger.info(f"Retrieved latest info for {device_id}: {all_info}")
-        return JSONResponse(
+        return FastJSONResponse(
             content={
                 "database_entries": all_info,
                 "device_info": device_info,
                 "issues": issues,
+                "issues_next_cursor": issues_next_cursor,
             },
             status_code=200,
         )
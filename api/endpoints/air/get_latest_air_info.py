@@ -1,10 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from typing import Optional
+from utils.response_utils import FastJSONResponse
 import logging
-from utils.api_utils import get_dynamodb_table, get_device_info
+from utils.api_utils import get_dynamodb_table, get_device_info, parse_fields
 from utils.air_utils import get_latest_air_quality_info
+from utils.air_stats_utils import get_air_stats
 from constants.database import DATA_TABLE, DEVICE_TABLE
-from constants.air import AIR_QUALITY_DEVICE_TYPE
+from constants.air import (
+    AIR_QUALITY_DEVICE_TYPE,
+    AIR_LATEST_STORED_FIELDS,
+    AIR_LATEST_DERIVED_FIELDS,
+)
 
 logger = logging.getLogger("pat_api")
 router = APIRouter()
@@ -17,9 +23,15 @@ router = APIRouter()
 )
 async def get_latest_air_info(
     device_name: str,
+    fields: Optional[str] = None,
     data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
     device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
 ):
+    """Latest reading for an air device, with its rolling stats.
+
+    fields (comma separated) limits latest_info to the named attributes and
+    derived values; stats is only included when listed.
+    """
 
     if not data_table:
         logger.error("DynamoDB connection is unavailable.")
@@ -31,6 +43,14 @@ async def get_latest_air_info(
             status_code=400, detail="device_id cannot be 'default_device'."
         )
 
+    try:
+        selected_fields = parse_fields(
+            fields, AIR_LATEST_STORED_FIELDS + AIR_LATEST_DERIVED_FIELDS
+        )
+    except ValueError as e:
+        logger.warning(f"Invalid fields provided: {fields}")
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         logger.info(f"Fetching device info for device: {device_name}")
         device_info = get_device_info(device_table, device_name)
@@ -58,16 +78,21 @@ async def get_latest_air_info(
 
     try:
         logger.info(f"Retrieving latest info for device: {device_name}")
-        latest_info = get_latest_air_quality_info(data_table, device_id)
+        latest_info = get_latest_air_quality_info(
+            data_table, device_id, selected_fields
+        )
 
-        if not latest_info:
+        if latest_info is None:
             logger.info(f"No data found for device: {device_name}")
             raise HTTPException(
                 status_code=404, detail=f"No data found for device {device_name}"
             )
 
         logger.info(f"Retrieved latest info for {device_name}: {latest_info}")
-        return JSONResponse(content={"latest_info": latest_info}, status_code=200)
+        content = {"latest_info": latest_info}
+        if not selected_fields or "stats" in selected_fields:
+            content["stats"] = get_air_stats(device_id)
+        return FastJSONResponse(content=content, status_code=200)
 
     except HTTPException as e:
         raise e
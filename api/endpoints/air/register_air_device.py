@@ -1,10 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends
 import logging
-from fastapi.responses import JSONResponse
-from utils.api_utils import get_dynamodb_table, unique_device_names
+from utils.response_utils import FastJSONResponse
+from utils.api_utils import get_dynamodb_table
 from utils.air_utils import add_walle_device
+from utils.health_utils import track_registered_device
 from constants.database import DEVICE_TABLE
-from constants.air import AIR_QUALITY_DEVICE_TYPE
 from pydantic_models.door_models import DoorDevice
 
 logger = logging.getLogger("pat_api")
@@ -28,20 +28,18 @@ async def register_air_device(
         )
 
     try:
-        all_door_devices = unique_device_names(table, AIR_QUALITY_DEVICE_TYPE)
-        logger.info(f"Found all door devices: {all_door_devices}")
+        logger.info(f"Adding new device: {data.device_name}")
+        walle_device = add_walle_device(table, data.device_name)
 
-        if data.device_name in all_door_devices:
+        if walle_device is None:
             logger.warning(f"Device already exists: {data.device_name}")
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=409, content={"message": "Device already registered."}
             )
-
-        logger.info(f"Adding new device: {data.device_name}")
-        walle_device = add_walle_device(table, data.device_name)
         logger.info(f"Device {data.device_name} successfully added: {walle_device}")
+        track_registered_device(walle_device)
 
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=201,
             content={"message": "Device added.", "device": walle_device},
         )
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException, Depends
+import logging
+from utils.response_utils import FastJSONResponse
+from utils.api_utils import get_dynamodb_table
+from utils.door_utils import store_webhook
+from utils.air_alert_utils import AIR_ALERT_EVENT_TYPE
+from constants.database import DEVICE_TABLE
+from pydantic_models.air_models import RegisterAirWebhookRequest
+
+logger = logging.getLogger("pat_api")
+router = APIRouter()
+
+
+@router.post(
+    "/webhook/register",
+    summary="Register Air Alert Webhook",
+    response_description="Register a webhook URL for air quality alerts",
+)
+async def register_air_webhook(
+    data: RegisterAirWebhookRequest,
+    table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
+):
+    """Register a webhook URL to receive air quality alerts."""
+
+    if not table:
+        logger.error("DynamoDB connection is unavailable.")
+        raise HTTPException(status_code=500, detail="DynamoDB is unavailable")
+
+    if not data.webhook_url:
+        logger.warning("No webhook_url provided")
+        raise HTTPException(status_code=400, detail="webhook_url is required")
+
+    try:
+        logger.info(
+            f"Registering air alert webhook: {data.webhook_url} for device: {data.device_name}"
+        )
+        webhook_item = store_webhook(
+            table, data.webhook_url, data.device_name, AIR_ALERT_EVENT_TYPE
+        )
+
+        return FastJSONResponse(
+            status_code=201,
+            content={
+                "message": "Webhook registered successfully",
+                "webhook_id": webhook_item.get("WebhookID"),
+                "webhook_url": webhook_item.get("WebhookURL"),
+                "device_name": webhook_item.get("TargetDevice"),
+            },
+        )
+    except Exception as e:
+        logger.error(f"Error registering air alert webhook: {e}")
+        raise HTTPException(status_code=500, detail="Error registering webhook")
@@ -1,12 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header
 from decimal import Decimal
 import logging
 import json
-from fastapi.responses import JSONResponse
+from utils.response_utils import FastJSONResponse
 from utils.api_utils import get_dynamodb_table, get_device_info, create_event_id
-from utils.time_utils import get_current_utc_datetime
+from utils.time_utils import unique_sort_ms, ms_to_timestamp
+from utils.ingest_queue import (
+    write_data_item,
+    get_ingest_queue,
+    IngestBacklogError,
+)
+from utils.health_utils import record_device_reading
+from utils.cold_archive_utils import invalidate_cold_day
+from utils.idempotency_utils import (
+    get_idempotency_cache,
+    ingest_idempotency_key,
+    duplicate_response,
+)
+from typing import Optional
 from utils.door_utils import trigger_webhooks
-from constants.database import DATA_TABLE, DEVICE_TABLE
+from utils.door_analytics_utils import invalidate_door_analytics
+from constants.database import DATA_TABLE, DEVICE_TABLE, COLD_ARCHIVE
 from constants.door import DOOR_OPTIONS
 from pydantic_models.door_models import AddDoorDeviceData
 from datetime import datetime, timezone
@@ -24,6 +38,7 @@ async def add_door_data(
     data: AddDoorDeviceData,
     data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
     device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
+    idempotency_key: Optional[str] = Header(None),
 ):
     """Add new door sensor data to DynamoDB."""
     logger.info("Called /doors/add_data endpoint.")
@@ -40,6 +55,19 @@ async def add_door_data(
             status_code=400, detail="door_status must be 'OPEN' or 'CLOSED'."
         )
 
+    # Retries of an already stored reading are answered from the dedup window
+    dedup = get_idempotency_cache()
+    dedup_key = ingest_idempotency_key(
+        idempotency_key,
+        data.device_name,
+        data.timestamp,
+        data.door_status,
+        data.battery,
+    )
+    if dedup_key and dedup.seen(dedup_key):
+        logger.info(f"Duplicate reading for {data.device_name}, skipping write.")
+        return duplicate_response()
+
     try:
         logger.info(f"Fetching device info for device: {data.device_name}")
         device_info = get_device_info(device_table, data.device_name)
@@ -57,12 +85,10 @@ async def add_door_data(
         logger.error(f"Error fetching device info: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-    # Add timestamp if not provided
-    if data.timestamp:
-        timestamp = data.timestamp
-    else:
-        logger.info(f"No timestamp provided, using current UTC time: {data.timestamp}")
-        timestamp = get_current_utc_datetime()
+    # Add timestamp if not provided; either way the sort key is made unique.
+    # The model already parsed any client timestamp to epoch milliseconds
+    timestamp_ms = unique_sort_ms(device_info.get("DeviceID"), data.timestamp_ms)
+    timestamp = ms_to_timestamp(timestamp_ms)
 
     try:
         battery_value = Decimal(str(data.battery))
@@ -77,17 +103,31 @@ async def add_door_data(
         "EventID": create_event_id(),
         "DeviceName": data.device_name,
         "Timestamp": timestamp,
+        "EpochMs": timestamp_ms,
         "DeviceType": "DoorSensor",
         "DoorStatus": data.door_status,
         "Battery": battery_value,
     }
 
+    # Claim the key so a concurrent retry cannot write the reading twice
+    if dedup_key and not dedup.claim(dedup_key):
+        logger.info(f"Duplicate reading for {data.device_name}, skipping write.")
+        return duplicate_response()
+
     try:
         logger.info(
             f"Adding data to DynamoDB: {json.dumps(clean_up_data, default=str)}"
         )
-        data_table.put_item(Item=clean_up_data)
+        write_data_item(data_table, clean_up_data)
+        if dedup_key:
+            dedup.commit(dedup_key)
         logger.info("Data added successfully.")
+        record_device_reading(device_info, timestamp)
+        # With write-behind the queue invalidates once the item is flushed
+        if get_ingest_queue() is None:
+            invalidate_door_analytics(device_info.get("DeviceID"), timestamp)
+            if COLD_ARCHIVE:
+                invalidate_cold_day(device_info.get("DeviceID"), timestamp_ms)
 
         # Trigger webhooks with the new door state
         door_data = {
@@ -103,10 +143,17 @@ async def add_door_data(
         }
         trigger_webhooks(device_table, door_data)
 
-        return JSONResponse(
+        return FastJSONResponse(
             content={"message": "Data added successfully"}, status_code=200
         )
+    except IngestBacklogError as e:
+        dedup.release(dedup_key)
+        logger.warning(f"Ingest backlog, rejecting data: {e}")
+        raise HTTPException(
+            status_code=503, detail="Ingest queue is backlogged, retry later"
+        )
     except Exception as e:
+        dedup.release(dedup_key)
         logger.error(f"Error adding data to DynamoDB: {e}")
         raise HTTPException(
             status_code=500, detail="Internal server error while adding data"
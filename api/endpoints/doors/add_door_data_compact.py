@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, Header, Request, Response
+from typing import Optional
+import logging
+from utils.api_utils import get_dynamodb_table
+from utils.compact_ingest_utils import (
+    check_compact_devices,
+    compact_failure_response,
+    decode_door_records,
+    ingest_compact_records,
+)
+from constants.database import DATA_TABLE, DEVICE_TABLE
+from endpoints.doors.add_door_data import add_door_data
+
+logger = logging.getLogger("pat_api")
+router = APIRouter()
+
+
+@router.post(
+    "/add_data/compact",
+    summary="Add Door Data (Compact)",
+    response_description="Add door data from fixed-layout binary records",
+    status_code=204,
+)
+async def add_door_data_compact(
+    request: Request,
+    data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
+    device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
+    idempotency_key: Optional[str] = Header(None),
+):
+    """Add door data sent as compact binary records.
+
+    Each record is decoded into AddDoorDeviceData and written through the
+    same path as /doors/add_data/door_status, webhooks included. Failed
+    records are reported by index, as for /air/add_data/compact.
+    """
+    logger.info("Called /doors/add_data/compact endpoint.")
+    records = decode_door_records(await request.body())
+
+    # Nothing is written unless every record decodes and names a known device
+    check_compact_devices(device_table, records)
+
+    failed = await ingest_compact_records(
+        records,
+        lambda data, record_key: add_door_data(
+            data,
+            data_table=data_table,
+            device_table=device_table,
+            idempotency_key=record_key,
+        ),
+        idempotency_key,
+    )
+    if failed:
+        return compact_failure_response(len(records), failed)
+
+    logger.info(f"Added {len(records)} compact door records.")
+    return Response(status_code=204)
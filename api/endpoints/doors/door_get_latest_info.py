@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from typing import Optional
+from utils.response_utils import FastJSONResponse
 import logging
-from utils.api_utils import get_dynamodb_table, get_device_info
+from utils.api_utils import get_dynamodb_table, get_device_info, parse_fields
 from utils.door_utils import get_latest_door_info
+from utils.raw_read_utils import DOOR_RECORD_FIELDS
 from constants.database import DATA_TABLE, DEVICE_TABLE
 from constants.door import DOOR_DEVICE_TYPE
 
@@ -17,9 +19,15 @@ router = APIRouter()
 )
 async def door_get_latest_info(
     device_name: str,
+    fields: Optional[str] = None,
     data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
     device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
 ):
+    """Latest reading for a door device.
+
+    fields (comma separated) limits latest_info to the named values, e.g.
+    fields=door_status.
+    """
     if not data_table:
         logger.error("DynamoDB connection is unavailable.")
         raise HTTPException(status_code=500, detail="DynamoDB is unavailable")
@@ -30,6 +38,12 @@ async def door_get_latest_info(
             status_code=400, detail="device_id cannot be 'default_device'."
         )
 
+    try:
+        selected_fields = parse_fields(fields, list(DOOR_RECORD_FIELDS))
+    except ValueError as e:
+        logger.warning(f"Invalid fields provided: {fields}")
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         logger.info(f"Fetching device info for device: {device_name}")
         device_info = get_device_info(device_table, device_name)
@@ -56,7 +70,7 @@ async def door_get_latest_info(
 
     try:
         logger.info(f"Retrieving latest info for device: {device_name}")
-        latest_info = get_latest_door_info(data_table, device_id)
+        latest_info = get_latest_door_info(data_table, device_id, selected_fields)
 
         if not latest_info:
             logger.info(f"No data found for device: {device_name}")
@@ -65,7 +79,7 @@ async def door_get_latest_info(
             )
 
         logger.info(f"Retrieved latest info for {device_name}: {latest_info}")
-        return JSONResponse(content={"latest_info": latest_info}, status_code=200)
+        return FastJSONResponse(content={"latest_info": latest_info}, status_code=200)
 
     except HTTPException as e:
         raise e
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from utils.response_utils import FastJSONResponse
 import logging
 from utils.api_utils import get_dynamodb_table, unique_device_names, get_device_info
 from utils.door_utils import get_latest_door_info
@@ -30,7 +30,7 @@ async def get_all_doors_current_state(
 
         if not door_device_names:
             logger.info("No door devices found")
-            return JSONResponse(content={"devices": []}, status_code=200)
+            return FastJSONResponse(content={"devices": []}, status_code=200)
 
         # Get latest state for each door device
         all_door_states = []
@@ -82,8 +82,8 @@ async def get_all_doors_current_state(
                 )
 
         logger.info(f"Retrieved current state for {len(all_door_states)} door devices")
-        return JSONResponse(content={"devices": all_door_states}, status_code=200)
+        return FastJSONResponse(content={"devices": all_door_states}, status_code=200)
 
     except Exception as e:
         logger.error(f"Error retrieving all doors current state: {e}")
-        return JSONResponse(content={"error": str(e)}, status_code=500)
+        return FastJSONResponse(content={"error": str(e)}, status_code=500)
@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException
+from utils.response_utils import FastJSONResponse
+from typing import Optional
+from datetime import datetime, timedelta, timezone
+import logging
+from utils.api_utils import get_dynamodb_table, get_device_info
+from utils.door_analytics_utils import get_door_analytics
+from utils.time_utils import EPOCH, parse_utc_timestamp
+from constants.database import DATA_TABLE, DEVICE_TABLE
+from constants.door import DOOR_ANALYTICS_DEFAULT_DAYS, DOOR_ANALYTICS_MAX_DAYS
+
+logger = logging.getLogger("pat_api")
+router = APIRouter()
+
+
+@router.get(
+    "/analytics",
+    summary="Get Door Analytics",
+    response_description="Open durations, open counts and heatmaps for a door",
+)
+async def get_door_analytics_info(
+    device_name: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
+    device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
+):
+    """Summarise a door's open/close history between start and end (ISO 8601).
+
+    Defaults to the last DOOR_ANALYTICS_DEFAULT_DAYS days.
+    """
+    if not data_table or not device_table:
+        logger.error("DynamoDB connection is unavailable.")
+        raise HTTPException(status_code=500, detail="DynamoDB is unavailable")
+
+    if device_name == "default_device":
+        logger.warning("Invalid device_id provided: default_device")
+        raise HTTPException(
+            status_code=400, detail="device_id cannot be 'default_device'."
+        )
+
+    try:
+        end_dt = parse_utc_timestamp(end) if end else datetime.now(timezone.utc)
+        start_dt = (
+            parse_utc_timestamp(start)
+            if start
+            else end_dt - timedelta(days=DOOR_ANALYTICS_DEFAULT_DAYS)
+        )
+    except ValueError:
+        logger.warning(f"Invalid analytics range provided: {start} - {end}")
+        raise HTTPException(
+            status_code=400, detail="start and end must be ISO 8601 datetimes."
+        )
+
+    if start_dt >= end_dt:
+        raise HTTPException(status_code=400, detail="start must be before end.")
+
+    if end_dt - start_dt > timedelta(days=DOOR_ANALYTICS_MAX_DAYS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range cannot be longer than {DOOR_ANALYTICS_MAX_DAYS} days.",
+        )
+
+    try:
+        logger.info(f"Fetching device info for device: {device_name}")
+        device_info = get_device_info(device_table, device_name)
+
+        if not device_info:
+            logger.warning(f"No device found with ID: {device_name}")
+            raise HTTPException(
+                status_code=404, detail=f"No device found with ID: {device_name}"
+            )
+        device_id = device_info.get("DeviceID")
+
+    except HTTPException as http_exc:
+        raise http_exc
+
+    except Exception as e:
+        logger.error(f"Error fetching device info: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    try:
+        logger.info(f"Computing door analytics for device: {device_id}")
+        analytics = get_door_analytics(
+            data_table,
+            device_id,
+            (start_dt - EPOCH) // timedelta(milliseconds=1),
+            (end_dt - EPOCH) // timedelta(milliseconds=1),
+        )
+        analytics["device_info"] = device_info
+        return FastJSONResponse(content=analytics, status_code=200)
+
+    except Exception as e:
+        logger.error(f"Error computing door analytics: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
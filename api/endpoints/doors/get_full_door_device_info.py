@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from typing import Optional
+from utils.response_utils import FastJSONResponse
 import logging
-from utils.api_utils import get_dynamodb_table, get_device_info
+from utils.api_utils import get_dynamodb_table, get_device_info, parse_fields
 from utils.door_utils import format_all_door_info
+from utils.raw_read_utils import DOOR_RECORD_FIELDS
 from constants.database import DATA_TABLE, DEVICE_TABLE
 
 logger = logging.getLogger("pat_api")
@@ -16,9 +18,14 @@ router = APIRouter()
 )
 async def get_full_door_device_info(
     device_name: str,
+    fields: Optional[str] = None,
     data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
     device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
 ):
+    """Full history and device info for a door device.
+
+    fields (comma separated) limits each database entry to the named values.
+    """
     if not data_table:
         logger.error("DynamoDB connection is unavailable.")
         raise HTTPException(status_code=500, detail="DynamoDB is unavailable")
@@ -33,6 +40,12 @@ async def get_full_door_device_info(
             status_code=400, detail="device_id cannot be 'default_device'."
         )
 
+    try:
+        selected_fields = parse_fields(fields, list(DOOR_RECORD_FIELDS))
+    except ValueError as e:
+        logger.warning(f"Invalid fields provided: {fields}")
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         logger.info(f"Fetching device info for device: {device_name}")
         device_info = get_device_info(device_table, device_name)
@@ -53,7 +66,7 @@ async def get_full_door_device_info(
 
     try:
         logger.info(f"Retrieving latest info for device: {device_id}")
-        all_info = format_all_door_info(data_table, device_id)
+        all_info = format_all_door_info(data_table, device_id, selected_fields)
 
         if not all_info:
             logger.info(f"No data found for device: {device_id}")
@@ -62,7 +75,7 @@ async def get_full_door_device_info(
             )
 
         logger.info(f"Retrieved latest info for {device_id}: {all_info}")
-        return JSONResponse(
+        return FastJSONResponse(
             content={"database_entries": all_info, "device_info": device_info},
             status_code=200,
         )
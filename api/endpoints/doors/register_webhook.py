@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
 import logging
-from fastapi.responses import JSONResponse
+from utils.response_utils import FastJSONResponse
 from utils.api_utils import get_dynamodb_table
 from utils.door_utils import store_webhook
 from constants.database import DEVICE_TABLE
@@ -35,13 +35,13 @@ async def register_webhook(
         )
         webhook_item = store_webhook(table, data.webhook_url, data.device_name)
 
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=201,
             content={
                 "message": "Webhook registered successfully",
                 "webhook_id": webhook_item.get("WebhookID"),
                 "webhook_url": webhook_item.get("WebhookURL"),
-                "device_name": webhook_item.get("DeviceName"),
+                "device_name": webhook_item.get("TargetDevice"),
             },
         )
     except Exception as e:
@@ -1,15 +1,20 @@
 from endpoints.pat import (
     home,
     get_device_info,
+    get_bulk_device_info,
     get_all_data,
+    get_device_health,
     delete_device,
     delete_all_data,
+    import_data,
 )
 from endpoints.doors import (
     add_door_data,
+    add_door_data_compact,
     get_all_door_devices,
     get_all_doors_current_state,
     get_full_door_device_info,
+    get_door_analytics,
     door_get_latest_info,
     register_door_device,
     register_webhook,
@@ -18,10 +23,14 @@ from endpoints.doors import (
 from endpoints.air import (
     get_all_air_devices,
     get_latest_air_info,
+    get_air_stats,
     get_full_air_device_info,
     register_air_device,
     add_air_data,
+    add_air_data_compact,
     add_air_issue,
+    get_air_issues,
+    register_air_webhook,
 )
 
 from endpoints.admin import (
@@ -36,7 +45,11 @@ def get_all_routes(app):
     # Get
     app.include_router(home.router, prefix="/pat", tags=["General"])
     app.include_router(get_device_info.router, prefix="/pat", tags=["General"])
+    app.include_router(get_bulk_device_info.router, prefix="/pat", tags=["General"])
     app.include_router(get_all_data.router, prefix="/pat", tags=["General"])
+    app.include_router(get_device_health.router, prefix="/pat", tags=["General"])
+    # Post
+    app.include_router(import_data.router, prefix="/pat", tags=["General"])
     # Delete
     app.include_router(delete_all_data.router, prefix="/pat", tags=["General"])
     app.include_router(delete_device.router, prefix="/pat", tags=["General"])
@@ -52,10 +65,18 @@ def get_all_routes(app):
         get_full_air_device_info.router, prefix="/air", tags=["Air Quality"]
     )
     app.include_router(get_latest_air_info.router, prefix="/air", tags=["Air Quality"])
+    app.include_router(get_air_stats.router, prefix="/air", tags=["Air Quality"])
+    app.include_router(get_air_issues.router, prefix="/air", tags=["Air Quality"])
     # Post
     app.include_router(register_air_device.router, prefix="/air", tags=["Air Quality"])
     app.include_router(add_air_data.router, prefix="/air", tags=["Air Quality"])
+    app.include_router(
+        add_air_data_compact.router, prefix="/air", tags=["Air Quality"]
+    )
     app.include_router(add_air_issue.router, prefix="/air", tags=["Air Quality"])
+    app.include_router(
+        register_air_webhook.router, prefix="/air", tags=["Air Quality"]
+    )
 
     # Door specific APIs
     # Get
@@ -68,9 +89,11 @@ def get_all_routes(app):
     )
     app.include_router(get_device_info.router, prefix="/doors", tags=["Doors"])
     app.include_router(door_get_latest_info.router, prefix="/doors", tags=["Doors"])
+    app.include_router(get_door_analytics.router, prefix="/doors", tags=["Doors"])
 
     # Post
     app.include_router(add_door_data.router, prefix="/doors", tags=["Doors"])
+    app.include_router(add_door_data_compact.router, prefix="/doors", tags=["Doors"])
     app.include_router(register_door_device.router, prefix="/doors", tags=["Doors"])
     app.include_router(register_webhook.router, prefix="/doors", tags=["Doors"])
 
@@ -1,9 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException
+from utils.response_utils import FastJSONResponse
 import logging
-from utils.api_utils import get_dynamodb_table, batch_delete_table_items
-from utils.air_utils import format_full_air_info
-from constants.database import DATA_TABLE, DEVICE_TABLE
+from utils.api_utils import forget_cached_device
+from utils.dynamodb_utils import reset_tables
+from utils.health_utils import get_health_monitor
+from utils.cold_archive_utils import delete_cold_archive
+from utils.door_analytics_utils import clear_door_analytics
+from utils.air_stats_utils import clear_air_stats
+from utils.air_alert_utils import clear_air_alerts
+from utils.issue_utils import clear_issue_windows
+from utils.idempotency_utils import clear_idempotency_keys
+from utils.ingest_queue import discarding_ingest_queue
+from constants.database import DATA_TABLE, DEVICE_TABLE, ISSUE_TABLE, AIR_PACKED_TABLE
 
 logger = logging.getLogger("pat_api")
 router = APIRouter()
@@ -14,44 +22,62 @@ router = APIRouter()
     summary="Delete Device",
     response_description="Delete a device from the database",
 )
-async def delete_all_data(
-    data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
-    device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
-):
-    if not data_table:
-        logger.error("DynamoDB connection is unavailable.")
-        raise HTTPException(status_code=500, detail="DynamoDB is unavailable")
-
-    if not device_table:
-        logger.error("DynamoDB connection is unavailable.")
-        raise HTTPException(status_code=500, detail="DynamoDB is unavailable")
+async def delete_all_data():
+    """Delete every device, reading and issue.
 
+    The tables are dropped and recreated rather than emptied item by item,
+    so clearing a large dataset takes seconds. Counts are the item counts
+    DescribeTable reported before the drop. Readings still queued for
+    write-behind are discarded, and in-memory state derived from the old
+    data (caches, statistics, alert state, issue windows and idempotency
+    keys) is cleared.
+    """
     try:
-        logger.info("Attempting to delete all data from the device table.")
-        device_table_deleted_items_count = batch_delete_table_items(device_table)
+        logger.info("Attempting to reset all tables.")
+        with discarding_ingest_queue() as queued_count:
+            item_counts = reset_tables(
+                [DEVICE_TABLE, DATA_TABLE, ISSUE_TABLE, AIR_PACKED_TABLE]
+            )
         logger.info(
-            f"Deleted {device_table_deleted_items_count} items from the device table."
+            f"Reset all tables: {item_counts}, discarded {queued_count} queued items"
+        )
+    except Exception as e:
+        logger.error(f"Error resetting tables: {e}")
+        raise HTTPException(
+            status_code=500, detail="Internal server error resetting the database"
         )
-    except HTTPException as e:
-        logger.error(f"Error deleting data from device table: {e}")
-        raise e
+    finally:
+        get_health_monitor().clear()
+        forget_cached_device()
+        clear_door_analytics()
+        clear_air_stats()
+        clear_air_alerts()
+        clear_issue_windows()
+        clear_idempotency_keys()
 
     try:
-        logger.info("Attempting to delete all data from the data table.")
-        data_table_deleted_items_count = batch_delete_table_items(data_table)
+        logger.info("Attempting to delete all days from the cold archive.")
+        cold_archive_deleted_days_count = delete_cold_archive()
         logger.info(
-            f"Deleted {data_table_deleted_items_count} items from the data table."
+            f"Deleted {cold_archive_deleted_days_count} days from the cold archive."
+        )
+    except Exception as e:
+        logger.error(f"Error deleting the cold archive: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error deleting the cold archive",
         )
-    except HTTPException as e:
-        logger.error(f"Error deleting data from data table: {e}")
-        raise e
 
-    return JSONResponse(
+    return FastJSONResponse(
         content={
             "message": "All data has been deleted from the database.",
             "delete_counts": {
-                "device_table": device_table_deleted_items_count,
-                "data_table": data_table_deleted_items_count,
+                "device_table": item_counts[DEVICE_TABLE],
+                "data_table": item_counts[DATA_TABLE],
+                "issue_table": item_counts[ISSUE_TABLE],
+                "packed_air_table": item_counts[AIR_PACKED_TABLE],
+                "write_behind_queue": queued_count,
+                "cold_archive_days": cold_archive_deleted_days_count,
             },
         },
         status_code=200,
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from utils.response_utils import FastJSONResponse
 import logging
 from utils.api_utils import (
     get_dynamodb_table,
@@ -7,9 +7,13 @@ from utils.api_utils import (
     delete_device_entries_from_devices_table,
     craft_delete_resposne,
     delete_device_entries_from_data_table,
+    forget_cached_device,
 )
 from utils.air_utils import format_full_air_info
-from constants.database import DATA_TABLE, DEVICE_TABLE
+from utils.air_packed_utils import delete_packed_device
+from utils.cold_archive_utils import delete_cold_device
+from utils.health_utils import forget_deleted_device
+from constants.database import DATA_TABLE, DEVICE_TABLE, AIR_PACKED_TABLE
 
 logger = logging.getLogger("pat_api")
 router = APIRouter()
@@ -24,6 +28,7 @@ async def delete_pat_device(
     device_name: str,
     data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
     device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
+    packed_table=Depends(lambda: get_dynamodb_table(AIR_PACKED_TABLE)),
 ):
     if not data_table:
         logger.error("DynamoDB connection is unavailable.")
@@ -63,6 +68,8 @@ async def delete_pat_device(
             device_table, device_id
         )
         logger.info(f"Deleted {device_deleted_count} items from device table")
+        forget_deleted_device(device_id)
+        forget_cached_device(device_name)
     except HTTPException as e:
         logger.error(f"Error deleting device from device table: {e}")
         raise e
@@ -76,7 +83,27 @@ async def delete_pat_device(
         logger.error(f"Error deleting device from data table: {e}")
         raise e
 
-    return JSONResponse(
+    try:
+        packed_deleted_count = delete_packed_device(packed_table, device_id)
+        logger.info(f"Deleted {packed_deleted_count} packed air buckets")
+    except Exception as e:
+        logger.error(f"Error deleting device from packed air table: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error deleting from PATAirPacked",
+        )
+
+    try:
+        cold_deleted_count = delete_cold_device(device_id)
+        logger.info(f"Deleted {cold_deleted_count} archived days")
+    except Exception as e:
+        logger.error(f"Error deleting device from cold archive: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error deleting from the cold archive",
+        )
+
+    return FastJSONResponse(
         status_code=200,
         content={
             "message": craft_delete_resposne(
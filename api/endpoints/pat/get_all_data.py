@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from utils.response_utils import FastJSONResponse
 import logging
 from utils.api_utils import get_dynamodb_table, fetch_all_items
-from constants.database import DATA_TABLE, DEVICE_TABLE
+from constants.database import DATA_TABLE, DEVICE_TABLE, ISSUE_TABLE
 
 logger = logging.getLogger("pat_api")
 router = APIRouter()
@@ -11,23 +11,28 @@ router = APIRouter()
 @router.get(
     "/database/all",
     summary="Get Entire Database",
-    response_description="Retrieve all data from the devices and data tables.",
+    response_description="Retrieve all data from the devices, data and issues tables.",
 )
 async def get_all_data(
     device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
     data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
+    issue_table=Depends(lambda: get_dynamodb_table(ISSUE_TABLE)),
 ):
-    """Retrieve all entries from the PATDevices and PATData tables."""
+    """Retrieve all entries from the PATDevices, PATData and PATIssues tables.
+
+    The response can be loaded back with /pat/data/import?format=export.
+    """
     try:
         logger.info("Fetching entire database.")
 
         devices = fetch_all_items(device_table)
         data = fetch_all_items(data_table)
+        issues = fetch_all_items(issue_table)
 
-        response = {"devices": devices, "data": data}
+        response = {"devices": devices, "data": data, "issues": issues}
 
         logger.info("Successfully fetched entire database.")
-        return JSONResponse(content=response, status_code=200)
+        return FastJSONResponse(content=response, status_code=200)
 
     except HTTPException as e:
         raise e  # Re-raise for proper response handling
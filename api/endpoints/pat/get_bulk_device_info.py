@@ -0,0 +1,132 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from utils.response_utils import FastJSONResponse
+from typing import List, Optional
+import logging
+from utils.api_utils import (
+    get_dynamodb_table,
+    get_devices_info,
+    get_latest_info_many,
+)
+from utils.air_utils import format_latest_air_quality_info
+from utils.door_utils import format_latest_door_info
+from constants.database import (
+    DATA_TABLE,
+    DEVICE_TABLE,
+    BULK_READ_MAX_DEVICES,
+    BULK_READ_MAX_WORKERS,
+)
+from constants.air import AIR_QUALITY_DEVICE_TYPE
+from constants.door import DOOR_DEVICE_TYPE
+
+logger = logging.getLogger("pat_api")
+router = APIRouter()
+
+# Short names matching the route prefixes, alongside the stored DeviceType
+DEVICE_TYPE_ALIASES = {
+    "air": AIR_QUALITY_DEVICE_TYPE,
+    "doors": DOOR_DEVICE_TYPE,
+}
+
+
+def format_bulk_latest_info(device_info, latest_info):
+    """Format a latest entry the way the per-type /info/latest endpoints do."""
+    if not latest_info:
+        return None
+
+    device_id = device_info.get("DeviceID")
+    device_type = device_info.get("DeviceType")
+    if device_type == AIR_QUALITY_DEVICE_TYPE:
+        return format_latest_air_quality_info(latest_info, device_id)
+    if device_type == DOOR_DEVICE_TYPE:
+        return format_latest_door_info(latest_info, device_id)
+    return latest_info
+
+
+@router.get(
+    "/info/bulk",
+    summary="Get Bulk Device Info",
+    response_description="Getting device info and latest reading for many devices",
+)
+async def get_bulk_device_info(
+    device_names: Optional[List[str]] = Query(None),
+    device_type: Optional[str] = None,
+    data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
+    device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
+):
+    """Return device info plus the latest reading for each requested device.
+
+    Pass device_names (repeated or comma separated), a device_type ('air',
+    'doors' or a stored DeviceType), or both.
+    """
+    if not data_table or not device_table:
+        logger.error("DynamoDB connection is unavailable.")
+        raise HTTPException(status_code=500, detail="DynamoDB is unavailable")
+
+    names = [
+        name.strip()
+        for value in device_names or []
+        for name in value.split(",")
+        if name.strip()
+    ]
+    if not names and not device_type:
+        raise HTTPException(
+            status_code=400, detail="Provide device_names or device_type."
+        )
+
+    if len(names) > BULK_READ_MAX_DEVICES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot request more than {BULK_READ_MAX_DEVICES} devices.",
+        )
+
+    if "default_device" in names:
+        logger.warning("Invalid device_name provided: default_device")
+        raise HTTPException(
+            status_code=400, detail="device_name cannot be 'default_device'."
+        )
+
+    if device_type:
+        device_type = DEVICE_TYPE_ALIASES.get(device_type.lower(), device_type)
+
+    try:
+        logger.info(f"Fetching bulk device info for {len(names)} names, {device_type}")
+        devices = get_devices_info(device_table, names, device_type)
+        latest = get_latest_info_many(
+            data_table,
+            [device.get("DeviceID") for device in devices],
+            max_workers=BULK_READ_MAX_WORKERS,
+        )
+
+        results = []
+        for device_info in sorted(devices, key=lambda d: d.get("DeviceName", "")):
+            try:
+                latest_info = format_bulk_latest_info(
+                    device_info, latest.get(device_info.get("DeviceID"))
+                )
+            except ValueError as e:
+                logger.error(
+                    f"Error formatting latest info for {device_info.get('DeviceName')}: {e}"
+                )
+                latest_info = None
+
+            results.append(
+                {
+                    "device_name": device_info.get("DeviceName"),
+                    "device_info": device_info,
+                    "latest_info": latest_info,
+                }
+            )
+
+        found = {device.get("DeviceName") for device in devices}
+        missing = [name for name in names if name not in found]
+        if missing:
+            logger.warning(f"No device found for names: {missing}")
+
+        logger.info(f"Retrieved bulk info for {len(results)} devices")
+        return FastJSONResponse(
+            content={"devices": results, "missing": missing}, status_code=200
+        )
+
+    except Exception as e:
+        logger.error(f"Error retrieving bulk device info: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+from utils.response_utils import FastJSONResponse
+import logging
+from utils.health_utils import get_health_monitor
+
+logger = logging.getLogger("pat_api")
+router = APIRouter()
+
+
+@router.get(
+    "/health/devices",
+    summary="Get Device Health",
+    response_description="Last-seen, staleness and recent issue counts for all devices",
+)
+async def get_device_health():
+    """Summarise the health of every device from the in-memory monitor."""
+    try:
+        summary = get_health_monitor().summary()
+        logger.info(
+            f"Device health: {summary['counts']['stale']} of "
+            f"{summary['counts']['total']} devices stale"
+        )
+        return FastJSONResponse(content=summary, status_code=200)
+    except Exception as e:
+        logger.error(f"Error building device health summary: {e}")
+        return FastJSONResponse(content={"error": str(e)}, status_code=500)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from typing import Optional
+from utils.response_utils import FastJSONResponse
 import logging
-from utils.api_utils import get_dynamodb_table, get_device_info
-from constants.database import DEVICE_TABLE
+from utils.api_utils import get_dynamodb_table, get_device_info, parse_fields
+from constants.database import DEVICE_TABLE, DEVICE_INFO_FIELDS
 
 logger = logging.getLogger("pat_api")
 router = APIRouter()
@@ -15,8 +16,13 @@ router = APIRouter()
 )
 async def get_door_device_info(
     device_name: str,
+    fields: Optional[str] = None,
     table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
 ):
+    """Device record for a device name.
+
+    fields (comma separated) limits the record to the named attributes.
+    """
     if not table:
         logger.error("DynamoDB connection is unavailable.")
         raise HTTPException(status_code=500, detail="DynamoDB is unavailable")
@@ -27,9 +33,15 @@ async def get_door_device_info(
             status_code=400, detail="device_name cannot be 'default_device'."
         )
 
+    try:
+        selected_fields = parse_fields(fields, DEVICE_INFO_FIELDS)
+    except ValueError as e:
+        logger.warning(f"Invalid fields provided: {fields}")
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         logger.info(f"Retrieving latest info for device: {device_name}")
-        device_info = get_device_info(table, device_name)
+        device_info = get_device_info(table, device_name, selected_fields)
 
         if not device_info:
             logger.info(f"No data found for device: {device_name}")
@@ -38,7 +50,7 @@ async def get_door_device_info(
             )
 
         logger.info(f"Retrieved latest info for {device_name}: {device_info}")
-        return JSONResponse(content={"device_info": device_info}, status_code=200)
+        return FastJSONResponse(content={"device_info": device_info}, status_code=200)
 
     except HTTPException as e:
         raise e  # Re-raise expected HTTPExceptions
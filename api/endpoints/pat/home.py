@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from utils.response_utils import FastJSONResponse
 import logging
 
 router = APIRouter()
@@ -14,4 +14,4 @@ async def home():
         A welcome message for the PAT API.
     """
     logging.info("Called home endpoint.")
-    return JSONResponse(content={"message": "Welcome to PAT API"}, status_code=200)
+    return FastJSONResponse(content={"message": "Welcome to PAT API"}, status_code=200)
@@ -0,0 +1,122 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from utils.response_utils import FastJSONResponse
+import logging
+from utils.api_utils import (
+    get_dynamodb_table,
+    forget_cached_device,
+    claim_device_names,
+)
+from utils.import_utils import (
+    IMPORT_FORMATS,
+    BulkImporter,
+    get_import_parser,
+    refresh_derived_history,
+)
+from utils.air_stats_utils import warm_air_stats
+from utils.door_analytics_utils import clear_door_analytics
+from utils.health_utils import warm_device_health
+from constants.database import DATA_TABLE, DEVICE_TABLE, ISSUE_TABLE, AIR_PACKED_TABLE
+
+logger = logging.getLogger("pat_api")
+router = APIRouter()
+
+
+def refresh_after_import(importer, data_table, device_table, issue_table, packed_table):
+    """Rebuild the state derived from the tables once an import has ended.
+
+    Readings may land anywhere in history, so packed and archived history,
+    caches and the warmed statistics are all rebuilt.
+    """
+    try:
+        refresh_derived_history(importer.device_ids[DATA_TABLE], packed_table)
+        claim_device_names(device_table)
+        forget_cached_device()
+        clear_door_analytics()
+        warm_air_stats(data_table, device_table)
+        warm_device_health(data_table, device_table, issue_table)
+    except Exception as e:
+        logger.error(f"Error refreshing state after import: {e}")
+
+
+@router.post(
+    "/data/import",
+    summary="Import Data",
+    response_description="Bulk load devices, data and issues into the database",
+)
+async def import_data(
+    request: Request,
+    format: str = "ndjson",
+    data_table=Depends(lambda: get_dynamodb_table(DATA_TABLE)),
+    device_table=Depends(lambda: get_dynamodb_table(DEVICE_TABLE)),
+    issue_table=Depends(lambda: get_dynamodb_table(ISSUE_TABLE)),
+    packed_table=Depends(lambda: get_dynamodb_table(AIR_PACKED_TABLE)),
+):
+    """Stream items into PATDevices, PATData and PATIssues.
+
+    format is "ndjson" (one {"table": ..., "item": {...}} object per line,
+    where table is a table name or devices/data/issues) or "export" (the
+    /pat/database/all response). Items with an existing key are replaced.
+    """
+    if format not in IMPORT_FORMATS:
+        logger.warning(f"Invalid import format provided: {format}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: {', '.join(IMPORT_FORMATS)}.",
+        )
+
+    if not data_table or not device_table or not issue_table:
+        logger.error("DynamoDB connection is unavailable.")
+        raise HTTPException(status_code=500, detail="DynamoDB is unavailable")
+
+    logger.info(f"Starting {format} import.")
+    parser = get_import_parser(format)
+    importer = BulkImporter(
+        {
+            DEVICE_TABLE: device_table,
+            DATA_TABLE: data_table,
+            ISSUE_TABLE: issue_table,
+        }
+    )
+    # Parsing and the batch writers block, so they run in the thread pool
+    # and other requests keep being served during a long import
+    error = None
+    try:
+        async for chunk in request.stream():
+            await run_in_threadpool(importer.add_all, parser.feed(chunk))
+        await run_in_threadpool(importer.add_all, parser.close())
+        summary = await run_in_threadpool(importer.finish)
+    except ValueError as e:
+        logger.warning(f"Invalid import body: {e}")
+        error = (400, f"Invalid import body: {e}")
+    except Exception as e:
+        logger.error(f"Error importing data: {e}")
+        error = (500, "Internal server error importing data")
+    if error:
+        await run_in_threadpool(importer.close)
+        summary = importer.summary()
+        logger.info(f"Import stopped early: {summary}")
+    else:
+        logger.info(f"Import finished: {summary}")
+
+    # Batches written before a failure stay in the tables, so the derived
+    # state is refreshed either way
+    await run_in_threadpool(
+        refresh_after_import,
+        importer,
+        data_table,
+        device_table,
+        issue_table,
+        packed_table,
+    )
+
+    if error:
+        # Report what landed, so the caller knows what a retry must cover
+        status_code, message = error
+        raise HTTPException(
+            status_code=status_code, detail={"message": message, **summary}
+        )
+
+    return FastJSONResponse(
+        content={"message": "Import complete.", **summary}, status_code=200
+    )
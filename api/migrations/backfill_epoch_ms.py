@@ -0,0 +1,99 @@
+"""
+Backfill the numeric EpochMs attribute on PATData items written before it existed.
+
+EpochMs holds the reading's epoch milliseconds, parsed once from whatever
+Timestamp format the item was stored with. Items that already have it are
+skipped, and the update is conditional, so the backfill is safe to re-run
+while the API keeps ingesting.
+
+Requires DynamoDB Local on localhost:8000.
+
+    cd api && python -m migrations.backfill_epoch_ms [--dry-run]
+"""
+
+import argparse
+import time
+import boto3
+from utils.time_utils import timestamp_to_ms
+from constants.database import DATA_TABLE
+
+
+def backfill(client, dry_run=False):
+    """Add EpochMs to every PATData item missing it.
+
+    Returns (items scanned, items updated, items with unparseable Timestamps).
+    """
+    scan_params = {
+        "TableName": DATA_TABLE,
+        "ProjectionExpression": "DeviceID, #ts, EpochMs",
+        "ExpressionAttributeNames": {"#ts": "Timestamp"},
+    }
+    scanned = updated = invalid = 0
+
+    while True:
+        response = client.scan(**scan_params)
+        for item in response.get("Items", []):
+            scanned += 1
+            if "EpochMs" in item:
+                continue
+            try:
+                epoch_ms = timestamp_to_ms(item["Timestamp"]["S"])
+            except ValueError:
+                invalid += 1
+                print(f"Unparseable Timestamp: {item['Timestamp']['S']}")
+                continue
+
+            if not dry_run:
+                try:
+                    client.update_item(
+                        TableName=DATA_TABLE,
+                        Key={
+                            "DeviceID": item["DeviceID"],
+                            "Timestamp": item["Timestamp"],
+                        },
+                        UpdateExpression="SET EpochMs = :epoch_ms",
+                        # Skip items deleted since the scan instead of upserting
+                        ConditionExpression=(
+                            "attribute_exists(DeviceID) "
+                            "AND attribute_not_exists(EpochMs)"
+                        ),
+                        ExpressionAttributeValues={":epoch_ms": {"N": str(epoch_ms)}},
+                    )
+                except client.exceptions.ConditionalCheckFailedException:
+                    continue  # Deleted or written by the API in the meantime
+            updated += 1
+
+        last_evaluated_key = response.get("LastEvaluatedKey")
+        if not last_evaluated_key:
+            break
+        scan_params["ExclusiveStartKey"] = last_evaluated_key
+
+    return scanned, updated, invalid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill PATData EpochMs")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report counts without writing"
+    )
+    args = parser.parse_args()
+
+    client = boto3.client(
+        "dynamodb",
+        region_name="us-west-2",
+        endpoint_url="http://localhost:8000",
+        aws_access_key_id="fakeAccessKey",
+        aws_secret_access_key="fakeSecretKey",
+    )
+
+    start = time.perf_counter()
+    scanned, updated, invalid = backfill(client, dry_run=args.dry_run)
+    action = "Would update" if args.dry_run else "Updated"
+    print(
+        f"Scanned {scanned} items. {action} {updated}, "
+        f"{invalid} unparseable, in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
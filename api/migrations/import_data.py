@@ -0,0 +1,118 @@
+"""
+Bulk import devices, data and issues into the PAT tables.
+
+Reads NDJSON ({"table": ..., "item": {...}} per line) or a saved
+/pat/database/all response, optionally gzip-compressed, and writes it
+through parallel batch writers (see utils/import_utils.py). Items with an
+existing key are replaced, so an interrupted import can simply be re-run.
+
+Requires DynamoDB Local on localhost:8000. Restart the API afterwards so
+its in-memory caches and statistics pick up the imported history, or use
+POST /pat/data/import against the running API instead.
+
+    cd api && python -m migrations.import_data backup.ndjson [--format export] [--workers 8]
+"""
+
+import argparse
+import gzip
+import boto3
+from utils.api_utils import claim_device_names
+from utils.dynamodb_utils import (
+    ensure_data_table_exists,
+    ensure_devices_table_exists,
+    ensure_issues_table_exists,
+    ensure_air_packed_table_exists,
+)
+from utils.import_utils import (
+    IMPORT_FORMATS,
+    BulkImporter,
+    get_import_parser,
+    refresh_derived_history,
+)
+from constants.database import (
+    DATA_TABLE,
+    DEVICE_TABLE,
+    ISSUE_TABLE,
+    IMPORT_WORKERS,
+)
+
+READ_CHUNK_SIZE = 1 << 20
+
+
+def print_progress(summary):
+    written = sum(summary["written"].values())
+    print(
+        f"  {written} items in {summary['elapsed']}s "
+        f"({summary['items_per_second']} items/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import PAT tables")
+    parser.add_argument("path", help="NDJSON or export file, optionally .gz")
+    parser.add_argument(
+        "--format",
+        choices=IMPORT_FORMATS,
+        help="Defaults to export for .json files and ndjson otherwise",
+    )
+    parser.add_argument("--workers", type=int, default=IMPORT_WORKERS)
+    args = parser.parse_args()
+
+    plain_path = args.path[:-3] if args.path.endswith(".gz") else args.path
+    import_format = args.format or (
+        "export" if plain_path.endswith(".json") else "ndjson"
+    )
+
+    dynamodb = boto3.resource(
+        "dynamodb",
+        region_name="us-west-2",
+        endpoint_url="http://localhost:8000",
+        aws_access_key_id="fakeAccessKey",
+        aws_secret_access_key="fakeSecretKey",
+    )
+    for ensure_table_exists in (
+        ensure_data_table_exists,
+        ensure_devices_table_exists,
+        ensure_issues_table_exists,
+    ):
+        ensure_table_exists(dynamodb)
+    packed_table = ensure_air_packed_table_exists(dynamodb)
+
+    importer = BulkImporter(
+        {
+            name: dynamodb.Table(name)
+            for name in (DEVICE_TABLE, DATA_TABLE, ISSUE_TABLE)
+        },
+        workers=args.workers,
+        progress=print_progress,
+    )
+    stream_parser = get_import_parser(import_format)
+    opener = gzip.open if args.path.endswith(".gz") else open
+
+    print(f"Importing {args.path} ({import_format}) with {args.workers} workers")
+    try:
+        with opener(args.path, "rb") as file:
+            while chunk := file.read(READ_CHUNK_SIZE):
+                for table_name, item in stream_parser.feed(chunk):
+                    importer.add(table_name, item)
+        for table_name, item in stream_parser.close():
+            importer.add(table_name, item)
+        summary = importer.finish()
+    finally:
+        importer.close()
+
+    print_progress(summary)
+    for table_name, count in summary["written"].items():
+        print(f"{table_name}: {count} written")
+    for table_name, count in summary["skipped"].items():
+        print(f"{table_name}: {count} skipped (missing key attributes)")
+
+    device_ids = importer.device_ids[DATA_TABLE]
+    refresh_derived_history(device_ids, packed_table)
+    print(f"Refreshed packed and archived history for {len(device_ids)} devices")
+    claimed = claim_device_names(dynamodb.Table(DEVICE_TABLE))
+    print(f"Claimed {claimed} device names")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Re-key PATIssues items written before issue EventIDs were ULIDs.
+
+Old EventIDs are EVENT#<random 64-bit number>, which sort ahead of every
+ULID, so newest-first issue pages and time-ranged queries would show them
+out of order or miss them. Each item is moved to a ULID built from its
+Timestamp (see utils/issue_utils.py). Run it once on a database written by
+an older API; imports re-key legacy issues themselves as they write them.
+
+Requires DynamoDB Local on localhost:8000.
+
+    cd api && python -m migrations.migrate_issue_event_ids [--dry-run]
+"""
+
+import argparse
+import time
+import boto3
+from utils.issue_utils import migrate_legacy_issue_ids
+from constants.database import ISSUE_TABLE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate PATIssues EventIDs")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report counts without writing"
+    )
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource(
+        "dynamodb",
+        region_name="us-west-2",
+        endpoint_url="http://localhost:8000",
+        aws_access_key_id="fakeAccessKey",
+        aws_secret_access_key="fakeSecretKey",
+    )
+
+    start = time.perf_counter()
+    migrated, invalid = migrate_legacy_issue_ids(
+        dynamodb.Table(ISSUE_TABLE), dry_run=args.dry_run
+    )
+    action = "Would migrate" if args.dry_run else "Migrated"
+    print(
+        f"{action} {migrated} issues, {invalid} unparseable, "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Migrate air readings from per-reading PATData items into PATAirPacked buckets.
+
+Each device-bucket (AIR_PACKED_BUCKET_SECONDS, a day by default) becomes one
+item holding parallel Offsets/EventIDs/PM25/PM10 arrays. Buckets are rebuilt
+from PATData and overwritten, so the migration is safe to re-run. PATData is
+left untouched; readings keep being written there as well.
+
+Requires DynamoDB Local on localhost:8000. Stop the API (or re-run this
+afterwards) so readings arriving mid-migration are not missed, then start
+the API with PAT_AIR_PACKED=true.
+
+    cd api && python -m migrations.pack_air_history [--device NAME] [--dry-run]
+"""
+
+import argparse
+import time
+import boto3
+from utils.air_packed_utils import pack_device
+from utils.api_utils import get_devices_info
+from utils.dynamodb_utils import ensure_air_packed_table_exists
+from constants.air import AIR_QUALITY_DEVICE_TYPE
+from constants.database import DEVICE_TABLE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack PATData air history")
+    parser.add_argument("--device", help="Only migrate this device name")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report counts without writing"
+    )
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource(
+        "dynamodb",
+        region_name="us-west-2",
+        endpoint_url="http://localhost:8000",
+        aws_access_key_id="fakeAccessKey",
+        aws_secret_access_key="fakeSecretKey",
+    )
+    packed_table = ensure_air_packed_table_exists(dynamodb)
+    device_table = dynamodb.Table(DEVICE_TABLE)
+
+    if args.device:
+        devices = get_devices_info(device_table, device_names=[args.device])
+    else:
+        devices = get_devices_info(device_table, device_type=AIR_QUALITY_DEVICE_TYPE)
+
+    start = time.perf_counter()
+    total_readings = total_buckets = 0
+    for device in devices:
+        readings, buckets, skipped = pack_device(
+            packed_table, device["DeviceID"], dry_run=args.dry_run
+        )
+        total_readings += readings
+        total_buckets += buckets
+        print(
+            f"{device['DeviceName']}: {readings} readings -> {buckets} buckets"
+            + (f" ({skipped} items without PM values skipped)" if skipped else "")
+        )
+
+    action = "Would pack" if args.dry_run else "Packed"
+    print(
+        f"{action} {total_readings} readings from {len(devices)} devices into "
+        f"{total_buckets} buckets in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,31 @@
 from pydantic import BaseModel, Field
 from utils.time_utils import get_current_utc_datetime
 from typing import Optional
+from pydantic_models.reading_models import TimestampedReading
 
 
-class AddAirDeviceData(BaseModel):
+class AddAirDeviceData(TimestampedReading):
     device_name: str = Field(..., example="test_device")
     timestamp: Optional[str] = Field(None, example=get_current_utc_datetime())
     pm25: float = Field(..., example=10.5, description="PM2.5 value as a numeric value")
     pm10: float = Field(..., example=20.5, description="PM10 value as a numeric value")
+    pm25_min: Optional[float] = Field(
+        None, example=9.8, description="Minimum PM2.5 in the reporting window"
+    )
+    pm25_max: Optional[float] = Field(
+        None, example=11.2, description="Maximum PM2.5 in the reporting window"
+    )
+    pm10_min: Optional[float] = Field(
+        None, example=19.0, description="Minimum PM10 in the reporting window"
+    )
+    pm10_max: Optional[float] = Field(
+        None, example=22.4, description="Maximum PM10 in the reporting window"
+    )
+    sample_count: Optional[int] = Field(
+        None,
+        example=300,
+        description="Number of readings averaged into pm25/pm10 on the device",
+    )
 
 
 class AirDeviceIssue(BaseModel):
@@ -15,3 +33,12 @@ class AirDeviceIssue(BaseModel):
     timestamp: Optional[str] = Field(None, example=get_current_utc_datetime())
     exception: str = Field(..., example="SensorError")
     exception_message: str = Field(..., example="Failed to read sensor data")
+
+
+class RegisterAirWebhookRequest(BaseModel):
+    webhook_url: str = Field(..., example="http://homebridge.local:8080/webhook/air")
+    device_name: Optional[str] = Field(
+        None,
+        example="test_device",
+        description="Optional: register for specific device only",
+    )
@@ -1,9 +1,10 @@
 from pydantic import BaseModel, Field
 from utils.time_utils import get_current_utc_datetime
 from typing import Optional
+from pydantic_models.reading_models import TimestampedReading
 
 
-class AddDoorDeviceData(BaseModel):
+class AddDoorDeviceData(TimestampedReading):
     device_name: str = Field(..., example="test_device")
     timestamp: Optional[str] = Field(None, example=get_current_utc_datetime())
     door_status: str = Field(..., example="OPEN")
@@ -0,0 +1,27 @@
+from pydantic import BaseModel, PrivateAttr, model_validator
+from typing import Optional
+from utils.time_utils import timestamp_to_ms
+
+
+class TimestampedReading(BaseModel):
+    """Base for ingest models whose optional timestamp is parsed once, here.
+
+    Any ISO 8601 form devices send ('...Z', '...+00:00', with or without
+    fractional seconds) is accepted and exposed as timestamp_ms; an
+    unparseable timestamp fails validation.
+    """
+
+    _timestamp_ms: Optional[int] = PrivateAttr(None)
+
+    @model_validator(mode="after")
+    def parse_timestamp(self):
+        if self.timestamp:
+            try:
+                self._timestamp_ms = timestamp_to_ms(self.timestamp)
+            except (TypeError, ValueError):
+                raise ValueError("timestamp must be an ISO 8601 datetime.")
+        return self
+
+    @property
+    def timestamp_ms(self) -> Optional[int]:
+        return self._timestamp_ms
@@ -0,0 +1,219 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from utils.door_utils import get_active_webhooks, post_to_webhooks
+from utils.time_utils import timestamp_to_ms
+from constants.air import (
+    PM25_INFO,
+    PM10_INFO,
+    AIR_ALERT_MIN_CODE,
+    AIR_ALERT_SUSTAINED_MINUTES,
+    AIR_ALERT_RATE_WINDOW_SECONDS,
+    AIR_ALERT_RATE_THRESHOLDS,
+    AIR_ALERT_COOLDOWN_SECONDS,
+    AIR_ALERT_BUFFER_SIZE,
+    AIR_ALERT_WEBHOOK_WORKERS,
+)
+
+logger = logging.getLogger("pat_api")
+
+AIR_ALERT_EVENT_TYPE = "air_alert"
+POLLUTANTS = ("PM2.5", "PM10")
+
+# Deliveries are queued here so a slow webhook target never stalls ingest
+_webhook_executor = ThreadPoolExecutor(
+    max_workers=AIR_ALERT_WEBHOOK_WORKERS, thread_name_prefix="air-alert-webhook"
+)
+
+
+def _level_bounds(levels):
+    """(lower bound, level) pairs in ascending order, for gap-free lookups."""
+    return [(float(level["range"].split(" to ")[0]), level) for level in levels]
+
+
+LEVEL_BOUNDS = {"PM2.5": _level_bounds(PM25_INFO), "PM10": _level_bounds(PM10_INFO)}
+
+
+def air_quality_level(pollutant, value):
+    """Return the constants/air.py level a reading falls in."""
+    current = LEVEL_BOUNDS[pollutant][0][1]
+    for lower_bound, level in LEVEL_BOUNDS[pollutant]:
+        if value < lower_bound:
+            break
+        current = level
+    return current
+
+
+class DeviceAlertState:
+    """Rolling per-device state the alert rules are evaluated against."""
+
+    def __init__(self):
+        # Fixed-size ring buffer of (epoch ms, {pollutant: value})
+        self.readings = deque(maxlen=AIR_ALERT_BUFFER_SIZE)
+        self.codes = {pollutant: 0 for pollutant in POLLUTANTS}
+        self.above_since = {pollutant: None for pollutant in POLLUTANTS}
+        self.sustained_sent = {pollutant: False for pollutant in POLLUTANTS}
+        self.last_rate_alert = {pollutant: None for pollutant in POLLUTANTS}
+
+
+class AirAlertEngine:
+    """Evaluate threshold, rate-of-change and sustained rules per reading.
+
+    Each reading is checked against the device's in-memory state only, so
+    ingest never re-reads history. State starts empty on restart and warms
+    up from the next readings.
+    """
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def evaluate(self, device_id, timestamp_str, values):
+        """Update a device's state with a reading and return any alerts.
+
+        values maps pollutant ('PM2.5', 'PM10') to its reading.
+        """
+        timestamp_ms = timestamp_to_ms(timestamp_str)
+
+        with self._lock:
+            state = self._states.setdefault(device_id, DeviceAlertState())
+
+            # Late or replayed readings would corrupt rate and duration maths
+            if state.readings and timestamp_ms <= state.readings[-1][0]:
+                return []
+
+            alerts = []
+            for pollutant, value in values.items():
+                alerts.extend(
+                    self._check_threshold(state, pollutant, value, timestamp_ms)
+                )
+                alerts.extend(self._check_rate(state, pollutant, value, timestamp_ms))
+
+            state.readings.append((timestamp_ms, values))
+            return alerts
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+    def _check_threshold(self, state, pollutant, value, timestamp_ms):
+        level = air_quality_level(pollutant, value)
+        code = int(level["code"])
+        previous_code = state.codes[pollutant]
+        state.codes[pollutant] = code
+        alerts = []
+
+        if code >= AIR_ALERT_MIN_CODE:
+            if previous_code < AIR_ALERT_MIN_CODE:
+                state.above_since[pollutant] = timestamp_ms
+                state.sustained_sent[pollutant] = False
+                alerts.append(_alert("threshold", pollutant, value, level))
+            elif code > previous_code:
+                alerts.append(_alert("threshold", pollutant, value, level))
+
+            duration_ms = timestamp_ms - state.above_since[pollutant]
+            if (
+                not state.sustained_sent[pollutant]
+                and duration_ms >= AIR_ALERT_SUSTAINED_MINUTES * 60 * 1000
+            ):
+                state.sustained_sent[pollutant] = True
+                alerts.append(
+                    _alert(
+                        "sustained",
+                        pollutant,
+                        value,
+                        level,
+                        duration_seconds=duration_ms // 1000,
+                    )
+                )
+
+        elif previous_code >= AIR_ALERT_MIN_CODE:
+            state.above_since[pollutant] = None
+            alerts.append(_alert("cleared", pollutant, value, level))
+
+        return alerts
+
+    def _check_rate(self, state, pollutant, value, timestamp_ms):
+        window_start = timestamp_ms - AIR_ALERT_RATE_WINDOW_SECONDS * 1000
+        baseline = None
+        for reading_ms, reading in state.readings:
+            if reading_ms >= window_start and pollutant in reading:
+                baseline = reading[pollutant]
+                break
+
+        if baseline is None or value - baseline < AIR_ALERT_RATE_THRESHOLDS[pollutant]:
+            return []
+
+        last_alert = state.last_rate_alert[pollutant]
+        if (
+            last_alert is not None
+            and timestamp_ms - last_alert < AIR_ALERT_COOLDOWN_SECONDS * 1000
+        ):
+            return []
+
+        state.last_rate_alert[pollutant] = timestamp_ms
+        return [
+            _alert(
+                "rate_of_change",
+                pollutant,
+                value,
+                air_quality_level(pollutant, value),
+                change=round(value - baseline, 1),
+                window_seconds=AIR_ALERT_RATE_WINDOW_SECONDS,
+            )
+        ]
+
+
+def _alert(alert_type, pollutant, value, level, **details):
+    return {
+        "alert": alert_type,
+        "pollutant": pollutant,
+        "value": value,
+        "category": level["category"],
+        "code": int(level["code"]),
+        "message": level["message"],
+        **details,
+    }
+
+
+_engine = AirAlertEngine()
+
+
+def evaluate_air_alerts(device_id, timestamp_str, pm25, pm10):
+    """Run the alert rules for a stored air reading."""
+    return _engine.evaluate(device_id, timestamp_str, {"PM2.5": pm25, "PM10": pm10})
+
+
+def clear_air_alerts():
+    """Drop every device's alert state, e.g. after all readings are deleted."""
+    _engine.clear()
+
+
+def trigger_air_alert_webhooks(table, device_name, device_id, timestamp, alerts):
+    """Send each alert to the air alert webhooks registered for the device."""
+    try:
+        webhooks = get_active_webhooks(table, device_name, AIR_ALERT_EVENT_TYPE)
+
+        if not webhooks:
+            logger.debug(f"No air alert webhooks registered for device {device_name}")
+            return
+
+        for alert in alerts:
+            payload = {
+                "event": AIR_ALERT_EVENT_TYPE,
+                "device_name": device_name,
+                "device_id": device_id.split("#")[-1],
+                "timestamp": timestamp,
+                **alert,
+            }
+            post_to_webhooks(webhooks, payload)
+    except Exception as e:
+        logger.error(f"Error triggering air alert webhooks: {e}")
+
+
+def dispatch_air_alert_webhooks(table, device_name, device_id, timestamp, alerts):
+    """Run trigger_air_alert_webhooks on a background thread and return at once."""
+    _webhook_executor.submit(
+        trigger_air_alert_webhooks, table, device_name, device_id, timestamp, alerts
+    )
@@ -0,0 +1,226 @@
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from itertools import repeat
+from operator import itemgetter
+from boto3.dynamodb.conditions import Key
+from utils.api_utils import get_dynamodb_table, projection_params
+from utils.raw_read_utils import (
+    AIR_RECORD_FIELDS,
+    get_raw_client,
+    query_device_items_raw,
+)
+from utils.time_utils import timestamp_to_ms, ms_to_timestamp
+from constants.database import (
+    DATA_TABLE,
+    AIR_PACKED_TABLE,
+    AIR_PACKED_BUCKET_SECONDS,
+)
+
+logger = logging.getLogger("pat_api")
+
+# Record field -> packed array attribute; Offsets and Start are always read
+PACKED_COLUMNS = {"event_id": "EventIDs", "pm25": "PM25", "pm10": "PM10"}
+
+
+def bucket_start_ms(timestamp_ms):
+    """Start of the packed bucket holding a reading, in epoch milliseconds."""
+    bucket_ms = AIR_PACKED_BUCKET_SECONDS * 1000
+    return timestamp_ms - timestamp_ms % bucket_ms
+
+
+def bucket_key(start_ms):
+    """Sort key of a packed bucket, which sorts like PATData Timestamps."""
+    return ms_to_timestamp(start_ms)
+
+
+def append_air_reading(device_id, timestamp, event_id, pm25, pm10, table=None):
+    """Append one reading to its device-bucket item, creating it if needed.
+
+    The arrays are parallel: Offsets holds milliseconds from the bucket
+    Start, and EventIDs, PM25 and PM10 the matching values. The append is a
+    single atomic update_item.
+    """
+    table = table or get_dynamodb_table(AIR_PACKED_TABLE)
+    timestamp_ms = timestamp_to_ms(timestamp)
+    start_ms = bucket_start_ms(timestamp_ms)
+
+    table.update_item(
+        Key={"DeviceID": device_id, "Bucket": bucket_key(start_ms)},
+        UpdateExpression=(
+            "SET #start = :start, "
+            "#offsets = list_append(if_not_exists(#offsets, :empty), :offset), "
+            "#event_ids = list_append(if_not_exists(#event_ids, :empty), :event_id), "
+            "#pm25 = list_append(if_not_exists(#pm25, :empty), :pm25), "
+            "#pm10 = list_append(if_not_exists(#pm10, :empty), :pm10)"
+        ),
+        ExpressionAttributeNames={
+            "#start": "Start",
+            "#offsets": "Offsets",
+            "#event_ids": "EventIDs",
+            "#pm25": "PM25",
+            "#pm10": "PM10",
+        },
+        ExpressionAttributeValues={
+            ":start": start_ms,
+            ":empty": [],
+            ":offset": [timestamp_ms - start_ms],
+            ":event_id": [event_id.split("#")[-1]],
+            ":pm25": [Decimal(str(pm25))],
+            ":pm10": [Decimal(str(pm10))],
+        },
+    )
+
+
+def build_bucket_item(device_id, start_ms, readings):
+    """Packed item for one bucket from (epoch ms, event id, pm25, pm10) tuples."""
+    readings = sorted(readings, key=itemgetter(0))
+    return {
+        "DeviceID": device_id,
+        "Bucket": bucket_key(start_ms),
+        "Start": start_ms,
+        "Offsets": [reading[0] - start_ms for reading in readings],
+        "EventIDs": [reading[1].split("#")[-1] for reading in readings],
+        "PM25": [Decimal(str(reading[2])) for reading in readings],
+        "PM10": [Decimal(str(reading[3])) for reading in readings],
+    }
+
+
+def pack_device(packed_table, device_id, dry_run=False):
+    """Rebuild every packed bucket for one device from its PATData items.
+
+    Returns (readings packed, buckets written, items skipped).
+    """
+    buckets = defaultdict(list)
+    skipped = 0
+    for item in query_device_items_raw(
+        DATA_TABLE, device_id, projection=["Timestamp", "EventID", "PM25", "PM10"]
+    ):
+        if "PM25" not in item or "PM10" not in item or "EventID" not in item:
+            skipped += 1
+            continue
+        timestamp_ms = timestamp_to_ms(item["Timestamp"]["S"])
+        buckets[bucket_start_ms(timestamp_ms)].append(
+            (
+                timestamp_ms,
+                item["EventID"]["S"],
+                item["PM25"]["N"],
+                item["PM10"]["N"],
+            )
+        )
+
+    if not dry_run:
+        with packed_table.batch_writer() as batch:
+            for start_ms, readings in buckets.items():
+                batch.put_item(Item=build_bucket_item(device_id, start_ms, readings))
+
+    readings = sum(len(bucket) for bucket in buckets.values())
+    return readings, len(buckets), skipped
+
+
+def query_packed_items_raw(device_id, start_ms=None, end_ms=None, projection=None):
+    """Yield a device's packed buckets in wire format, oldest first.
+
+    With a range, only buckets overlapping start_ms..end_ms are read.
+    """
+    query_params = {
+        "TableName": AIR_PACKED_TABLE,
+        "KeyConditionExpression": "DeviceID = :device_id",
+        "ExpressionAttributeValues": {":device_id": {"S": device_id}},
+    }
+    if start_ms is not None or end_ms is not None:
+        query_params["KeyConditionExpression"] += " AND #bucket BETWEEN :low AND :high"
+        query_params["ExpressionAttributeNames"] = {"#bucket": "Bucket"}
+        query_params["ExpressionAttributeValues"].update(
+            {
+                ":low": {"S": bucket_key(bucket_start_ms(start_ms or 0))},
+                ":high": {"S": bucket_key(bucket_start_ms(end_ms or (1 << 47)))},
+            }
+        )
+    if projection:
+        params = projection_params(projection)
+        query_params["ProjectionExpression"] = params["ProjectionExpression"]
+        query_params.setdefault("ExpressionAttributeNames", {}).update(
+            params["ExpressionAttributeNames"]
+        )
+
+    client = get_raw_client()
+    try:
+        while True:
+            response = client.query(**query_params)
+            yield from response.get("Items", [])
+
+            last_evaluated_key = response.get("LastEvaluatedKey")
+            if not last_evaluated_key:
+                break
+            query_params["ExclusiveStartKey"] = last_evaluated_key
+    except Exception as e:
+        logger.error(f"Error querying packed buckets for device {device_id}: {e}")
+        raise
+
+
+def get_packed_air_history(device_id, start_ms=None, end_ms=None, fields=None):
+    """Air readings for a device from packed buckets, as response-ready records.
+
+    Records match get_air_history, including fields selection, and are
+    returned oldest first. One item is read per bucket rather than per
+    reading.
+    """
+    fields = fields or list(AIR_RECORD_FIELDS)
+    projection = ["Start", "Offsets"] + [
+        PACKED_COLUMNS[name] for name in fields if name in PACKED_COLUMNS
+    ]
+    short_device_id = device_id.split("#")[-1]
+    low = start_ms if start_ms is not None else float("-inf")
+    high = end_ms if end_ms is not None else float("inf")
+
+    records = []
+    for item in query_packed_items_raw(device_id, start_ms, end_ms, projection):
+        start = int(item["Start"]["N"])
+        times = [start + int(offset["N"]) for offset in item["Offsets"]["L"]]
+
+        columns = []
+        for name in fields:
+            if name == "device_id":
+                columns.append(repeat(short_device_id))
+            elif name == "timestamp":
+                columns.append([ms_to_timestamp(millis) for millis in times])
+            elif name == "event_id":
+                columns.append([value["S"] for value in item["EventIDs"]["L"]])
+            else:
+                column = item[PACKED_COLUMNS[name]]["L"]
+                columns.append([float(value["N"]) for value in column])
+
+        rows = zip(times, *columns)
+        if any(later < earlier for earlier, later in zip(times, times[1:])):
+            rows = sorted(rows, key=itemgetter(0))  # Late readings were appended
+        records.extend(
+            dict(zip(fields, values))
+            for millis, *values in rows
+            if low <= millis <= high
+        )
+
+    return records
+
+
+def delete_packed_device(table, device_id):
+    """Delete every packed bucket for a device, returning how many were removed."""
+    query_params = {
+        "KeyConditionExpression": Key("DeviceID").eq(device_id),
+        **projection_params(["DeviceID", "Bucket"]),
+    }
+    deleted = 0
+    with table.batch_writer() as batch:
+        while True:
+            response = table.query(**query_params)
+            for item in response.get("Items", []):
+                batch.delete_item(
+                    Key={"DeviceID": item["DeviceID"], "Bucket": item["Bucket"]}
+                )
+                deleted += 1
+
+            last_evaluated_key = response.get("LastEvaluatedKey")
+            if not last_evaluated_key:
+                break
+            query_params["ExclusiveStartKey"] = last_evaluated_key
+    return deleted
@@ -0,0 +1,208 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from utils.api_utils import get_devices_info, query_device_range
+from utils.air_packed_utils import get_packed_air_history
+from utils.time_utils import timestamp_to_ms, ms_to_timestamp
+from constants.database import AIR_PACKED_STORAGE
+from constants.air import (
+    AIR_QUALITY_DEVICE_TYPE,
+    AIR_STATS_WINDOWS,
+    AIR_STATS_EWMA_HALF_LIFE_SECONDS,
+    AIR_STATS_HISTOGRAM_BIN_WIDTH,
+    AIR_STATS_HISTOGRAM_MAX,
+)
+
+logger = logging.getLogger("pat_api")
+
+POLLUTANTS = {"PM2.5": "PM25", "PM10": "PM10"}  # Stats name -> PATData attribute
+HISTOGRAM_BINS = int(AIR_STATS_HISTOGRAM_MAX / AIR_STATS_HISTOGRAM_BIN_WIDTH) + 1
+
+
+class RollingWindow:
+    """Time-based sliding window with a running sum and a value histogram.
+
+    Adding a reading and expiring old ones are O(1) amortised; percentiles
+    walk the fixed-size histogram, so they do not depend on the number of
+    readings in the window. Each bin also keeps the sum of its readings, so
+    a percentile resolves to the mean of the bin it lands in.
+    """
+
+    __slots__ = ("span_ms", "samples", "total", "histogram", "bin_totals")
+
+    def __init__(self, seconds):
+        self.span_ms = seconds * 1000
+        self.samples = deque()  # (epoch ms, value, histogram bin)
+        self.total = 0.0
+        self.histogram = [0] * HISTOGRAM_BINS
+        self.bin_totals = [0.0] * HISTOGRAM_BINS
+
+    def add(self, timestamp_ms, value):
+        bin_index = int(value / AIR_STATS_HISTOGRAM_BIN_WIDTH)
+        bin_index = min(max(bin_index, 0), HISTOGRAM_BINS - 1)
+        self.samples.append((timestamp_ms, value, bin_index))
+        self.total += value
+        self.histogram[bin_index] += 1
+        self.bin_totals[bin_index] += value
+        self.expire(timestamp_ms)
+
+    def expire(self, now_ms):
+        cutoff = now_ms - self.span_ms
+        while self.samples and self.samples[0][0] <= cutoff:
+            _, value, bin_index = self.samples.popleft()
+            self.total -= value
+            self.histogram[bin_index] -= 1
+            self.bin_totals[bin_index] -= value
+        if not self.samples:
+            self.total = 0.0  # Drop float drift from the running sum
+
+    def percentile(self, fraction):
+        """Percentile by nearest rank, resolved to the mean of its histogram bin."""
+        count = len(self.samples)
+        if not count:
+            return None
+
+        rank = max(math.ceil(fraction * count), 1)
+        seen = 0
+        for bin_index, bin_count in enumerate(self.histogram):
+            seen += bin_count
+            if bin_count and seen >= rank:
+                return round(self.bin_totals[bin_index] / bin_count, 1)
+        return None
+
+    def summary(self):
+        count = len(self.samples)
+        return {
+            "count": count,
+            "mean": round(self.total / count, 1) if count else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+        }
+
+
+class PollutantStats:
+    """Windows and a time-aware EWMA for one pollutant of one device."""
+
+    __slots__ = ("windows", "ewma")
+
+    def __init__(self):
+        self.windows = {
+            name: RollingWindow(seconds) for name, seconds in AIR_STATS_WINDOWS.items()
+        }
+        self.ewma = None
+
+    def add(self, timestamp_ms, value, elapsed_ms):
+        for window in self.windows.values():
+            window.add(timestamp_ms, value)
+
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            # Weight by elapsed time so irregular reporting intervals smooth evenly
+            alpha = 1 - math.exp(
+                -math.log(2) * elapsed_ms / (AIR_STATS_EWMA_HALF_LIFE_SECONDS * 1000)
+            )
+            self.ewma += alpha * (value - self.ewma)
+
+
+class DeviceStats:
+    __slots__ = ("pollutants", "last_ms")
+
+    def __init__(self):
+        self.pollutants = {name: PollutantStats() for name in POLLUTANTS}
+        self.last_ms = None
+
+
+_device_stats = {}
+_stats_lock = threading.Lock()
+
+
+def update_air_stats(device_id, timestamp_str, pm25, pm10):
+    """Fold one air reading into the device's rolling statistics.
+
+    Readings older than the device's latest are ignored, since the windows
+    and EWMA assume time-ordered input.
+    """
+    timestamp_ms = timestamp_to_ms(timestamp_str)
+
+    with _stats_lock:
+        stats = _device_stats.setdefault(device_id, DeviceStats())
+        if stats.last_ms is not None and timestamp_ms <= stats.last_ms:
+            return False
+
+        elapsed_ms = timestamp_ms - stats.last_ms if stats.last_ms is not None else 0
+        stats.pollutants["PM2.5"].add(timestamp_ms, float(pm25), elapsed_ms)
+        stats.pollutants["PM10"].add(timestamp_ms, float(pm10), elapsed_ms)
+        stats.last_ms = timestamp_ms
+        return True
+
+
+def clear_air_stats():
+    """Drop every device's statistics, e.g. after all readings are deleted."""
+    with _stats_lock:
+        _device_stats.clear()
+
+
+def get_air_stats(device_id):
+    """Return rolling means, percentiles and EWMA for a device, or None."""
+    now_ms = int(time.time() * 1000)
+
+    with _stats_lock:
+        stats = _device_stats.get(device_id)
+        if stats is None or stats.last_ms is None:
+            return None
+
+        result = {"last_reading": ms_to_timestamp(stats.last_ms)}
+        for name, pollutant in stats.pollutants.items():
+            pollutant_stats = {
+                "ewma": round(pollutant.ewma, 1) if pollutant.ewma is not None else None
+            }
+            for window_name, window in pollutant.windows.items():
+                window.expire(now_ms)
+                pollutant_stats[window_name] = window.summary()
+            result[name] = pollutant_stats
+        return result
+
+
+def warm_air_stats(data_table, device_table):
+    """Load the longest stats window of history for every air device.
+
+    Uses one keyed range query per device, projected to the fields the
+    statistics need, against the packed buckets when they are enabled.
+    """
+    now_ms = int(time.time() * 1000)
+    start_ms = now_ms - max(AIR_STATS_WINDOWS.values()) * 1000
+
+    devices = get_devices_info(device_table, device_type=AIR_QUALITY_DEVICE_TYPE)
+    readings = 0
+    for device in devices:
+        device_id = device.get("DeviceID")
+        if AIR_PACKED_STORAGE:
+            for record in get_packed_air_history(
+                device_id, start_ms, now_ms, fields=["timestamp", "pm25", "pm10"]
+            ):
+                if update_air_stats(
+                    device_id, record["timestamp"], record["pm25"], record["pm10"]
+                ):
+                    readings += 1
+            continue
+
+        items = query_device_range(
+            data_table,
+            device_id,
+            start_ms,
+            now_ms,
+            projection=["Timestamp", *POLLUTANTS.values()],
+        )
+        for item in items:
+            if item.get("PM25") is None or item.get("PM10") is None:
+                continue
+            if update_air_stats(
+                device_id, item["Timestamp"], item["PM25"], item["PM10"]
+            ):
+                readings += 1
+
+    logger.info(f"Warmed air stats for {len(devices)} devices from {readings} readings")
+    return readings
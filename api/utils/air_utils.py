@@ -2,10 +2,23 @@ from decimal import Decimal
 from boto3.dynamodb.conditions import Key
 import logging
 import json
-from utils.api_utils import get_latest_info, get_all_info, generate_device_id
+import time
+from utils.api_utils import get_latest_info, register_device
+from utils.raw_read_utils import get_air_history
+from utils.air_packed_utils import get_packed_air_history
+from utils.cold_archive_utils import get_tiered_history
+from constants.database import AIR_PACKED_STORAGE, COLD_ARCHIVE
 from botocore.exceptions import ClientError
-from constants.air import AIR_QUALITY_DEVICE_TYPE, PM10_INFO, PM25_INFO
+from constants.air import (
+    AIR_QUALITY_DEVICE_TYPE,
+    PM10_INFO,
+    PM25_INFO,
+    AIR_LATEST_STORED_FIELDS,
+    AIR_LATEST_REQUIRED_ATTRIBUTES,
+)
+from constants.health import HEALTH_STALE_SECONDS
 from datetime import datetime, timedelta, timezone
+from utils.time_utils import timestamp_to_ms
 from decimal import Decimal
 
 logger = logging.getLogger("pat_api")
@@ -42,55 +55,68 @@ def convert_decimals_to_floats(data):
     return data
 
 
-def staleness_check(timestamp_str: str) -> tuple[bool, int]:
-    """Check if the given timestamp is more than 20 minutes old and return its age in seconds.
+def staleness_check(timestamp) -> tuple[bool, int]:
+    """Check if a reading is older than the air staleness threshold and return its age in seconds.
 
     Args:
-        timestamp_str (str): The timestamp string in format 'YYYY-MM-DDTHH:MM:SSZ'.
+        timestamp (int | str): Epoch milliseconds (a PATData EpochMs), or an
+            ISO 8601 timestamp for items written before EpochMs existed.
 
     Returns:
         tuple: (bool, int) where:
-            - bool: True if the timestamp is older than 20 minutes, False otherwise.
-            - int: The age of the timestamp in seconds.
+            - bool: True if the reading is older than the threshold, False otherwise.
+            - int: The age of the reading in seconds.
     """
     try:
-        # Convert the timestamp string to a datetime object (assuming UTC time)
-        timestamp = datetime.strptime(timestamp_str, "%Y-%m-%dT%H:%M:%SZ").replace(
-            tzinfo=timezone.utc
-        )
-
-        # Get the current time in UTC
-        current_time = datetime.now(timezone.utc)
-
-        # Calculate the time difference
-        time_difference = current_time - timestamp
+        if isinstance(timestamp, str):
+            timestamp = timestamp_to_ms(timestamp)
+        age_ms = int(time.time() * 1000) - int(timestamp)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid timestamp format. Expected ISO 8601 UTC timestamp")
 
-        # Get the age in seconds
-        age_in_seconds = int(time_difference.total_seconds())
+    is_older = age_ms > HEALTH_STALE_SECONDS[AIR_QUALITY_DEVICE_TYPE] * 1000
+    return is_older, age_ms // 1000
 
-        # Check if the timestamp is older than 20 minutes
-        is_older = time_difference > timedelta(minutes=20)
 
-        return is_older, age_in_seconds
+def get_latest_air_quality_info(table, device_id, fields=None):
+    """Fetch the latest entry for a specific device.
 
-    except ValueError:
-        raise ValueError("Invalid timestamp format. Expected 'YYYY-MM-DDTHH:MM:SSZ'")
-
-
-def get_latest_air_quality_info(table, device_id):
-    """Fetch the latest entry for a specific device."""
+    fields limits the response to those AIR_LATEST_STORED_FIELDS and
+    AIR_LATEST_DERIVED_FIELDS names. Only the selected stored attributes,
+    plus the ones the derived fields are computed from, are read.
+    """
     logger.debug(f"Fetching latest info for device_id: {device_id}")
-    latest_info = get_latest_info(table, device_id)
+    projection = None
+    if fields:
+        projection = list(
+            dict.fromkeys(
+                [
+                    *AIR_LATEST_REQUIRED_ATTRIBUTES,
+                    *(name for name in fields if name in AIR_LATEST_STORED_FIELDS),
+                ]
+            )
+        )
+    latest_info = get_latest_info(table, device_id, projection=projection)
 
     if not latest_info:
         logger.debug(f"No latest info found for device_id: {device_id}")
         return None
 
+    latest_info = format_latest_air_quality_info(latest_info, device_id)
+    if fields:
+        latest_info = {
+            name: latest_info[name] for name in fields if name in latest_info
+        }
+    return latest_info
+
+
+def format_latest_air_quality_info(latest_info, device_id):
+    """Add the air quality message, code and staleness to a latest entry."""
     try:
         pm25_value = float(latest_info.get("PM25", 0.0))
         pm10_value = float(latest_info.get("PM10", 0.0))
         latest_info["PM25"] = pm25_value
-        latest_info["PM25"] = pm25_value
+        latest_info["PM10"] = pm10_value
         if pm25_value is not None:
             message, code = get_air_quality_info(
                 pm25_value, get_air_quality_levels()["PM2.5"]
@@ -118,8 +144,9 @@ def get_latest_air_quality_info(table, device_id):
         raise ValueError(f"Error processing latest air quality info: {e}")
 
     try:
-        time_stamp = latest_info.get("Timestamp")
-        stale, age = staleness_check(time_stamp)
+        stale, age = staleness_check(
+            latest_info.get("EpochMs") or latest_info.get("Timestamp")
+        )
         latest_info["staleness"] = stale
         latest_info["age"] = age
 
@@ -127,29 +154,29 @@ def get_latest_air_quality_info(table, device_id):
         logger.error(f"Error processing staleness check for device_id {device_id}: {e}")
         raise ValueError(f"Error processing staleness check: {e}")
 
-    return convert_decimals_to_floats(latest_info)
+    # Any other Decimal attributes are encoded by FastJSONResponse
+    return latest_info
 
 
 def add_walle_device(table, device_name):
-    """Add a new device to the DynamoDB table."""
+    """Add a new device to the DynamoDB table, or return None if the name is taken."""
     try:
-        device_id = generate_device_id()
-        logger.debug(f"Generated new device ID: {device_id} for device {device_name}")
-
-        hodor_item = {
-            "DeviceID": f"DEVICE#{device_id}",
-            "DeviceName": device_name,
-            "DeviceType": AIR_QUALITY_DEVICE_TYPE,
-            "DeviceManufacturer": "Fuffly Slippers? Devices",
-            "DeviceModel": "WALL-E Sensor",
-        }
         logger.debug(f"Adding item to DynamoDB")
-
-        response = table.put_item(Item=hodor_item)
+        hodor_item = register_device(
+            table,
+            device_name,
+            {
+                "DeviceType": AIR_QUALITY_DEVICE_TYPE,
+                "DeviceManufacturer": "Fuffly Slippers? Devices",
+                "DeviceModel": "WALL-E Sensor",
+            },
+        )
+        if hodor_item is None:
+            return None
         logger.debug(f"Device added successfully")
 
         logger.info(
-            f"Added new device with ID {device_id} and name {device_name} to table."
+            f"Added new device with ID {hodor_item['DeviceID']} and name {device_name} to table."
         )
         return hodor_item
 
@@ -163,29 +190,35 @@ def add_walle_device(table, device_name):
         raise
 
 
-def format_full_air_info(table, device_id: str):
-    """Get all info for a specific door device and format the response."""
+def format_full_air_info(table, device_id: str, fields=None):
+    """Get all info for a specific air device and format the response.
+
+    Reads through the low-level client, so PM values go straight from the
+    wire format to floats without an intermediate Decimal per attribute.
+    fields limits each record to those AIR_RECORD_FIELDS names. With packed
+    storage enabled the history is read from the packed buckets instead, and
+    with the cold archive enabled archived days are read from their files.
+    """
     logger.debug(f"Starting formatting for device_id: {device_id}")
-    all_info = get_all_info(table, device_id)
 
-    if not all_info:
-        return None
+    def hot_history(start_ms=None, end_ms=None):
+        if AIR_PACKED_STORAGE:
+            return get_packed_air_history(device_id, start_ms, end_ms, fields)
+        return get_air_history(table.name, device_id, fields, start_ms, end_ms)
 
     try:
-        formatted_info = []
-        for item in all_info:
-            logger.debug(f"Processing item for {device_id}")
-            formatted_info.append(
-                {
-                    "device_id": item.get("DeviceID", "").split("#")[1],
-                    "event_id": item.get("EventID", "").split("#")[1],
-                    "timestamp": item.get("Timestamp", ""),
-                    "pm25": float(item.get("PM25", 0.0)),
-                    "pm10": float(item.get("PM10", 0.0)),
-                }
+        if COLD_ARCHIVE:
+            formatted_info = get_tiered_history(
+                AIR_QUALITY_DEVICE_TYPE, device_id, hot_history, fields
             )
-        return formatted_info
-
-    except (IndexError, ValueError, AttributeError, TypeError) as e:
+        else:
+            formatted_info = hot_history()
+    except (IndexError, ValueError, AttributeError, TypeError, KeyError) as e:
         logger.error(f"Error processing air info for device {device_id}: {e}")
         raise ValueError(f"Error processing data: {e}")
+
+    if not formatted_info:
+        return None
+
+    logger.debug(f"Formatted {len(formatted_info)} items for {device_id}")
+    return formatted_info
@@ -1,14 +1,33 @@
 import boto3
 import logging
+import os
+import threading
+import time
 from fastapi import Depends, HTTPException
 from boto3.dynamodb.conditions import Key, Attr
-import uuid
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 from typing import Literal
 import random
 import string
+from utils.time_utils import sort_key_bounds, item_epoch_ms
 
 logger = logging.getLogger("pat_api")
 
+# Device names are claimed by an item keyed on the name itself, so checking
+# and reserving a name is one conditional put instead of a scan
+NAME_CLAIM_PREFIX = "NAME#"
+
+# Crockford base32, as used by ULIDs
+ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_ulid_lock = threading.Lock()
+_last_ulid = [0, 0]  # [milliseconds, randomness] of the last ULID issued
+
+# DeviceName -> PATDevices key, so repeat bulk reads can skip the scan
+_device_keys = {}
+# DeviceName -> device item, for hot paths that would otherwise scan per call
+_device_info_cache = {}
+
 
 def get_dynamodb_table(table_name: Literal["PATData", "PATDevices"]):
     """Returns the specified DynamoDB table instance connected to the local environment."""
@@ -60,7 +79,7 @@ def unique_device_names(table, device_type):
         # Handle pagination if LastEvaluatedKey exists
         while "LastEvaluatedKey" in response:
             response = table.scan(
-                ProjectionExpression="DeviceID",
+                ProjectionExpression="DeviceID, DeviceName, DeviceType",
                 FilterExpression="DeviceType = :device_type",
                 ExpressionAttributeValues={":device_type": device_type},
                 ExclusiveStartKey=response["LastEvaluatedKey"],
@@ -80,13 +99,52 @@ def unique_device_names(table, device_type):
         raise
 
 
-def get_latest_info(table, device_id):
-    """Fetch the latest entry for a specific device."""
+def parse_fields(fields, allowed):
+    """Parse a comma-separated fields query parameter.
+
+    Returns the requested names in order, or None when fields is empty.
+    Raises ValueError naming any field not in allowed.
+    """
+    if not fields:
+        return None
+    selected = list(
+        dict.fromkeys(name.strip() for name in fields.split(",") if name.strip())
+    )
+    unknown = [name for name in selected if name not in allowed]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    return selected or None
+
+
+def projection_params(projection):
+    """ProjectionExpression parameters for a list of attribute names.
+
+    Every name goes through ExpressionAttributeNames, so reserved words such
+    as Timestamp need no special casing.
+    """
+    if not projection:
+        return {}
+    return {
+        "ProjectionExpression": ", ".join(f"#p{i}" for i in range(len(projection))),
+        "ExpressionAttributeNames": {
+            f"#p{i}": name for i, name in enumerate(projection)
+        },
+    }
+
+
+def get_latest_info(table, device_id, projection=None):
+    """Fetch the latest entry for a specific device.
+
+    projection optionally limits the attributes read.
+    """
     try:
         response = table.query(
             KeyConditionExpression=Key("DeviceID").eq(device_id),
             ScanIndexForward=False,
             Limit=1,
+            **projection_params(projection),
         )
         if "Items" in response and response["Items"]:
             item = response["Items"][0]
@@ -100,8 +158,45 @@ def get_latest_info(table, device_id):
         raise
 
 
-def get_device_info(table, device_name):
-    """Fetch all entries for a specific device from the DynamoDB table."""
+def query_device_range(table, device_id, start_ms, end_ms, projection=None):
+    """Stream entries for a device between two epoch milliseconds, oldest first.
+
+    Uses a keyed query on DeviceID/Timestamp and follows pagination lazily,
+    so callers can fold over long histories without holding them in memory.
+    The key range is widened to whole seconds to catch every stored
+    Timestamp format, and items are then filtered on their epoch
+    milliseconds, so the range is exact and inclusive.
+    """
+    start_ts, end_ts = sort_key_bounds(start_ms, end_ms)
+    query_params = {
+        "KeyConditionExpression": Key("DeviceID").eq(device_id)
+        & Key("Timestamp").between(start_ts, end_ts),
+    }
+    if projection:
+        projection = list(dict.fromkeys([*projection, "Timestamp", "EpochMs"]))
+    query_params.update(projection_params(projection))
+
+    try:
+        while True:
+            response = table.query(**query_params)
+            for item in response.get("Items", []):
+                if start_ms <= item_epoch_ms(item) <= end_ms:
+                    yield item
+
+            last_evaluated_key = response.get("LastEvaluatedKey")
+            if not last_evaluated_key:
+                break
+            query_params["ExclusiveStartKey"] = last_evaluated_key
+    except Exception as e:
+        logger.error(f"Error querying range for device {device_id}: {e}")
+        raise
+
+
+def get_device_info(table, device_name, projection=None):
+    """Fetch all entries for a specific device from the DynamoDB table.
+
+    projection optionally limits the attributes returned.
+    """
     try:
         logger.debug(f"Fetching entries for device name: {device_name}")
         items = []
@@ -109,7 +204,10 @@ def get_device_info(table, device_name):
 
         while True:
             # Scan the table with filter expression
-            scan_params = {"FilterExpression": Attr("DeviceName").eq(device_name)}
+            scan_params = {
+                "FilterExpression": Attr("DeviceName").eq(device_name),
+                **projection_params(projection),
+            }
             if last_evaluated_key:
                 scan_params["ExclusiveStartKey"] = last_evaluated_key
 
@@ -140,6 +238,125 @@ def get_device_info(table, device_name):
         raise
 
 
+def get_devices_info(table, device_names=None, device_type=None):
+    """Fetch device entries for a list of names and/or a device type.
+
+    Names whose PATDevices key has been seen before are read with
+    batch_get_item; the rest, and any type lookup, share a single scan.
+    Returns the device items in no particular order.
+    """
+    try:
+        devices = {}
+        device_names = list(dict.fromkeys(device_names or []))
+
+        known = [_device_keys[name] for name in device_names if name in _device_keys]
+        for i in range(0, len(known), 100):
+            request = {table.name: {"Keys": known[i : i + 100]}}
+            while request:
+                response = table.meta.client.batch_get_item(RequestItems=request)
+                for item in response.get("Responses", {}).get(table.name, []):
+                    devices[item["DeviceName"]] = item
+                request = response.get("UnprocessedKeys")
+
+        # Drop keys of devices that have since been deleted
+        for name in device_names:
+            if name in _device_keys and name not in devices:
+                _device_keys.pop(name, None)
+
+        missing = [name for name in device_names if name not in devices]
+        if missing or device_type:
+            filters = []
+            if missing:
+                filters.append(Attr("DeviceName").is_in(missing))
+            if device_type:
+                filters.append(Attr("DeviceType").eq(device_type))
+            filter_expression = filters[0]
+            for condition in filters[1:]:
+                filter_expression = filter_expression | condition
+
+            scan_params = {"FilterExpression": filter_expression}
+            while True:
+                response = table.scan(**scan_params)
+                for item in response.get("Items", []):
+                    if "DeviceID" in item and "DeviceName" in item:
+                        devices.setdefault(item["DeviceName"], item)
+                last_evaluated_key = response.get("LastEvaluatedKey")
+                if not last_evaluated_key:
+                    break
+                scan_params["ExclusiveStartKey"] = last_evaluated_key
+
+        for name, item in devices.items():
+            _device_keys[name] = {
+                "DeviceID": item["DeviceID"],
+                "DeviceName": name,
+            }
+
+        logger.debug(f"Found {len(devices)} devices ({len(known)} by key)")
+        return list(devices.values())
+
+    except Exception as e:
+        logger.error(f"Error fetching devices info: {e}")
+        raise
+
+
+def get_latest_info_many(table, device_ids, max_workers=8):
+    """Fetch the latest entry for several devices with parallel keyed queries.
+
+    Uses the table's thread-safe client (which still converts to and from
+    Python types) rather than sharing the resource across threads.
+    Returns a dict of DeviceID -> latest item (None when there is no data).
+    """
+    client = table.meta.client
+
+    def latest(device_id):
+        response = client.query(
+            TableName=table.name,
+            KeyConditionExpression="DeviceID = :device_id",
+            ExpressionAttributeValues={":device_id": device_id},
+            ScanIndexForward=False,
+            Limit=1,
+        )
+        items = response.get("Items", [])
+        return items[0] if items else None
+
+    device_ids = list(dict.fromkeys(device_ids))
+    if not device_ids:
+        return {}
+
+    try:
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(device_ids))
+        ) as executor:
+            return dict(zip(device_ids, executor.map(latest, device_ids)))
+    except Exception as e:
+        logger.error(f"Error fetching latest info for {len(device_ids)} devices: {e}")
+        raise
+
+
+def get_device_info_cached(table, device_name):
+    """get_device_info, remembering found devices in memory.
+
+    Devices are only added and removed through this API, which drops the
+    cached entry on delete (see forget_cached_device).
+    """
+    device_info = _device_info_cache.get(device_name)
+    if device_info is None:
+        device_info = get_device_info(table, device_name)
+        if device_info:
+            _device_info_cache[device_name] = device_info
+    return device_info
+
+
+def forget_cached_device(device_name=None):
+    """Drop one device, or every device, from the in-memory lookup caches."""
+    if device_name is None:
+        _device_info_cache.clear()
+        _device_keys.clear()
+    else:
+        _device_info_cache.pop(device_name, None)
+        _device_keys.pop(device_name, None)
+
+
 def get_all_info(table, device_id):
     """Fetch all entries for a specific device from the DynamoDB table."""
     try:
@@ -157,15 +374,153 @@ def get_all_info(table, device_id):
         raise
 
 
-def generate_device_id():
-    """Generate a random 8-character alphanumeric device ID."""
-    return "".join(random.choices(string.ascii_uppercase + string.digits, k=8))
+def generate_device_id(table=None, max_attempts=10):
+    """Generate a random 8-character alphanumeric device ID.
+
+    When the devices table is given, the ID is checked with a keyed query
+    and regenerated on collision.
+    """
+    for _ in range(max_attempts):
+        device_id = "".join(random.choices(string.ascii_uppercase + string.digits, k=8))
+        if table is None:
+            return device_id
+
+        response = table.query(
+            KeyConditionExpression=Key("DeviceID").eq(f"DEVICE#{device_id}"),
+            Limit=1,
+        )
+        if not response.get("Items"):
+            return device_id
+        logger.warning(f"Generated device ID {device_id} already exists, retrying")
+
+    raise RuntimeError(f"Could not generate a unique device ID in {max_attempts} tries")
+
+
+def name_claim_key(device_name):
+    """PATDevices key of the item claiming device_name.
+
+    Both key attributes carry the prefix, so name lookups for real devices
+    never match a claim.
+    """
+    claim = f"{NAME_CLAIM_PREFIX}{device_name}"
+    return {"DeviceID": claim, "DeviceName": claim}
+
 
+def _conditional_put(table, item):
+    # The resource client serializes Python values, as it does for put_item
+    return {
+        "Put": {
+            "TableName": table.name,
+            "Item": item,
+            "ConditionExpression": "attribute_not_exists(DeviceID)",
+        }
+    }
 
-def create_event_id():
-    """Generate a unique EventID in the format EVENT#<unique_number>."""
-    unique_number = uuid.uuid4().int >> 64  # Generate a unique number
-    return f"EVENT#{unique_number}"
+
+def register_device(table, device_name, attributes):
+    """Atomically claim device_name and add a device with a new random ID.
+
+    The name claim and the device item are written in one transaction, the
+    claim conditional on the name being unclaimed, so concurrent
+    registrations of the same name cannot both succeed. The ID itself is
+    checked for collisions with a keyed query.
+    Returns the device item, or None when the name is already registered.
+    """
+    device_id = f"DEVICE#{generate_device_id(table)}"
+    device_item = {"DeviceID": device_id, "DeviceName": device_name, **attributes}
+    claim_item = {**name_claim_key(device_name), "ClaimedBy": device_id}
+
+    try:
+        table.meta.client.transact_write_items(
+            TransactItems=[
+                _conditional_put(table, claim_item),
+                _conditional_put(table, device_item),
+            ]
+        )
+    except ClientError as e:
+        reasons = [
+            reason.get("Code") for reason in e.response.get("CancellationReasons", [])
+        ]
+        if reasons[:1] != ["ConditionalCheckFailed"]:
+            raise
+        logger.info(f"Device name {device_name} is already registered")
+        return None
+
+    logger.debug(f"Generated new device ID: {device_id} for device {device_name}")
+    return device_item
+
+
+def claim_device_names(table):
+    """Write the name claim for every device registered without one.
+
+    Devices added before names were claimed, or imported without their
+    claims, would otherwise not block a new device taking the same name.
+    Returns the number of claims written.
+    """
+    claimed = 0
+    scan_params = {
+        "ProjectionExpression": "DeviceID, DeviceName",
+        "FilterExpression": Attr("DeviceType").exists(),
+    }
+    while True:
+        response = table.scan(**scan_params)
+        for item in response.get("Items", []):
+            try:
+                table.put_item(
+                    Item={
+                        **name_claim_key(item["DeviceName"]),
+                        "ClaimedBy": item["DeviceID"],
+                    },
+                    ConditionExpression="attribute_not_exists(DeviceID)",
+                )
+                claimed += 1
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                pass
+
+        last_evaluated_key = response.get("LastEvaluatedKey")
+        if not last_evaluated_key:
+            break
+        scan_params["ExclusiveStartKey"] = last_evaluated_key
+
+    if claimed:
+        logger.info(f"Claimed {claimed} existing device names")
+    return claimed
+
+
+def generate_ulid(timestamp_ms=None):
+    """Generate a monotonic ULID: 48-bit millisecond time + 80 bits of randomness.
+
+    ULIDs sort lexicographically by time. Within one millisecond the random
+    part is incremented instead of redrawn, so IDs issued by this process
+    are strictly increasing and never collide.
+    """
+    if timestamp_ms is None:
+        timestamp_ms = int(time.time() * 1000)
+
+    with _ulid_lock:
+        if timestamp_ms == _last_ulid[0]:
+            randomness = (_last_ulid[1] + 1) & ((1 << 80) - 1)
+        else:
+            randomness = int.from_bytes(os.urandom(10), "big")
+        _last_ulid[0], _last_ulid[1] = timestamp_ms, randomness
+
+    return generate_ulid_at(timestamp_ms, randomness)
+
+
+def ulid_bounds(start_ms, end_ms):
+    """Return the smallest and largest ULIDs for a millisecond time range."""
+    return generate_ulid_at(start_ms, 0), generate_ulid_at(end_ms, (1 << 80) - 1)
+
+
+def generate_ulid_at(timestamp_ms, randomness):
+    """Encode a ULID from explicit parts, e.g. for range query bounds."""
+    value = (timestamp_ms << 80) | randomness
+    return "".join(ULID_ALPHABET[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+
+def create_event_id(timestamp_ms=None):
+    """Generate a unique, time-ordered EventID in the format EVENT#<ULID>."""
+    return f"EVENT#{generate_ulid(timestamp_ms)}"
 
 
 def delete_device_entries_from_data_table(table, device_id):
@@ -236,6 +591,15 @@ def delete_device_entries_from_devices_table(table, device_id):
             table.delete_item(Key=key_to_delete)
             logger.info(f"Deleted item with DeviceName: {sort_key_value}")
 
+            # Release the name for new registrations
+            try:
+                table.delete_item(
+                    Key=name_claim_key(sort_key_value),
+                    ConditionExpression=Attr("ClaimedBy").eq(partition_key_value),
+                )
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                logger.warning(f"Name {sort_key_value} is not claimed by {device_id}")
+
         logger.info(f"Successfully deleted {len(items)} items from PATDevices table")
         return len(items)
 
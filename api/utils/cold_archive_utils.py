@@ -0,0 +1,403 @@
+import bisect
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import defaultdict
+from operator import itemgetter
+from utils.api_utils import get_devices_info
+from utils.raw_read_utils import (
+    AIR_RECORD_FIELDS,
+    DOOR_RECORD_FIELDS,
+    query_device_items_raw,
+)
+from utils.time_utils import ms_to_timestamp, timestamp_to_ms
+from constants.air import AIR_QUALITY_DEVICE_TYPE
+from constants.door import DOOR_DEVICE_TYPE
+from constants.database import (
+    COLD_ARCHIVE_PATH,
+    COLD_ARCHIVE_GRACE_DAYS,
+    COLD_ARCHIVE_INTERVAL_SECONDS,
+)
+
+logger = logging.getLogger("pat_api")
+
+DAY_MS = 86400 * 1000
+MAX_MS = 1 << 47
+MAGIC = b"PATCOLD1"
+HEADER_PREFIX = len(MAGIC) + 4  # Magic, then the header length as uint32
+
+RECORD_FIELDS = {
+    AIR_QUALITY_DEVICE_TYPE: AIR_RECORD_FIELDS,
+    DOOR_DEVICE_TYPE: DOOR_RECORD_FIELDS,
+}
+# Archived columns per device type: record field -> encoding. "d" is float64,
+# "dict" uint16 codes into a header value list and "fixed" fixed-width ASCII.
+# Every file also holds an int64 epoch_ms column; timestamps are rebuilt from it
+COLD_COLUMNS = {
+    AIR_QUALITY_DEVICE_TYPE: {"event_id": "fixed", "pm25": "d", "pm10": "d"},
+    DOOR_DEVICE_TYPE: {"event_id": "fixed", "door_status": "dict", "battery": "d"},
+}
+# Records when no fields are selected, matching get_air_history/get_door_history
+DEFAULT_FIELDS = {
+    AIR_QUALITY_DEVICE_TYPE: ["device_id", "event_id", "timestamp", "pm25", "pm10"],
+    DOOR_DEVICE_TYPE: ["device_id", "timestamp", "door_status", "battery"],
+}
+
+
+def day_start_ms(timestamp_ms):
+    return timestamp_ms - timestamp_ms % DAY_MS
+
+
+def _device_dir(device_id):
+    return os.path.join(COLD_ARCHIVE_PATH, device_id.split("#")[-1])
+
+
+def cold_day_path(device_id, day_ms):
+    return os.path.join(_device_dir(device_id), f"{ms_to_timestamp(day_ms)[:10]}.pat")
+
+
+def archived_days(device_id):
+    """Start of every archived day for a device, in epoch ms, oldest first."""
+    try:
+        names = os.listdir(_device_dir(device_id))
+    except FileNotFoundError:
+        return []
+    return sorted(
+        timestamp_to_ms(f"{name[:-4]}T00:00:00Z")
+        for name in names
+        if name.endswith(".pat")
+    )
+
+
+def _wire_epoch_ms(item):
+    if "EpochMs" in item:
+        return int(item["EpochMs"]["N"])
+    return timestamp_to_ms(item["Timestamp"]["S"])
+
+
+def write_cold_day(device_id, device_type, day_ms, items):
+    """Write one device-day archive file from wire-format PATData items.
+
+    Columns are stored contiguously, each 8-byte aligned after a JSON header,
+    so readers can memory-map the file and slice only the rows they need.
+    The file is written beside its final path and renamed into place.
+    """
+    rows = sorted(((_wire_epoch_ms(item), item) for item in items), key=itemgetter(0))
+    columns = []
+    blobs = []
+
+    def add_column(name, encoding, data, **extra):
+        offset = sum(len(blob) for blob in blobs)
+        columns.append({"name": name, "encoding": encoding, "offset": offset, **extra})
+        blobs.append(data + b"\0" * (-len(data) % 8))
+
+    add_column("epoch_ms", "q", array("q", (row[0] for row in rows)).tobytes())
+    for name, encoding in COLD_COLUMNS[device_type].items():
+        attribute, convert = RECORD_FIELDS[device_type][name]
+        values = [convert(item, attribute) for _, item in rows]
+        if encoding == "d":
+            add_column(name, encoding, array("d", values).tobytes())
+        elif encoding == "dict":
+            dictionary = list(dict.fromkeys(values))
+            codes = {value: code for code, value in enumerate(dictionary)}
+            data = array("H", (codes[value] for value in values)).tobytes()
+            add_column(name, encoding, data, values=dictionary)
+        else:
+            encoded = [value.encode("ascii") for value in values]
+            width = max((len(value) for value in encoded), default=0) or 1
+            data = b"".join(value.ljust(width, b"\0") for value in encoded)
+            add_column(name, encoding, data, width=width)
+
+    header = json.dumps(
+        {
+            "device_type": device_type,
+            "day": day_ms,
+            "count": len(rows),
+            "byteorder": sys.byteorder,
+            "columns": columns,
+        }
+    ).encode()
+    header += b" " * (-(HEADER_PREFIX + len(header)) % 8)
+
+    path = cold_day_path(device_id, day_ms)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "wb") as file:
+        file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        file.writelines(blobs)
+    os.replace(f"{path}.tmp", path)
+    return len(rows)
+
+
+def _day_timestamps(day_ms, times):
+    """Sort-key timestamps for epoch ms within one day, sharing its date prefix."""
+    prefix = ms_to_timestamp(day_ms)[:11]
+    timestamps = []
+    for millis in times:
+        hours, millis = divmod(millis - day_ms, 3600000)
+        minutes, millis = divmod(millis, 60000)
+        seconds, millis = divmod(millis, 1000)
+        timestamps.append(
+            f"{prefix}{hours:02d}:{minutes:02d}:{seconds:02d}.{millis:03d}Z"
+        )
+    return timestamps
+
+
+def _read_column(view, data_start, column, low, high):
+    """Rows low..high of one column, read straight from the mapped file."""
+    start = data_start + column["offset"]
+    encoding = column["encoding"]
+    if encoding in ("q", "d"):
+        values = array(encoding)
+        values.frombytes(view[start + low * 8 : start + high * 8])
+        return values.tolist()
+    if encoding == "dict":
+        codes = array("H")
+        codes.frombytes(view[start + low * 2 : start + high * 2])
+        dictionary = column["values"]
+        return [dictionary[code] for code in codes]
+    width = column["width"]
+    data = view[start + low * width : start + high * width]
+    return [
+        data[offset : offset + width].rstrip(b"\0").decode("ascii")
+        for offset in range(0, len(data), width)
+    ]
+
+
+def read_cold_day(device_id, day_ms, fields, start_ms, end_ms):
+    """Records for start_ms..end_ms of one archived day, or None if unreadable.
+
+    Only the epoch_ms column is read whole; the selected columns are read
+    for the matching rows alone.
+    """
+    path = cold_day_path(device_id, day_ms)
+    try:
+        with open(path, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as view:
+            if view[: len(MAGIC)] != MAGIC:
+                raise ValueError("not a cold archive file")
+            (header_length,) = struct.unpack_from("<I", view, len(MAGIC))
+            header = json.loads(view[HEADER_PREFIX : HEADER_PREFIX + header_length])
+            if header["byteorder"] != sys.byteorder:
+                raise ValueError(f"written on a {header['byteorder']}-endian host")
+            data_start = HEADER_PREFIX + header_length
+            count = header["count"]
+            columns = {column["name"]: column for column in header["columns"]}
+
+            times = _read_column(view, data_start, columns["epoch_ms"], 0, count)
+            low = bisect.bisect_left(times, start_ms)
+            high = bisect.bisect_right(times, end_ms)
+            short_device_id = device_id.split("#")[-1]
+
+            values = []
+            for name in fields:
+                if name == "device_id":
+                    values.append([short_device_id] * (high - low))
+                elif name == "timestamp":
+                    values.append(_day_timestamps(day_ms, times[low:high]))
+                else:
+                    values.append(
+                        _read_column(view, data_start, columns[name], low, high)
+                    )
+    except (OSError, ValueError, KeyError, struct.error) as e:
+        logger.warning(f"Unreadable cold archive {path}, using hot history: {e}")
+        return None
+
+    return [dict(zip(fields, row)) for row in zip(*values)]
+
+
+def get_tiered_history(
+    device_type, device_id, hot_history, fields=None, start_ms=None, end_ms=None
+):
+    """History merged from archived days and the hot tier, oldest first.
+
+    hot_history(start_ms, end_ms) reads the hot tier; it is only called for
+    the ranges between and after archived days, so a long history is mostly
+    read from contiguous columns instead of one item per reading.
+    """
+    fields = fields or DEFAULT_FIELDS[device_type]
+    low = start_ms if start_ms is not None else 0
+    high = end_ms if end_ms is not None else MAX_MS
+
+    records = []
+    hot_from = low
+    for day_ms in archived_days(device_id):
+        day_end = day_ms + DAY_MS - 1
+        if day_end < low or day_ms > high:
+            continue
+        cold = read_cold_day(
+            device_id, day_ms, fields, max(low, day_ms), min(high, day_end)
+        )
+        if cold is None:
+            continue  # Served from the hot tier with its neighbours
+        if hot_from < day_ms:
+            records.extend(hot_history(hot_from, day_ms - 1))
+        records.extend(cold)
+        hot_from = day_end + 1
+    if hot_from <= high:
+        records.extend(hot_history(hot_from, high))
+    return records
+
+
+_invalidated = defaultdict(set)  # DeviceID -> days invalidated since last taken
+_invalidated_lock = threading.Lock()
+
+
+def _take_invalidated(device_id):
+    with _invalidated_lock:
+        return _invalidated.pop(device_id, set())
+
+
+def invalidate_cold_day(device_id, timestamp_ms):
+    """Drop the archived day a late reading falls in.
+
+    The day is served from the hot tier until the archiver rewrites it.
+    """
+    day_ms = day_start_ms(timestamp_ms)
+    with _invalidated_lock:
+        _invalidated[device_id].add(day_ms)
+    try:
+        os.remove(cold_day_path(device_id, day_ms))
+    except FileNotFoundError:
+        pass
+
+
+def invalidate_cold_items(items):
+    """invalidate_cold_day for each PATData item, once it has been stored."""
+    for item in items:
+        invalidate_cold_day(item["DeviceID"], int(item["EpochMs"]))
+
+
+def archive_device(data_table_name, device_id, device_type, now_ms=None):
+    """Archive every closed day of a device that is not archived yet.
+
+    Days are closed COLD_ARCHIVE_GRACE_DAYS after they end. PATData keeps
+    its items; the archive is a read-optimised copy. Returns (days written,
+    readings archived).
+    """
+    now_ms = now_ms or int(time.time() * 1000)
+    closed_before = day_start_ms(now_ms) - COLD_ARCHIVE_GRACE_DAYS * DAY_MS
+    projection = list(
+        dict.fromkeys(
+            ["Timestamp", "EpochMs"]
+            + [
+                RECORD_FIELDS[device_type][name][0]
+                for name in COLD_COLUMNS[device_type]
+            ]
+        )
+    )
+    _take_invalidated(device_id)
+
+    # Keyed ranges between the days already archived
+    ranges = []
+    range_start = 0
+    for day_ms in archived_days(device_id):
+        if day_ms >= closed_before:
+            break
+        if range_start < day_ms:
+            ranges.append((range_start, day_ms - 1))
+        range_start = day_ms + DAY_MS
+    if range_start < closed_before:
+        ranges.append((range_start, closed_before - 1))
+
+    days = defaultdict(list)
+    for start_ms, end_ms in ranges:
+        for item in query_device_items_raw(
+            data_table_name,
+            device_id,
+            projection=projection,
+            start_ms=start_ms,
+            end_ms=end_ms,
+        ):
+            days[day_start_ms(_wire_epoch_ms(item))].append(item)
+
+    readings = 0
+    for day_ms, items in sorted(days.items()):
+        readings += write_cold_day(device_id, device_type, day_ms, items)
+
+    # A late reading stored mid-run may be missing from the day just written
+    for day_ms in _take_invalidated(device_id):
+        invalidate_cold_day(device_id, day_ms)
+    return len(days), readings
+
+
+def delete_cold_device(device_id):
+    """Delete a device's archived days, returning how many were removed."""
+    removed = len(archived_days(device_id))
+    shutil.rmtree(_device_dir(device_id), ignore_errors=True)
+    return removed
+
+
+def delete_cold_archive():
+    """Delete every archived day, returning how many were removed."""
+    removed = 0
+    for _, _, names in os.walk(COLD_ARCHIVE_PATH):
+        removed += sum(1 for name in names if name.endswith(".pat"))
+    shutil.rmtree(COLD_ARCHIVE_PATH, ignore_errors=True)
+    return removed
+
+
+class ColdArchiver:
+    """Background job archiving closed days of every air and door device."""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = None
+        self._data_table_name = None
+        self._device_table = None
+
+    def run_once(self):
+        days = readings = 0
+        for device_type in COLD_COLUMNS:
+            for device in get_devices_info(self._device_table, device_type=device_type):
+                try:
+                    device_days, device_readings = archive_device(
+                        self._data_table_name, device["DeviceID"], device_type
+                    )
+                except Exception as e:
+                    logger.error(f"Error archiving {device.get('DeviceName')}: {e}")
+                    continue
+                days += device_days
+                readings += device_readings
+        if days:
+            logger.info(f"Archived {readings} readings in {days} device-days")
+        return days, readings
+
+    def _archive_loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Error archiving cold history: {e}")
+            if self._stop.wait(COLD_ARCHIVE_INTERVAL_SECONDS):
+                break
+
+    def start(self, data_table, device_table):
+        if self._thread and self._thread.is_alive():
+            return
+        self._data_table_name = data_table.name
+        self._device_table = device_table
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._archive_loop, name="cold-archive", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+_archiver = ColdArchiver()
+
+
+def get_cold_archiver():
+    return _archiver
@@ -0,0 +1,154 @@
+import struct
+import logging
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from pydantic import ValidationError
+from utils.api_utils import get_device_info
+from utils.response_utils import FastJSONResponse
+from constants.door import DOOR_OPTIONS
+from pydantic_models.air_models import AddAirDeviceData
+from pydantic_models.door_models import AddDoorDeviceData
+
+logger = logging.getLogger("pat_api")
+
+# Fixed-layout little-endian records for constrained devices. A body may hold
+# one or more records back to back.
+#
+# Air (24 bytes):  device_name[16] | timestamp u32 | pm25 u16 | pm10 u16
+# Door (22 bytes): device_name[16] | timestamp u32 | door_status u8 | battery u8
+#
+# device_name is ASCII, NUL padded. timestamp is epoch seconds, 0 meaning
+# "use server time". pm25/pm10 are in tenths of a ug/m3. door_status indexes
+# DOOR_OPTIONS (0 = OPEN, 1 = CLOSED).
+AIR_RECORD = struct.Struct("<16sIHH")
+DOOR_RECORD = struct.Struct("<16sIBB")
+
+
+def _iter_records(body: bytes, record: struct.Struct):
+    """Iterate unpacked records, rejecting bodies that are not whole records."""
+    if not body or len(body) % record.size:
+        logger.warning(
+            f"Invalid compact body length {len(body)}, expected a multiple of {record.size}"
+        )
+        raise HTTPException(
+            status_code=400,
+            detail=f"Body must be a multiple of {record.size} bytes.",
+        )
+    return record.iter_unpack(body)
+
+
+def _decode_device_name(raw: bytes) -> str:
+    try:
+        return raw.rstrip(b"\x00").decode("ascii")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="device_name must be ASCII.")
+
+
+def _decode_timestamp(epoch_seconds: int):
+    if not epoch_seconds:
+        return None
+    return datetime.fromtimestamp(epoch_seconds, tz=timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
+
+
+def _build_record(model, index: int, **fields):
+    try:
+        return model(**fields)
+    except ValidationError as e:
+        logger.warning(f"Invalid compact record {index}: {e}")
+        raise HTTPException(status_code=400, detail=f"Invalid record {index}.")
+
+
+def decode_air_records(body: bytes) -> list[AddAirDeviceData]:
+    """Decode a compact air body into AddAirDeviceData models."""
+    return [
+        _build_record(
+            AddAirDeviceData,
+            index,
+            device_name=_decode_device_name(name),
+            timestamp=_decode_timestamp(timestamp),
+            pm25=pm25 / 10,
+            pm10=pm10 / 10,
+        )
+        for index, (name, timestamp, pm25, pm10) in enumerate(
+            _iter_records(body, AIR_RECORD)
+        )
+    ]
+
+
+def decode_door_records(body: bytes) -> list[AddDoorDeviceData]:
+    """Decode a compact door body into AddDoorDeviceData models."""
+    records = []
+    for index, (name, timestamp, door_status, battery) in enumerate(
+        _iter_records(body, DOOR_RECORD)
+    ):
+        if door_status >= len(DOOR_OPTIONS):
+            raise HTTPException(
+                status_code=400, detail=f"Invalid door_status code {door_status}."
+            )
+        records.append(
+            _build_record(
+                AddDoorDeviceData,
+                index,
+                device_name=_decode_device_name(name),
+                timestamp=_decode_timestamp(timestamp),
+                door_status=DOOR_OPTIONS[door_status],
+                battery=battery,
+            )
+        )
+    return records
+
+
+def check_compact_devices(device_table, records):
+    """Reject the whole body before any write if a record cannot be stored.
+
+    Every device named in the body must be registered, so a bad name fails
+    the request up front instead of after the earlier records were written.
+    """
+    for device_name in dict.fromkeys(data.device_name for data in records):
+        if device_name == "default_device":
+            raise HTTPException(
+                status_code=400, detail="device_name cannot be 'default_device'."
+            )
+        if not get_device_info(device_table, device_name, projection=["DeviceID"]):
+            logger.warning(f"No device found with ID: {device_name}")
+            raise HTTPException(
+                status_code=404, detail=f"No device found with ID: {device_name}"
+            )
+
+
+async def ingest_compact_records(records, add_record, idempotency_key=None):
+    """Write each record through add_record(data, record_key) and collect failures.
+
+    With an Idempotency-Key header each record gets its own stable key
+    ("<key>:<index>"), so resending the whole body after a partial failure
+    only stores the records that were not written the first time. Returns a
+    list of {"index", "status_code", "detail"} for the records that failed.
+    """
+    failed = []
+    for index, data in enumerate(records):
+        record_key = f"{idempotency_key}:{index}" if idempotency_key else None
+        try:
+            await add_record(data, record_key)
+        except HTTPException as e:
+            logger.warning(f"Compact record {index} failed: {e.detail}")
+            failed.append(
+                {"index": index, "status_code": e.status_code, "detail": e.detail}
+            )
+    return failed
+
+
+def compact_failure_response(total: int, failed: list):
+    """Report per-record failures with the first failure's status code.
+
+    Devices that only read the status line still see an error and retry;
+    ones that parse the body can resend just the failed indices.
+    """
+    return FastJSONResponse(
+        status_code=failed[0]["status_code"],
+        content={
+            "message": f"Added {total - len(failed)} of {total} records.",
+            "failed": failed,
+        },
+    )
@@ -0,0 +1,269 @@
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import timedelta
+from boto3.dynamodb.conditions import Key
+from utils.api_utils import query_device_range
+from utils.time_utils import EPOCH, timestamp_to_ms, ms_to_timestamp, item_epoch_ms
+from constants.door import (
+    DOOR_ANALYTICS_BUCKET_SECONDS,
+    DOOR_ANALYTICS_BUCKET_GRACE,
+    DOOR_ANALYTICS_CACHE_SIZE,
+)
+
+logger = logging.getLogger("pat_api")
+
+BUCKET_MS = DOOR_ANALYTICS_BUCKET_SECONDS * 1000
+GRACE_MS = DOOR_ANALYTICS_BUCKET_GRACE * 1000
+HOUR_MS = 3600 * 1000
+
+# (device_id, bucket_start_ms, open_since_ms) -> bucket summary
+_bucket_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        summary = _bucket_cache.get(key)
+        if summary is not None:
+            _bucket_cache.move_to_end(key)
+        return summary
+
+
+def _cache_put(key, summary):
+    with _cache_lock:
+        _bucket_cache[key] = summary
+        _bucket_cache.move_to_end(key)
+        while len(_bucket_cache) > DOOR_ANALYTICS_CACHE_SIZE:
+            _bucket_cache.popitem(last=False)
+
+
+def invalidate_door_analytics(device_id: str, timestamp_str: str):
+    """Drop cached summaries a late event for the device would change.
+
+    Summaries carry the open/closed state into the next bucket, so every
+    bucket from the event's onwards is dropped. Events for the current
+    bucket never hit the cache and return straight away.
+    """
+    _invalidate_from(device_id, timestamp_to_ms(timestamp_str))
+
+
+def invalidate_door_analytics_items(items):
+    """invalidate_door_analytics for each door PATData item, once it is stored."""
+    for item in items:
+        if "DoorStatus" in item:
+            _invalidate_from(item["DeviceID"], int(item["EpochMs"]))
+
+
+def _invalidate_from(device_id, event_ms):
+    bucket_start = event_ms - event_ms % BUCKET_MS
+    if bucket_start + BUCKET_MS + GRACE_MS > int(time.time() * 1000):
+        return
+
+    with _cache_lock:
+        stale = [
+            key
+            for key in _bucket_cache
+            if key[0] == device_id and key[1] + BUCKET_MS > event_ms
+        ]
+        for key in stale:
+            del _bucket_cache[key]
+
+    if stale:
+        logger.debug(f"Dropped {len(stale)} cached door analytics buckets")
+
+
+def clear_door_analytics():
+    """Drop every cached summary, after history was changed wholesale."""
+    with _cache_lock:
+        _bucket_cache.clear()
+
+
+def _open_at(table, device_id, start_ms):
+    """Return start_ms if the door was open at the start of the range, else None."""
+    response = table.query(
+        KeyConditionExpression=Key("DeviceID").eq(device_id)
+        & Key("Timestamp").lt(ms_to_timestamp(start_ms)),
+        ProjectionExpression="DoorStatus",
+        ScanIndexForward=False,
+        Limit=1,
+    )
+    items = response.get("Items", [])
+    if items and items[0].get("DoorStatus") == "OPEN":
+        return start_ms
+    return None
+
+
+def _summarise_buckets(items, buckets, open_since):
+    """Fold a time-ordered event stream into one summary per bucket.
+
+    Repeated OPEN or CLOSED events (heartbeats, retries) do not start or end
+    an interval. An interval is reported in the bucket where it closes.
+    """
+    items = iter(items)
+    pending = next(items, None)
+
+    for lo, hi in buckets:
+        summary = {
+            "open_since_in": open_since,
+            "opens": [],
+            "intervals": [],
+            "events": 0,
+        }
+        while pending is not None:
+            event_ms = item_epoch_ms(pending)
+            if event_ms >= hi:
+                break
+            if event_ms >= lo:
+                summary["events"] += 1
+                status = pending.get("DoorStatus")
+                if status == "OPEN" and open_since is None:
+                    open_since = event_ms
+                    summary["opens"].append(event_ms)
+                elif status == "CLOSED" and open_since is not None:
+                    summary["intervals"].append((open_since, event_ms))
+                    open_since = None
+            pending = next(items, None)
+
+        summary["open_since_out"] = open_since
+        yield summary
+
+
+def _add_open_seconds(heatmap, start_ms, end_ms):
+    """Spread an open interval over the weekday/hour cells it covers."""
+    cursor = start_ms
+    while cursor < end_ms:
+        hour_end = min(cursor - cursor % HOUR_MS + HOUR_MS, end_ms)
+        moment = EPOCH + timedelta(milliseconds=cursor)
+        heatmap[moment.weekday()][moment.hour] += (hour_end - cursor) / 1000
+        cursor = hour_end
+
+
+def _format_interval(start_ms, end_ms, ongoing=False):
+    return {
+        "start": ms_to_timestamp(start_ms),
+        "end": ms_to_timestamp(end_ms),
+        "seconds": (end_ms - start_ms) / 1000,
+        "ongoing": ongoing,
+    }
+
+
+def _merge_summaries(summaries, end_ms):
+    """Combine bucket summaries into the analytics response."""
+    intervals = []
+    opens = []
+    events = 0
+    open_since = None
+    for summary in summaries:
+        intervals.extend(summary["intervals"])
+        opens.extend(summary["opens"])
+        events += summary["events"]
+        open_since = summary["open_since_out"]
+
+    formatted = [_format_interval(start, end) for start, end in intervals]
+    if open_since is not None and open_since < end_ms:
+        intervals.append((open_since, end_ms))
+        formatted.append(_format_interval(open_since, end_ms, ongoing=True))
+
+    opens_per_hour = Counter()
+    opens_per_day = Counter()
+    open_heatmap = [[0] * 24 for _ in range(7)]
+    open_seconds_heatmap = [[0.0] * 24 for _ in range(7)]
+
+    for open_ms in opens:
+        moment = EPOCH + timedelta(milliseconds=open_ms)
+        opens_per_hour[moment.strftime("%Y-%m-%dT%H:00:00Z")] += 1
+        opens_per_day[moment.strftime("%Y-%m-%d")] += 1
+        open_heatmap[moment.weekday()][moment.hour] += 1
+
+    for start, end in intervals:
+        _add_open_seconds(open_seconds_heatmap, start, end)
+
+    total_open_ms = sum(end - start for start, end in intervals)
+    longest = max(formatted, key=lambda interval: interval["seconds"], default=None)
+
+    return {
+        "summary": {
+            "events": events,
+            "opens": len(opens),
+            "total_open_seconds": total_open_ms / 1000,
+            "mean_open_seconds": (
+                total_open_ms / len(intervals) / 1000 if intervals else 0.0
+            ),
+            "longest_open": longest,
+            "open_at_end": open_since is not None,
+        },
+        "intervals": formatted,
+        "opens_per_hour": dict(sorted(opens_per_hour.items())),
+        "opens_per_day": dict(sorted(opens_per_day.items())),
+        "heatmap": {
+            "opens": open_heatmap,
+            "open_seconds": [
+                [round(seconds, 3) for seconds in row] for row in open_seconds_heatmap
+            ],
+        },
+    }
+
+
+def get_door_analytics(table, device_id: str, start_ms: int, end_ms: int):
+    """Compute open intervals, open counts and heatmaps for a door over a range.
+
+    The range is split into fixed buckets. Closed buckets are served from an
+    in-memory cache keyed on the state carried in from the previous bucket;
+    from the first miss onwards the rest of the range is read with a single
+    streaming keyed query, so a warm request only queries the open bucket.
+    Intervals are clipped to the range; heatmaps are indexed [weekday][hour]
+    in UTC with Monday as 0.
+    """
+    now_ms = int(time.time() * 1000)
+    end_ms = min(end_ms, now_ms)
+
+    buckets = []
+    bucket_start = start_ms - start_ms % BUCKET_MS
+    while bucket_start < end_ms:
+        buckets.append(
+            (max(bucket_start, start_ms), min(bucket_start + BUCKET_MS, end_ms))
+        )
+        bucket_start += BUCKET_MS
+
+    def cacheable(lo, hi):
+        return lo % BUCKET_MS == 0 and hi - lo == BUCKET_MS and hi + GRACE_MS <= now_ms
+
+    open_since = _open_at(table, device_id, start_ms)
+    summaries = []
+    hits = 0
+
+    for index, (lo, hi) in enumerate(buckets):
+        cached = _cache_get((device_id, lo, open_since)) if cacheable(lo, hi) else None
+        if cached is not None:
+            summaries.append(cached)
+            open_since = cached["open_since_out"]
+            hits += 1
+            continue
+
+        items = query_device_range(
+            table,
+            device_id,
+            lo,
+            end_ms,
+            projection=["Timestamp", "DoorStatus"],
+        )
+        for (lo, hi), summary in zip(
+            buckets[index:], _summarise_buckets(items, buckets[index:], open_since)
+        ):
+            if cacheable(lo, hi):
+                _cache_put((device_id, lo, summary["open_since_in"]), summary)
+            summaries.append(summary)
+        break
+
+    logger.debug(
+        f"Door analytics for {device_id}: {hits}/{len(buckets)} buckets from cache"
+    )
+
+    analytics = _merge_summaries(summaries, end_ms)
+    analytics["range"] = {
+        "start": ms_to_timestamp(start_ms),
+        "end": ms_to_timestamp(end_ms),
+    }
+    return analytics
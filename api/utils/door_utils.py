@@ -1,22 +1,44 @@
 import logging
 import requests
 import json
-from utils.api_utils import get_latest_info, get_all_info, generate_device_id
+from utils.api_utils import generate_device_id, register_device
+from utils.raw_read_utils import (
+    DOOR_RECORD_FIELDS,
+    build_records,
+    deserialize_item,
+    get_door_history,
+    get_latest_item_raw,
+    record_projection,
+)
+from utils.cold_archive_utils import get_tiered_history
 from botocore.exceptions import ClientError
+from constants.database import COLD_ARCHIVE
 from constants.door import DOOR_DEVICE_TYPE
 
 logger = logging.getLogger("pat_api")
 
 
-def get_latest_door_info(table, device_id: str):
-    """Get the latest info for a specific door device."""
+def get_latest_door_info(table, device_id: str, fields=None):
+    """Get the latest info for a specific door device.
+
+    fields limits the response, and the attributes read, to those
+    DOOR_RECORD_FIELDS names.
+    """
     logger.debug(f"Fetching latest info for device_id: {device_id}")
-    latest_info = get_latest_info(table, device_id)
+    projection = record_projection(DOOR_RECORD_FIELDS, fields) if fields else None
+    latest_item = get_latest_item_raw(table.name, device_id, projection)
 
-    if not latest_info:
+    if not latest_item:
         logger.debug(f"No latest info found for device_id: {device_id}")
         return None
 
+    if fields:
+        return build_records([latest_item], device_id, DOOR_RECORD_FIELDS, fields)[0]
+    return format_latest_door_info(deserialize_item(latest_item), device_id)
+
+
+def format_latest_door_info(latest_info, device_id: str):
+    """Format a latest door entry for the API response."""
     try:
         device_info = {
             "device_id": latest_info.get("DeviceID", "").split("#")[1],
@@ -34,56 +56,48 @@ def get_latest_door_info(table, device_id: str):
         raise ValueError(f"Error processing latest door info: {e}")
 
 
-def format_all_door_info(table, device_id: str):
-    """Get all info for a specific door device and format the response."""
-    all_info = get_all_info(table, device_id)
+def format_all_door_info(table, device_id: str, fields=None):
+    """Get all info for a specific door device and format the response.
 
-    if not all_info:
-        return None
+    fields limits each record to those DOOR_RECORD_FIELDS names. With the
+    cold archive enabled archived days are read from their files.
+    """
+    def hot_history(start_ms=None, end_ms=None):
+        return get_door_history(table.name, device_id, fields, start_ms, end_ms)
 
     try:
-        formatted_info = []
-        for item in all_info:
-            device_id_raw = item.get("DeviceID", "")
-            timestamp_raw = item.get("Timestamp", "")
-            device_id_parts = device_id_raw.split("#")
-            if len(device_id_parts) < 2:
-                logger.warning(f"Unexpected DeviceID format '{device_id_raw}' in item: {item}")
-            formatted_info.append(
-                {
-                    "device_id": device_id_parts[1] if len(device_id_parts) >= 2 else device_id_raw,
-                    "timestamp": timestamp_raw,
-                    "door_status": item.get("DoorStatus"),
-                    "battery": float(item.get("Battery", 0.0)),
-                }
+        if COLD_ARCHIVE:
+            formatted_info = get_tiered_history(
+                DOOR_DEVICE_TYPE, device_id, hot_history, fields
             )
-        return formatted_info
-
-    except (IndexError, ValueError, AttributeError, TypeError) as e:
+        else:
+            formatted_info = hot_history()
+    except (IndexError, ValueError, AttributeError, TypeError, KeyError) as e:
         logging.error(f"Error processing door info for device {device_id}: {e}", exc_info=True)
         raise ValueError(f"Error processing data: {e}")
 
+    return formatted_info or None
+
 
 def add_hodor_device(table, device_name):
-    """Add a new device to the DynamoDB table."""
+    """Add a new device to the DynamoDB table, or return None if the name is taken."""
     try:
-        device_id = generate_device_id()
-        logger.debug(f"Generated new device ID: {device_id} for device {device_name}")
-
-        hodor_item = {
-            "DeviceID": f"DEVICE#{device_id}",
-            "DeviceName": device_name,
-            "DeviceType": DOOR_DEVICE_TYPE,
-            "DeviceManufacturer": "Fuffly Slippers? Devices",
-            "DeviceModel": "Hodor Sensor",
-        }
         logger.debug(f"Adding item to DynamoDB")
-
-        response = table.put_item(Item=hodor_item)
+        hodor_item = register_device(
+            table,
+            device_name,
+            {
+                "DeviceType": DOOR_DEVICE_TYPE,
+                "DeviceManufacturer": "Fuffly Slippers? Devices",
+                "DeviceModel": "Hodor Sensor",
+            },
+        )
+        if hodor_item is None:
+            return None
         logger.debug(f"Device added successfully")
 
         logger.info(
-            f"Added new device with ID {device_id} and name {device_name} to table."
+            f"Added new device with ID {hodor_item['DeviceID']} and name {device_name} to table."
         )
         return hodor_item
 
@@ -97,14 +111,22 @@ def add_hodor_device(table, device_name):
         raise
 
 
-def store_webhook(table, webhook_url: str, device_name: str = None):
-    """Store a webhook URL in DynamoDB for door state notifications."""
+def store_webhook(
+    table, webhook_url: str, device_name: str = None, event_type: str = "door_state"
+):
+    """Store a webhook URL in DynamoDB for door state or air alert notifications."""
     try:
         webhook_id = generate_device_id()
+        target_device = device_name if device_name else "ALL"
+        # Keyed like a device (DeviceID/DeviceName) but prefixed, so name
+        # lookups for real devices never match a webhook
         webhook_item = {
+            "DeviceID": f"WEBHOOK#{webhook_id}",
+            "DeviceName": f"WEBHOOK#{target_device}",
             "WebhookID": f"WEBHOOK#{webhook_id}",
             "WebhookURL": webhook_url,
-            "DeviceName": device_name if device_name else "ALL",
+            "TargetDevice": target_device,
+            "EventType": event_type,
             "Active": True,
         }
         logger.debug(f"Storing webhook: {json.dumps(webhook_item, default=str)}")
@@ -116,21 +138,28 @@ def store_webhook(table, webhook_url: str, device_name: str = None):
         raise
 
 
-def get_active_webhooks(table, device_name: str = None):
-    """Retrieve all active webhooks from DynamoDB."""
+def get_active_webhooks(
+    table, device_name: str = None, event_type: str = "door_state"
+):
+    """Retrieve all active webhooks for an event type from DynamoDB."""
     try:
         response = table.scan(
             FilterExpression="Active = :active",
             ExpressionAttributeValues={":active": True},
         )
-        webhooks = response.get("Items", [])
+        webhooks = [
+            w
+            for w in response.get("Items", [])
+            if w.get("EventType", "door_state") == event_type
+        ]
 
         # Filter by device_name if specified
         if device_name:
             webhooks = [
                 w
                 for w in webhooks
-                if w.get("DeviceName") == device_name or w.get("DeviceName") == "ALL"
+                if w.get("TargetDevice") == device_name
+                or w.get("TargetDevice") == "ALL"
             ]
 
         logger.debug(f"Found {len(webhooks)} active webhooks")
@@ -140,6 +169,25 @@ def get_active_webhooks(table, device_name: str = None):
         return []
 
 
+def post_to_webhooks(webhooks, payload: dict):
+    """POST a JSON payload to each webhook, logging failures."""
+    for webhook in webhooks:
+        webhook_url = webhook.get("WebhookURL")
+        try:
+            logger.debug(f"Triggering webhook: {webhook_url}")
+            response = requests.post(
+                webhook_url,
+                json=payload,
+                timeout=5,
+                headers={"Content-Type": "application/json"},
+            )
+            logger.info(
+                f"Webhook triggered successfully: {webhook_url} (Status: {response.status_code})"
+            )
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to trigger webhook {webhook_url}: {e}")
+
+
 def trigger_webhooks(table, door_data: dict):
     """Trigger all registered webhooks with door state data."""
     try:
@@ -158,20 +206,6 @@ def trigger_webhooks(table, door_data: dict):
             "battery": door_data.get("battery"),
         }
 
-        for webhook in webhooks:
-            webhook_url = webhook.get("WebhookURL")
-            try:
-                logger.debug(f"Triggering webhook: {webhook_url}")
-                response = requests.post(
-                    webhook_url,
-                    json=payload,
-                    timeout=5,
-                    headers={"Content-Type": "application/json"},
-                )
-                logger.info(
-                    f"Webhook triggered successfully: {webhook_url} (Status: {response.status_code})"
-                )
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Failed to trigger webhook {webhook_url}: {e}")
+        post_to_webhooks(webhooks, payload)
     except Exception as e:
         logger.error(f"Error triggering webhooks: {e}")
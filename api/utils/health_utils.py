@@ -0,0 +1,255 @@
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from boto3.dynamodb.conditions import Key
+from utils.api_utils import get_devices_info, get_latest_info_many, ulid_bounds
+from utils.time_utils import timestamp_to_ms, ms_to_timestamp
+from constants.health import (
+    HEALTH_STALE_SECONDS,
+    HEALTH_DEFAULT_STALE_SECONDS,
+    HEALTH_ISSUE_WINDOW_SECONDS,
+    HEALTH_SWEEP_INTERVAL_SECONDS,
+)
+
+logger = logging.getLogger("pat_api")
+
+
+def stale_after_seconds(device_type):
+    return HEALTH_STALE_SECONDS.get(device_type, HEALTH_DEFAULT_STALE_SECONDS)
+
+
+class DeviceHealthMonitor:
+    """In-memory last-seen and recent-issue tracker for every device.
+
+    The ingest endpoints report readings and issues as they are stored, so
+    the health summary is built from memory alone. A background sweep
+    prunes old issues and logs devices going stale or recovering.
+    """
+
+    def __init__(self):
+        self._devices = {}  # DeviceID -> name, type, last seen ms, stale flag
+        self._issues = {}  # DeviceID -> deque of issue epoch ms, oldest first
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def track_device(self, device_id, device_name, device_type):
+        with self._lock:
+            device = self._devices.setdefault(
+                device_id, {"last_seen_ms": None, "stale": False}
+            )
+            device["device_name"] = device_name
+            device["device_type"] = device_type
+
+    def forget_device(self, device_id):
+        with self._lock:
+            self._devices.pop(device_id, None)
+            self._issues.pop(device_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._devices.clear()
+            self._issues.clear()
+
+    def record_reading(self, device_id, device_name, device_type, timestamp_ms):
+        self.track_device(device_id, device_name, device_type)
+        with self._lock:
+            device = self._devices[device_id]
+            if device["last_seen_ms"] is None or timestamp_ms > device["last_seen_ms"]:
+                device["last_seen_ms"] = timestamp_ms
+
+    def record_issue(self, device_id, timestamp_ms):
+        with self._lock:
+            issues = self._issues.setdefault(device_id, deque())
+            # Issues normally arrive in order; keep the deque sorted if not
+            if issues and timestamp_ms < issues[-1]:
+                issues.insert(bisect.bisect(issues, timestamp_ms), timestamp_ms)
+            else:
+                issues.append(timestamp_ms)
+
+    def sweep(self, now_ms=None):
+        """Prune expired issues and update stale flags, logging changes."""
+        now_ms = now_ms or int(time.time() * 1000)
+        issue_cutoff = now_ms - HEALTH_ISSUE_WINDOW_SECONDS * 1000
+
+        with self._lock:
+            for issues in self._issues.values():
+                while issues and issues[0] < issue_cutoff:
+                    issues.popleft()
+
+            for device_id, device in self._devices.items():
+                stale = self._is_stale(device, now_ms)
+                if stale != device["stale"]:
+                    device["stale"] = stale
+                    if stale:
+                        logger.warning(
+                            f"Device {device['device_name']} ({device_id}) is stale"
+                        )
+                    else:
+                        logger.info(
+                            f"Device {device['device_name']} ({device_id}) recovered"
+                        )
+
+    @staticmethod
+    def _is_stale(device, now_ms):
+        if device["last_seen_ms"] is None:
+            return True
+        threshold_ms = stale_after_seconds(device["device_type"]) * 1000
+        return now_ms - device["last_seen_ms"] > threshold_ms
+
+    def summary(self, now_ms=None):
+        """Health of every tracked device, computed in one pass."""
+        now_ms = now_ms or int(time.time() * 1000)
+        issue_cutoff = now_ms - HEALTH_ISSUE_WINDOW_SECONDS * 1000
+
+        devices = []
+        with self._lock:
+            for device_id, device in self._devices.items():
+                last_seen_ms = device["last_seen_ms"]
+                issues = self._issues.get(device_id, ())
+                devices.append(
+                    {
+                        "device_name": device["device_name"],
+                        "device_id": device_id.split("#")[-1],
+                        "device_type": device["device_type"],
+                        "last_seen": (
+                            ms_to_timestamp(last_seen_ms) if last_seen_ms else None
+                        ),
+                        "age": (
+                            (now_ms - last_seen_ms) // 1000 if last_seen_ms else None
+                        ),
+                        "stale": self._is_stale(device, now_ms),
+                        "stale_after": stale_after_seconds(device["device_type"]),
+                        "recent_issues": len(issues)
+                        - bisect.bisect_left(issues, issue_cutoff),
+                    }
+                )
+
+        devices.sort(key=lambda device: device["device_name"] or "")
+        return {
+            "generated": ms_to_timestamp(now_ms),
+            "issue_window": HEALTH_ISSUE_WINDOW_SECONDS,
+            "counts": {
+                "total": len(devices),
+                "stale": sum(1 for device in devices if device["stale"]),
+                "never_seen": sum(1 for device in devices if not device["last_seen"]),
+                "with_issues": sum(1 for device in devices if device["recent_issues"]),
+            },
+            "devices": devices,
+        }
+
+    def _sweep_loop(self):
+        while not self._stop.wait(HEALTH_SWEEP_INTERVAL_SECONDS):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Error sweeping device health: {e}")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sweep_loop, name="device-health", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+_monitor = DeviceHealthMonitor()
+
+
+def get_health_monitor():
+    return _monitor
+
+
+def track_registered_device(device_info):
+    """Start tracking a newly registered device, which counts as never seen."""
+    _monitor.track_device(
+        device_info.get("DeviceID"),
+        device_info.get("DeviceName"),
+        device_info.get("DeviceType"),
+    )
+
+
+def forget_deleted_device(device_id):
+    _monitor.forget_device(device_id)
+
+
+def record_device_reading(device_info, timestamp_str):
+    """Mark a device as seen at the timestamp of a stored reading."""
+    try:
+        _monitor.record_reading(
+            device_info.get("DeviceID"),
+            device_info.get("DeviceName"),
+            device_info.get("DeviceType"),
+            timestamp_to_ms(timestamp_str),
+        )
+    except Exception as e:
+        logger.error(f"Error recording device health: {e}")
+
+
+def record_device_issue(device_info, timestamp_str):
+    """Count a stored PATIssues entry against its device."""
+    try:
+        _monitor.track_device(
+            device_info.get("DeviceID"),
+            device_info.get("DeviceName"),
+            device_info.get("DeviceType"),
+        )
+        _monitor.record_issue(
+            device_info.get("DeviceID"), timestamp_to_ms(timestamp_str)
+        )
+    except Exception as e:
+        logger.error(f"Error recording device issue: {e}")
+
+
+def warm_device_health(data_table, device_table, issue_table):
+    """Seed the monitor with every device, its latest reading and recent issues."""
+    now_ms = int(time.time() * 1000)
+    issue_cutoff = now_ms - HEALTH_ISSUE_WINDOW_SECONDS * 1000
+    low, high = ulid_bounds(issue_cutoff, now_ms)
+
+    devices = []
+    for device_type in HEALTH_STALE_SECONDS:
+        devices.extend(get_devices_info(device_table, device_type=device_type))
+
+    latest = get_latest_info_many(
+        data_table, [device.get("DeviceID") for device in devices]
+    )
+    issue_count = 0
+    for device in devices:
+        device_id = device.get("DeviceID")
+        _monitor.track_device(
+            device_id, device.get("DeviceName"), device.get("DeviceType")
+        )
+        if latest.get(device_id):
+            record_device_reading(device, latest[device_id]["Timestamp"])
+
+        # EventIDs are ULIDs, so recent issues are a keyed range on EventID
+        query_params = {
+            "KeyConditionExpression": Key("DeviceID").eq(device_id)
+            & Key("EventID").between(f"EVENT#{low}", f"EVENT#{high}"),
+            "ProjectionExpression": "#ts",
+            "ExpressionAttributeNames": {"#ts": "Timestamp"},
+        }
+        while True:
+            response = issue_table.query(**query_params)
+            for item in response.get("Items", []):
+                if item.get("Timestamp"):
+                    record_device_issue(device, item["Timestamp"])
+                    issue_count += 1
+            if not response.get("LastEvaluatedKey"):
+                break
+            query_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    _monitor.sweep(now_ms)
+    logger.info(
+        f"Warmed device health for {len(devices)} devices with {issue_count} recent issues"
+    )
@@ -0,0 +1,158 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from utils.response_utils import FastJSONResponse
+from constants.database import (
+    IDEMPOTENCY_MAX_KEYS,
+    IDEMPOTENCY_STORE_PATH,
+    IDEMPOTENCY_WINDOW,
+)
+
+logger = logging.getLogger("pat_api")
+
+_idempotency_cache = None
+
+
+class IdempotencyCache:
+    """Bounded dedup window for ingest idempotency keys.
+
+    Keys live in memory (LRU, at most max_keys, each expiring after window
+    seconds) and are appended to a small log file so the window survives a
+    restart. The log is compacted once it holds twice as many lines as live
+    keys.
+    """
+
+    def __init__(
+        self,
+        path=IDEMPOTENCY_STORE_PATH,
+        window=IDEMPOTENCY_WINDOW,
+        max_keys=IDEMPOTENCY_MAX_KEYS,
+    ):
+        self.path = path
+        self.window = window
+        self.max_keys = max_keys
+        self._keys = OrderedDict()
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._log_lines = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._load()
+        self._log = open(self.path, "a")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        now = time.time()
+        with open(self.path, "r") as f:
+            for line in f:
+                key, _, expires = line.rstrip("\n").rpartition(" ")
+                try:
+                    expires = float(expires)
+                except ValueError:
+                    continue
+                self._log_lines += 1
+                if key and expires > now:
+                    self._keys[key] = expires
+                    self._keys.move_to_end(key)
+        while len(self._keys) > self.max_keys:
+            self._keys.popitem(last=False)
+        logger.info(f"Loaded {len(self._keys)} idempotency keys from {self.path}")
+
+    def _expire(self, now):
+        while self._keys:
+            key, expires = next(iter(self._keys.items()))
+            if expires > now and len(self._keys) <= self.max_keys:
+                break
+            self._keys.popitem(last=False)
+
+    def seen(self, key):
+        """Return True if key was already written within the window."""
+        expires = self._keys.get(key)
+        return bool(expires and expires > time.time())
+
+    def claim(self, key):
+        """Reserve key for a write. Returns False if it was already seen."""
+        with self._lock:
+            now = time.time()
+            expires = self._keys.get(key)
+            if (expires and expires > now) or key in self._in_flight:
+                return False
+            self._in_flight.add(key)
+            return True
+
+    def release(self, key):
+        """Give up a claimed key after a failed write so a retry can proceed."""
+        if key is None:
+            return
+        with self._lock:
+            self._in_flight.discard(key)
+
+    def commit(self, key):
+        """Record a claimed key as written."""
+        with self._lock:
+            now = time.time()
+            expires = now + self.window
+            self._in_flight.discard(key)
+            self._keys[key] = expires
+            self._keys.move_to_end(key)
+            self._expire(now)
+
+            self._log.write(f"{key} {expires}\n")
+            self._log.flush()
+            self._log_lines += 1
+            if self._log_lines > 2 * max(len(self._keys), 1000):
+                self._compact()
+
+    def clear(self):
+        """Forget every key, e.g. once the readings they guarded are deleted."""
+        with self._lock:
+            self._keys.clear()
+            self._log.close()
+            self._log = open(self.path, "w")
+            self._log_lines = 0
+
+    def _compact(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            for key, expires in self._keys.items():
+                f.write(f"{key} {expires}\n")
+        self._log.close()
+        os.replace(tmp_path, self.path)
+        self._log = open(self.path, "a")
+        self._log_lines = len(self._keys)
+
+
+def get_idempotency_cache():
+    global _idempotency_cache
+    if _idempotency_cache is None:
+        _idempotency_cache = IdempotencyCache()
+    return _idempotency_cache
+
+
+def clear_idempotency_keys():
+    get_idempotency_cache().clear()
+
+
+def ingest_idempotency_key(header_key, device_name, timestamp, *values):
+    """Resolve the dedup key for an ingest request.
+
+    An explicit Idempotency-Key header wins. Otherwise, when the device sent
+    its own timestamp, the reading itself identifies a retry. Without either
+    there is nothing to dedup on and None is returned.
+    """
+    if header_key:
+        return f"{device_name}|key|{header_key}"
+    if timestamp:
+        return "|".join([device_name, timestamp, *(str(v) for v in values)])
+    return None
+
+
+def duplicate_response():
+    """Response for a retried reading that is already stored."""
+    return FastJSONResponse(
+        content={"message": "Data already added", "duplicate": True},
+        status_code=200,
+    )
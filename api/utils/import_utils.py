@@ -0,0 +1,300 @@
+import codecs
+import json
+import logging
+import re
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from boto3.dynamodb.table import BatchWriter
+from utils.air_packed_utils import pack_device
+from utils.cold_archive_utils import delete_cold_device
+from utils.issue_utils import rekey_legacy_issue
+from constants.database import (
+    DATA_TABLE,
+    DEVICE_TABLE,
+    ISSUE_TABLE,
+    AIR_PACKED_STORAGE,
+    IMPORT_WORKERS,
+    IMPORT_BATCH_SIZE,
+    IMPORT_PROGRESS_EVERY,
+)
+
+logger = logging.getLogger("pat_api")
+
+# Export sections and NDJSON "table" values -> PAT table
+IMPORT_TABLES = {
+    "devices": DEVICE_TABLE,
+    "data": DATA_TABLE,
+    "issues": ISSUE_TABLE,
+    DEVICE_TABLE: DEVICE_TABLE,
+    DATA_TABLE: DATA_TABLE,
+    ISSUE_TABLE: ISSUE_TABLE,
+}
+IMPORT_FORMATS = ("ndjson", "export")
+
+_SECTION_START = re.compile(r"\s*:\s*\[")
+_WHITESPACE = re.compile(r"\s*")
+
+
+def _parse_number(text):
+    """JSON numbers as DynamoDB accepts them: Decimal, or int when integral."""
+    number = Decimal(text)
+    return int(number) if number == number.to_integral_value() else number
+
+
+_decoder = json.JSONDecoder(parse_float=_parse_number)
+
+
+class NdjsonParser:
+    """Push parser for NDJSON lines of {"table": ..., "item": {...}}.
+
+    feed() takes body chunks as they arrive and yields (table, item) pairs
+    for every complete line; close() yields the last line.
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+
+    def _entry(self, line):
+        line = line.strip()
+        if not line:
+            return
+        entry = _decoder.decode(line)
+        table = IMPORT_TABLES.get(entry.get("table"))
+        if table is None:
+            raise ValueError(f"Unknown table: {entry.get('table')}")
+        yield table, entry.get("item")
+
+    def feed(self, chunk):
+        *lines, self._buffer = (self._buffer + self._text.decode(chunk)).split("\n")
+        for line in lines:
+            yield from self._entry(line)
+
+    def close(self):
+        yield from self._entry(self._buffer + self._text.decode(b"", final=True))
+        self._buffer = ""
+
+
+class ExportParser:
+    """Push parser for the /pat/database/all object of item arrays.
+
+    Items are decoded one at a time as the body arrives, so a large export
+    is never held in memory whole. Every top-level value must be an array
+    named in IMPORT_TABLES.
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._position = 0
+        self._state = "start"
+        self._table = None
+
+    def _parse(self, final):
+        buffer = self._buffer
+        while True:
+            position = _WHITESPACE.match(buffer, self._position).end()
+            self._position = position
+            if position == len(buffer):
+                break
+            char = buffer[position]
+
+            if self._state == "start":
+                if char != "{":
+                    raise ValueError("Export must be a JSON object")
+                self._state = "key"
+                self._position += 1
+            elif self._state == "end":
+                raise ValueError("Unexpected data after the export object")
+            elif char == ",":
+                self._position += 1
+            elif self._state == "key" and char == "}":
+                self._state = "end"
+                self._position += 1
+            elif self._state == "array" and char == "]":
+                self._state = "key"
+                self._position += 1
+            else:
+                try:
+                    value, end = _decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as e:
+                    if final:
+                        raise ValueError(f"Invalid export at offset {e.pos}: {e.msg}")
+                    break  # Wait for the rest of the value
+
+                if self._state == "array":
+                    self._position = end
+                    yield self._table, value
+                    continue
+
+                section = _SECTION_START.match(buffer, end)
+                if section is None:
+                    if not final and buffer[end:].strip() in ("", ":"):
+                        break
+                    raise ValueError(f"Expected an array of items for {value!r}")
+                self._table = (
+                    IMPORT_TABLES.get(value) if isinstance(value, str) else None
+                )
+                if self._table is None:
+                    raise ValueError(f"Unknown export section: {value}")
+                self._state = "array"
+                self._position = section.end()
+
+        self._buffer = buffer[self._position :]
+        self._position = 0
+
+    def feed(self, chunk):
+        self._buffer += self._text.decode(chunk)
+        yield from self._parse(final=False)
+
+    def close(self):
+        self._buffer += self._text.decode(b"", final=True)
+        yield from self._parse(final=True)
+        if self._state != "end":
+            raise ValueError("Export ended before the closing brace")
+
+
+def get_import_parser(import_format):
+    if import_format == "export":
+        return ExportParser()
+    return NdjsonParser()
+
+
+class BulkImporter:
+    """Write items to the PAT tables through parallel batch writers.
+
+    Items are grouped per table into batches of IMPORT_BATCH_SIZE. Each
+    batch is written by a worker thread with its own BatchWriter over the
+    table's thread-safe client, which sends 25-item batch_write_item calls
+    and re-sends unprocessed items. At most two batches per worker are
+    queued, so a large import streams rather than piling up in memory.
+    Items missing their table's key attributes are skipped and counted.
+    """
+
+    def __init__(
+        self,
+        tables,
+        workers=IMPORT_WORKERS,
+        batch_size=IMPORT_BATCH_SIZE,
+        progress=None,
+    ):
+        self._tables = tables  # PAT table name -> boto3 Table
+        self._key_names = {
+            name: [key["AttributeName"] for key in table.key_schema]
+            for name, table in tables.items()
+        }
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bulk-import"
+        )
+        self._batch_size = batch_size
+        self._max_in_flight = workers * 2
+        self._in_flight = deque()
+        self._pending = defaultdict(list)
+        self._progress = progress
+        self._reported = 0
+        self._start = time.perf_counter()
+        self.written = defaultdict(int)
+        self.skipped = defaultdict(int)
+        self.device_ids = defaultdict(set)  # Table name -> DeviceIDs submitted
+
+    def add(self, table_name, item):
+        key_names = self._key_names.get(table_name)
+        if (
+            key_names is None
+            or not isinstance(item, dict)
+            or any(name not in item for name in key_names)
+        ):
+            self.skipped[table_name] += 1
+            return
+
+        if table_name == ISSUE_TABLE:
+            # Issues from older exports are keyed by ULID as they are written
+            item = rekey_legacy_issue(item)
+        batch = self._pending[table_name]
+        batch.append(item)
+        if len(batch) >= self._batch_size:
+            self._submit(table_name)
+
+    def add_all(self, entries):
+        """add() every (table, item) pair, e.g. from a parser's feed()."""
+        for table_name, item in entries:
+            self.add(table_name, item)
+
+    def _write_batch(self, table_name, items):
+        table = self._tables[table_name]
+        with BatchWriter(
+            table.name,
+            table.meta.client,
+            overwrite_by_pkeys=self._key_names[table_name],
+        ) as batch:
+            for item in items:
+                batch.put_item(Item=item)
+        return len(items)
+
+    def _submit(self, table_name):
+        items = self._pending.pop(table_name, None)
+        if not items:
+            return
+        while len(self._in_flight) >= self._max_in_flight:
+            self._collect()
+        key_name = self._key_names[table_name][0]
+        self.device_ids[table_name].update(item[key_name] for item in items)
+        future = self._executor.submit(self._write_batch, table_name, items)
+        self._in_flight.append((table_name, future))
+
+    def _collect(self):
+        table_name, future = self._in_flight.popleft()
+        self.written[table_name] += future.result()
+
+        written = sum(self.written.values())
+        if written - self._reported >= IMPORT_PROGRESS_EVERY:
+            self._reported = written
+            summary = self.summary()
+            logger.info(
+                f"Imported {written} items ({summary['items_per_second']} items/s)"
+            )
+            if self._progress:
+                self._progress(summary)
+
+    def finish(self):
+        """Write the remaining partial batches and return the summary."""
+        try:
+            for table_name in list(self._pending):
+                self._submit(table_name)
+            while self._in_flight:
+                self._collect()
+        finally:
+            self.close()
+        return self.summary()
+
+    def close(self):
+        """Stop writing, counting the batches that completed before the stop."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        while self._in_flight:
+            table_name, future = self._in_flight.popleft()
+            if not future.cancelled() and future.exception() is None:
+                self.written[table_name] += future.result()
+
+    def summary(self):
+        elapsed = time.perf_counter() - self._start
+        written = sum(self.written.values())
+        return {
+            "written": dict(self.written),
+            "skipped": dict(self.skipped),
+            "elapsed": round(elapsed, 1),
+            "items_per_second": round(written / elapsed) if elapsed else 0,
+        }
+
+
+def refresh_derived_history(device_ids, packed_table=None):
+    """Bring stores derived from PATData up to date for imported devices.
+
+    Packed buckets are rebuilt when packed storage is enabled, and archived
+    days are dropped so the cold archiver rewrites them.
+    """
+    for device_id in device_ids:
+        delete_cold_device(device_id)
+        if AIR_PACKED_STORAGE:
+            pack_device(packed_table, device_id)
@@ -0,0 +1,248 @@
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+from constants.database import (
+    WRITE_BEHIND_FLUSH_INTERVAL,
+    WRITE_BEHIND_MAX_LAG,
+    WRITE_BEHIND_WAL_PATH,
+)
+
+logger = logging.getLogger("pat_api")
+
+_ingest_queue = None
+
+
+class IngestBacklogError(Exception):
+    """Raised when the write-behind queue is further behind than its max lag."""
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _load_wal(path):
+    """Read WAL entries from path, skipping a torn final line from a crash."""
+    items = []
+    if not os.path.exists(path):
+        return items
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                items.append(json.loads(line, parse_float=Decimal))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping torn WAL entry in {path}")
+    return items
+
+
+class WriteBehindQueue:
+    """Durable write-behind queue for PATData items.
+
+    Items are appended to a local write-ahead log and acknowledged
+    immediately; a background thread group-commits them to DynamoDB with
+    batch_write_item. On each flush the active WAL segment is rotated to a
+    ".flushing" segment that is removed once its items are written, so after
+    a crash both segments are replayed and nothing acknowledged is lost.
+
+    on_flushed, if given, is called with each batch once it is in DynamoDB,
+    for work that must not run before the items can be read back.
+    """
+
+    def __init__(
+        self,
+        table,
+        wal_path=WRITE_BEHIND_WAL_PATH,
+        flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+        max_lag=WRITE_BEHIND_MAX_LAG,
+        on_flushed=None,
+    ):
+        self.table = table
+        self.on_flushed = on_flushed
+        self.wal_path = wal_path
+        self.flushing_path = f"{wal_path}.flushing"
+        self.flush_interval = flush_interval
+        self.max_lag = max_lag
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Held for a whole flush
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pending = []
+        self._oldest_pending = None
+        self._inflight_since = None
+        self._thread = None
+
+        os.makedirs(os.path.dirname(wal_path) or ".", exist_ok=True)
+        self._wal = open(self.wal_path, "a")
+
+    def replay(self):
+        """Flush anything left in the WAL by a previous run."""
+        items = _load_wal(self.flushing_path) + _load_wal(self.wal_path)
+        if not items:
+            return 0
+        logger.info(f"Replaying {len(items)} WAL entries into {self.table.name}")
+        self._write_batch(items)
+        with self._lock:
+            self._wal.close()
+            self._wal = open(self.wal_path, "w")
+        if os.path.exists(self.flushing_path):
+            os.remove(self.flushing_path)
+        return len(items)
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._flush_loop, name="write-behind-flush", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"Write-behind ingest started (WAL: {self.wal_path}, "
+            f"flush interval: {self.flush_interval}s, max lag: {self.max_lag}s)"
+        )
+
+    def stop(self):
+        """Stop the flush thread after draining pending items."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+        self._flush()
+        self._wal.close()
+
+    def lag(self):
+        """Seconds the oldest item not yet in DynamoDB has been waiting."""
+        waiting = [t for t in (self._inflight_since, self._oldest_pending) if t]
+        return time.monotonic() - min(waiting) if waiting else 0.0
+
+    def append(self, item):
+        """Durably log an item for a later group commit."""
+        if self.lag() > self.max_lag:
+            raise IngestBacklogError(
+                f"Write-behind queue is {self.lag():.1f}s behind (max {self.max_lag}s)"
+            )
+        line = json.dumps(item, default=_json_default)
+        with self._lock:
+            self._wal.write(line + "\n")
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+            self._pending.append(item)
+            if self._oldest_pending is None:
+                self._oldest_pending = time.monotonic()
+            if len(self._pending) >= 25:
+                self._wake.set()
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self._flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed, will retry: {e}")
+                time.sleep(self.flush_interval)
+
+    @contextmanager
+    def discarding(self):
+        """Drop every item not yet written and hold off flushing meanwhile.
+
+        Waits for a flush in progress, then empties both WAL segments, so
+        queued readings never land in tables that are being reset. Yields
+        the number of items discarded; items appended inside the block are
+        kept and written afterwards.
+        """
+        with self._flush_lock:
+            discarded = 0
+            if os.path.exists(self.flushing_path):
+                discarded += len(_load_wal(self.flushing_path))
+                os.remove(self.flushing_path)
+            with self._lock:
+                discarded += len(self._pending)
+                self._pending = []
+                self._oldest_pending = None
+                self._inflight_since = None
+                self._wal.close()
+                self._wal = open(self.wal_path, "w")
+            yield discarded
+
+    def _flush(self):
+        with self._flush_lock:
+            self._flush_unlocked()
+
+    def _flush_unlocked(self):
+        # A failed flush leaves the .flushing segment behind; finish it first
+        if os.path.exists(self.flushing_path):
+            self._write_batch(_load_wal(self.flushing_path))
+            os.remove(self.flushing_path)
+            self._inflight_since = None
+
+        with self._lock:
+            if not self._pending:
+                return
+            items = self._pending
+            self._pending = []
+            self._inflight_since = self._oldest_pending
+            self._oldest_pending = None
+            self._wal.close()
+            os.replace(self.wal_path, self.flushing_path)
+            self._wal = open(self.wal_path, "a")
+
+        self._write_batch(items)
+        os.remove(self.flushing_path)
+        self._inflight_since = None
+        logger.debug(f"Flushed {len(items)} items to {self.table.name}")
+
+    def _write_batch(self, items):
+        """Write items with batch_write_item, 25 per request with retries."""
+        with self.table.batch_writer(
+            overwrite_by_pkeys=[k["AttributeName"] for k in self.table.key_schema]
+        ) as batch:
+            for item in items:
+                batch.put_item(Item=item)
+        if self.on_flushed and items:
+            try:
+                self.on_flushed(items)
+            except Exception as e:
+                logger.error(f"Write-behind flush callback failed: {e}")
+
+
+def start_ingest_queue(table, on_flushed=None):
+    """Create the process-wide write-behind queue, replay its WAL and start it."""
+    global _ingest_queue
+    queue = WriteBehindQueue(table, on_flushed=on_flushed)
+    queue.replay()
+    queue.start()
+    _ingest_queue = queue
+    return queue
+
+
+def stop_ingest_queue():
+    global _ingest_queue
+    if _ingest_queue:
+        _ingest_queue.stop()
+        _ingest_queue = None
+
+
+def get_ingest_queue():
+    return _ingest_queue
+
+
+@contextmanager
+def discarding_ingest_queue():
+    """WriteBehindQueue.discarding for the process-wide queue, if enabled."""
+    if _ingest_queue is None:
+        yield 0
+        return
+    with _ingest_queue.discarding() as discarded:
+        yield discarded
+
+
+def write_data_item(table, item):
+    """Write a PATData item, through the write-behind queue when it is enabled."""
+    if _ingest_queue is not None:
+        _ingest_queue.append(item)
+    else:
+        table.put_item(Item=item)
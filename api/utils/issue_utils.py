@@ -0,0 +1,466 @@
+import base64
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from utils.api_utils import ulid_bounds, generate_ulid_at
+from utils.time_utils import timestamp_to_ms
+from constants.database import (
+    ISSUE_COALESCE_WINDOW_SECONDS,
+    ISSUE_COALESCE_SWEEP_SECONDS,
+    ISSUE_RATE_BURST,
+    ISSUE_RATE_PER_MINUTE,
+)
+
+logger = logging.getLogger("pat_api")
+
+
+def encode_cursor(last_evaluated_key):
+    """Encode a LastEvaluatedKey as an opaque, URL-safe pagination cursor."""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, device_id=None):
+    """Decode a pagination cursor, raising ValueError if it is malformed.
+
+    When device_id is given, a cursor issued for another device is rejected.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(key, dict) or set(key) != {"DeviceID", "EventID"}:
+        raise ValueError("Invalid cursor")
+    if device_id is not None and key["DeviceID"] != device_id:
+        raise ValueError("Cursor belongs to another device")
+    return key
+
+
+def _issue_key_condition(device_id, start_ms=None, end_ms=None):
+    """Key condition for a device's issues, optionally limited to a time range.
+
+    Issue EventIDs are ULIDs, so a time range maps onto an EventID range and
+    is resolved by the key condition rather than a filter.
+    """
+    condition = Key("DeviceID").eq(device_id)
+    if start_ms is None and end_ms is None:
+        return condition
+
+    low, high = ulid_bounds(start_ms or 0, end_ms or (1 << 48) - 1)
+    return condition & Key("EventID").between(f"EVENT#{low}", f"EVENT#{high}")
+
+
+def format_issue(item):
+    """Format a PATIssues item for the API response."""
+    return {
+        "event_id": item.get("EventID", "").split("#")[-1],
+        "timestamp": item.get("Timestamp"),
+        "exception": item.get("Exception"),
+        "exception_message": item.get("ExceptionMessage"),
+        "count": int(item.get("IssueCount", 1)),
+        "last_seen": item.get("LastSeen", item.get("Timestamp")),
+    }
+
+
+def query_device_issues(
+    table,
+    device_id,
+    start_ms=None,
+    end_ms=None,
+    limit=50,
+    cursor=None,
+    newest_first=True,
+):
+    """Fetch one page of a device's issues.
+
+    Returns (issues, next_cursor); next_cursor is None on the last page.
+    """
+    query_params = {
+        "KeyConditionExpression": _issue_key_condition(device_id, start_ms, end_ms),
+        "ScanIndexForward": not newest_first,
+        "Limit": limit,
+    }
+    if cursor:
+        query_params["ExclusiveStartKey"] = decode_cursor(cursor, device_id)
+
+    try:
+        response = table.query(**query_params)
+        issues = [format_issue(item) for item in response.get("Items", [])]
+        return issues, encode_cursor(response.get("LastEvaluatedKey"))
+    except ClientError as e:
+        # A cursor outside the requested key range is rejected by DynamoDB
+        if cursor and e.response["Error"]["Code"] == "ValidationException":
+            raise ValueError(f"Invalid cursor: {e.response['Error']['Message']}")
+        logger.error(f"Error querying issues for device {device_id}: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Error querying issues for device {device_id}: {e}")
+        raise
+
+
+def count_device_issues(table, device_id, start_ms=None, end_ms=None):
+    """Count a device's issues grouped by exception type, across all pages."""
+    query_params = {
+        "KeyConditionExpression": _issue_key_condition(device_id, start_ms, end_ms),
+        "ProjectionExpression": "#exception, IssueCount",
+        "ExpressionAttributeNames": {"#exception": "Exception"},
+    }
+
+    try:
+        counts = Counter()
+        while True:
+            response = table.query(**query_params)
+            for item in response.get("Items", []):
+                counts[item.get("Exception", "Unknown")] += int(
+                    item.get("IssueCount", 1)
+                )
+
+            last_evaluated_key = response.get("LastEvaluatedKey")
+            if not last_evaluated_key:
+                break
+            query_params["ExclusiveStartKey"] = last_evaluated_key
+
+        return {"total": sum(counts.values()), "by_exception": dict(counts)}
+    except Exception as e:
+        logger.error(f"Error counting issues for device {device_id}: {e}")
+        raise
+
+
+def is_legacy_event_id(event_id):
+    """True for EventIDs written before issues were keyed by ULID.
+
+    Those are EVENT#<decimal of 64 random bits>, at most 20 digits, and
+    sort ahead of every ULID regardless of when the issue happened.
+    """
+    return len(event_id.split("#")[-1]) != 26
+
+
+def legacy_event_id_to_ulid(event_id, timestamp_ms):
+    """EVENT#<ULID> for a legacy EventID, placed at the issue's Timestamp.
+
+    The old random number becomes the ULID's random part, so the same item
+    always maps to the same new EventID.
+    """
+    randomness = int(event_id.split("#")[-1]) & ((1 << 80) - 1)
+    return f"EVENT#{generate_ulid_at(timestamp_ms, randomness)}"
+
+
+def rekey_legacy_issue(item):
+    """The issue item under its ULID EventID, or unchanged if already keyed.
+
+    Items whose Timestamp cannot be parsed are returned unchanged too.
+    """
+    if not is_legacy_event_id(item["EventID"]):
+        return item
+    try:
+        timestamp_ms = timestamp_to_ms(str(item.get("Timestamp")))
+    except ValueError:
+        return item
+    return {**item, "EventID": legacy_event_id_to_ulid(item["EventID"], timestamp_ms)}
+
+
+def migrate_legacy_issue_ids(table, dry_run=False):
+    """Re-key PATIssues items with legacy EventIDs onto time-ordered ULIDs.
+
+    Each item is moved in one transaction (put under the new key, delete
+    the old one), so a re-run or a concurrent run never duplicates or loses
+    an issue. Items whose Timestamp cannot be parsed keep their old key.
+    Returns (items migrated, items with unparseable Timestamps).
+    """
+    migrated = invalid = 0
+    scan_params = {}
+    while True:
+        response = table.scan(**scan_params)
+        for item in response.get("Items", []):
+            if not is_legacy_event_id(item["EventID"]):
+                continue
+            new_item = rekey_legacy_issue(item)
+            if new_item is item:
+                invalid += 1
+                logger.warning(
+                    f"Issue {item['EventID']} has an unparseable Timestamp, "
+                    f"keeping its EventID"
+                )
+                continue
+
+            if not dry_run:
+                try:
+                    table.meta.client.transact_write_items(
+                        TransactItems=[
+                            {
+                                "Put": {
+                                    "TableName": table.name,
+                                    "Item": new_item,
+                                    "ConditionExpression": "attribute_not_exists(EventID)",
+                                }
+                            },
+                            {
+                                "Delete": {
+                                    "TableName": table.name,
+                                    "Key": {
+                                        "DeviceID": item["DeviceID"],
+                                        "EventID": item["EventID"],
+                                    },
+                                    "ConditionExpression": "attribute_exists(EventID)",
+                                }
+                            },
+                        ]
+                    )
+                except ClientError as e:
+                    if e.response["Error"]["Code"] != "TransactionCanceledException":
+                        raise
+                    continue  # Moved by another run in the meantime
+            migrated += 1
+
+        last_evaluated_key = response.get("LastEvaluatedKey")
+        if not last_evaluated_key:
+            break
+        scan_params["ExclusiveStartKey"] = last_evaluated_key
+
+    if migrated:
+        logger.info(f"Migrated {migrated} issues to ULID EventIDs")
+    return migrated, invalid
+
+
+class TokenBucket:
+    """Per-key token bucket: `burst` tokens, refilled at `rate` per second."""
+
+    def __init__(self, burst, rate):
+        self.burst = burst
+        self.rate = rate
+        self._buckets = {}  # key -> [tokens, last refill monotonic time]
+
+    def take(self, key):
+        now = time.monotonic()
+        bucket = self._buckets.setdefault(key, [self.burst, now])
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] < 1:
+            return False
+        bucket[0] -= 1
+        return True
+
+
+class IssueCoalescer:
+    """Merge repeated identical issues into one PATIssues item per window.
+
+    The first report of an exception/message pair for a device inserts an
+    item; repeats within ISSUE_COALESCE_WINDOW_SECONDS add to its IssueCount
+    and move LastSeen. Every write draws from a per-device token bucket.
+    Without a token, a repeat is counted in memory and folded into the next
+    write, while a new issue is rejected. Once started, a background sweep
+    writes the repeats still deferred in expired windows, and stopping
+    writes those of every window. Open windows live in memory only, so
+    after a restart the next report starts a new item. A repeat whose item
+    has since been deleted starts a new item instead of recreating a
+    partial one.
+    """
+
+    def __init__(self):
+        self._open = {}  # (DeviceID, exception, message) -> window state
+        self._bucket = TokenBucket(ISSUE_RATE_BURST, ISSUE_RATE_PER_MINUTE / 60)
+        self._lock = threading.Lock()
+        self._table = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def clear(self, device_id=None):
+        """Forget open windows, for one device or all, after their items are deleted."""
+        with self._lock:
+            for key in list(self._open):
+                if device_id is None or key[0] == device_id:
+                    del self._open[key]
+
+    def _increment(self, table, device_id, event_id, increment, last_seen):
+        """Add to an existing item's IssueCount, raising if the item is gone."""
+        table.update_item(
+            Key={"DeviceID": device_id, "EventID": event_id},
+            UpdateExpression="ADD IssueCount :increment SET LastSeen = :last_seen",
+            ConditionExpression="attribute_exists(EventID)",
+            ExpressionAttributeValues={
+                ":increment": increment,
+                ":last_seen": last_seen,
+            },
+        )
+
+    def _flush_expired(self, table, device_id, window):
+        """Write the repeats deferred in a window that has been closed."""
+        try:
+            self._increment(
+                table,
+                device_id,
+                window["event_id"],
+                window["pending"],
+                window["last_seen"],
+            )
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass  # The item was deleted, and its count with it
+        except Exception as e:
+            logger.error(
+                f"Error flushing {window['pending']} deferred repeats of issue "
+                f"{window['event_id']}: {e}"
+            )
+
+    def sweep(self, table, flush_all=False):
+        """Close expired windows, or all of them, writing any deferred repeats.
+
+        Returns the number of windows whose repeats were written.
+        """
+        now = time.monotonic()
+        with self._lock:
+            closed = [
+                (key, window)
+                for key, window in self._open.items()
+                if flush_all or now - window["opened"] > ISSUE_COALESCE_WINDOW_SECONDS
+            ]
+            for key, _ in closed:
+                del self._open[key]
+
+        flushed = 0
+        for key, window in closed:
+            if window["pending"]:
+                self._flush_expired(table, key[0], window)
+                flushed += 1
+        return flushed
+
+    def _sweep_loop(self):
+        while not self._stop.wait(ISSUE_COALESCE_SWEEP_SECONDS):
+            try:
+                self.sweep(self._table)
+            except Exception as e:
+                logger.error(f"Error sweeping issue windows: {e}")
+
+    def start(self, table):
+        if self._thread and self._thread.is_alive():
+            return
+        self._table = table
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sweep_loop, name="issue-coalescer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the sweep and write the repeats deferred in every window."""
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self.sweep(self._table, flush_all=True)
+
+    def add(self, table, item):
+        """Store or coalesce an issue item.
+
+        Returns (status, count): status is 'created', 'coalesced',
+        'deferred' (counted, no write) or 'rate_limited' (dropped).
+        """
+        key = (
+            item.get("DeviceID"),
+            item.get("Exception"),
+            item.get("ExceptionMessage"),
+        )
+        now = time.monotonic()
+        expired = None
+
+        with self._lock:
+            window = self._open.get(key)
+            if window and now - window["opened"] > ISSUE_COALESCE_WINDOW_SECONDS:
+                del self._open[key]
+                if window["pending"]:
+                    expired = window
+                window = None
+
+            if not self._bucket.take(item.get("DeviceID")):
+                if not window:
+                    status = ("rate_limited", 0)
+                else:
+                    window["pending"] += 1
+                    window["count"] += 1
+                    window["last_seen"] = item.get("Timestamp")
+                    status = ("deferred", window["count"])
+            elif window:
+                increment = window["pending"] + 1
+                window["pending"] = 0
+                window["count"] += 1
+                count = window["count"]
+                status = None
+            else:
+                window = {
+                    "event_id": item["EventID"],
+                    "opened": now,
+                    "count": 1,
+                    "pending": 0,
+                    "last_seen": item.get("Timestamp"),
+                }
+                self._open[key] = window
+                increment = None
+                status = None
+
+        if expired:
+            self._flush_expired(table, item["DeviceID"], expired)
+        if status:
+            return status
+
+        if increment is None:
+            return self._create(table, key, item, window, 1)
+
+        try:
+            self._increment(
+                table,
+                item["DeviceID"],
+                window["event_id"],
+                increment,
+                item.get("Timestamp"),
+            )
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            # The item was deleted (device delete, reset or import); reopen
+            # the window on a new item rather than upserting a partial one
+            with self._lock:
+                window.update(event_id=item["EventID"], opened=now, count=increment)
+            return self._create(table, key, item, window, increment)
+        except Exception:
+            with self._lock:
+                window["pending"] += increment
+            raise
+        return "coalesced", count
+
+    def _create(self, table, key, item, window, count):
+        try:
+            table.put_item(
+                Item={
+                    **item,
+                    "IssueCount": count,
+                    "LastSeen": item.get("Timestamp"),
+                }
+            )
+        except Exception:
+            with self._lock:
+                if self._open.get(key) is window:
+                    del self._open[key]
+            raise
+        return "created", count
+
+
+_coalescer = IssueCoalescer()
+
+
+def get_issue_coalescer():
+    return _coalescer
+
+
+def clear_issue_windows(device_id=None):
+    """Forget open coalescing windows, see IssueCoalescer.clear."""
+    _coalescer.clear(device_id)
+
+
+def store_issue(table, item):
+    """Store an issue through the shared coalescer, see IssueCoalescer.add."""
+    return _coalescer.add(table, item)
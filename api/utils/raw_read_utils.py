@@ -0,0 +1,257 @@
+import boto3
+import logging
+import threading
+from utils.api_utils import projection_params
+from utils.time_utils import sort_key_bounds
+
+logger = logging.getLogger("pat_api")
+
+_raw_client = None
+_raw_client_lock = threading.Lock()
+
+
+def get_raw_client():
+    """Low-level DynamoDB client without the resource layer's type handlers.
+
+    Items come back in wire format ({"N": "12.3"}, {"S": "..."}), so the
+    read paths below convert numbers straight to floats instead of going
+    through Decimal first.
+    """
+    global _raw_client
+    with _raw_client_lock:
+        if _raw_client is None:
+            _raw_client = boto3.client(
+                "dynamodb",
+                region_name="us-west-2",
+                endpoint_url="http://localhost:8000",
+                aws_access_key_id="fakeAccessKey",
+                aws_secret_access_key="fakeSecretKey",
+            )
+        return _raw_client
+
+
+def _number(text):
+    """Wire-format number to int when integral, float otherwise."""
+    if "." in text or "e" in text or "E" in text:
+        return float(text)
+    return int(text)
+
+
+def deserialize_value(attribute):
+    """Convert one wire-format attribute value to a plain Python value."""
+    ((kind, value),) = attribute.items()
+    if kind == "S":
+        return value
+    if kind == "N":
+        return _number(value)
+    if kind == "BOOL":
+        return value
+    if kind == "NULL":
+        return None
+    if kind == "M":
+        return deserialize_item(value)
+    if kind == "L":
+        return [deserialize_value(element) for element in value]
+    if kind == "SS":
+        return list(value)
+    if kind == "NS":
+        return [_number(element) for element in value]
+    if kind == "B":
+        return value
+    if kind == "BS":
+        return list(value)
+    raise TypeError(f"Unknown DynamoDB attribute type: {kind}")
+
+
+def deserialize_item(item):
+    """Convert a wire-format item to a dict of floats, ints and plain strings."""
+    return {name: deserialize_value(attribute) for name, attribute in item.items()}
+
+
+def _float(item, name, default=0.0):
+    attribute = item.get(name)
+    return float(attribute["N"]) if attribute else default
+
+
+def _string(item, name, default=""):
+    attribute = item.get(name)
+    return attribute["S"] if attribute else default
+
+
+def _optional_string(item, name):
+    return _string(item, name, None)
+
+
+def _event_id(item, name):
+    return _string(item, name).split("#")[-1]
+
+
+# Response field -> (PATData attribute, converter); None is the device's own ID
+AIR_RECORD_FIELDS = {
+    "device_id": None,
+    "event_id": ("EventID", _event_id),
+    "timestamp": ("Timestamp", _string),
+    "pm25": ("PM25", _float),
+    "pm10": ("PM10", _float),
+}
+DOOR_RECORD_FIELDS = {
+    "device_id": None,
+    "event_id": ("EventID", _event_id),
+    "timestamp": ("Timestamp", _string),
+    "door_status": ("DoorStatus", _optional_string),
+    "battery": ("Battery", _float),
+}
+
+
+def record_projection(record_fields, fields):
+    """PATData attributes needed to build the selected record fields.
+
+    Timestamp is always read so that the projection is never empty.
+    """
+    attributes = [record_fields[name][0] for name in fields if record_fields[name]]
+    return list(dict.fromkeys(["Timestamp", *attributes]))
+
+
+def build_records(items, device_id, record_fields, fields):
+    """Build records holding only the selected fields from wire-format items."""
+    short_device_id = device_id.split("#")[-1]
+    selected = [(name, record_fields[name]) for name in fields]
+    return [
+        {
+            name: (short_device_id if source is None else source[1](item, source[0]))
+            for name, source in selected
+        }
+        for item in items
+    ]
+
+
+def query_device_items_raw(
+    table_name,
+    device_id,
+    projection=None,
+    newest_first=False,
+    limit=None,
+    start_ms=None,
+    end_ms=None,
+):
+    """Yield a device's PATData items in wire format, following pagination.
+
+    limit caps the total number of items returned. start_ms/end_ms restrict
+    the Timestamp key range, widened to whole seconds like query_device_range.
+    """
+    query_params = {
+        "TableName": table_name,
+        "KeyConditionExpression": "DeviceID = :device_id",
+        "ExpressionAttributeValues": {":device_id": {"S": device_id}},
+        "ScanIndexForward": not newest_first,
+    }
+    query_params.update(projection_params(projection))
+    if start_ms is not None or end_ms is not None:
+        low, high = sort_key_bounds(
+            start_ms if start_ms is not None else 0,
+            end_ms if end_ms is not None else (1 << 47),
+        )
+        query_params["KeyConditionExpression"] += " AND #ts BETWEEN :low AND :high"
+        query_params.setdefault("ExpressionAttributeNames", {})["#ts"] = "Timestamp"
+        query_params["ExpressionAttributeValues"].update(
+            {":low": {"S": low}, ":high": {"S": high}}
+        )
+    if limit:
+        query_params["Limit"] = limit
+
+    client = get_raw_client()
+    returned = 0
+    try:
+        while True:
+            response = client.query(**query_params)
+            for item in response.get("Items", []):
+                yield item
+                returned += 1
+
+            last_evaluated_key = response.get("LastEvaluatedKey")
+            if not last_evaluated_key or (limit and returned >= limit):
+                break
+            query_params["ExclusiveStartKey"] = last_evaluated_key
+    except Exception as e:
+        logger.error(f"Error querying raw items for device {device_id}: {e}")
+        raise
+
+
+def get_latest_item_raw(table_name, device_id, projection=None):
+    """Fetch the newest PATData item for a device, in wire format, or None."""
+    for item in query_device_items_raw(
+        table_name, device_id, projection=projection, newest_first=True, limit=1
+    ):
+        return item
+    return None
+
+
+def get_air_history(table_name, device_id, fields=None, start_ms=None, end_ms=None):
+    """All air readings for a device, oldest first, as response-ready records.
+
+    fields limits the records, and the attributes read, to AIR_RECORD_FIELDS
+    names. start_ms/end_ms limit the key range read.
+    """
+    if fields:
+        items = query_device_items_raw(
+            table_name,
+            device_id,
+            projection=record_projection(AIR_RECORD_FIELDS, fields),
+            start_ms=start_ms,
+            end_ms=end_ms,
+        )
+        return build_records(items, device_id, AIR_RECORD_FIELDS, fields)
+
+    short_device_id = device_id.split("#")[1]
+    items = query_device_items_raw(
+        table_name,
+        device_id,
+        projection=["EventID", "Timestamp", "PM25", "PM10"],
+        start_ms=start_ms,
+        end_ms=end_ms,
+    )
+    return [
+        {
+            "device_id": short_device_id,
+            "event_id": _string(item, "EventID").split("#")[1],
+            "timestamp": _string(item, "Timestamp"),
+            "pm25": _float(item, "PM25"),
+            "pm10": _float(item, "PM10"),
+        }
+        for item in items
+    ]
+
+
+def get_door_history(table_name, device_id, fields=None, start_ms=None, end_ms=None):
+    """All door readings for a device, oldest first, as response-ready records.
+
+    fields limits the records, and the attributes read, to DOOR_RECORD_FIELDS
+    names. start_ms/end_ms limit the key range read.
+    """
+    if fields:
+        items = query_device_items_raw(
+            table_name,
+            device_id,
+            projection=record_projection(DOOR_RECORD_FIELDS, fields),
+            start_ms=start_ms,
+            end_ms=end_ms,
+        )
+        return build_records(items, device_id, DOOR_RECORD_FIELDS, fields)
+
+    short_device_id = device_id.split("#")[-1]
+    items = query_device_items_raw(
+        table_name,
+        device_id,
+        projection=["Timestamp", "DoorStatus", "Battery"],
+        start_ms=start_ms,
+        end_ms=end_ms,
+    )
+    return [
+        {
+            "device_id": short_device_id,
+            "timestamp": _string(item, "Timestamp"),
+            "door_status": _string(item, "DoorStatus", None),
+            "battery": _float(item, "Battery"),
+        }
+        for item in items
+    ]
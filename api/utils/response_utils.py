@@ -0,0 +1,48 @@
+import json
+from decimal import Decimal
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+
+def _encode_default(value):
+    """Encode types the JSON encoder does not handle natively.
+
+    DynamoDB returns every number as a Decimal; they are written as floats,
+    matching what convert_decimals_to_floats produced.
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    """Serialize content to JSON bytes, encoding Decimals in the same pass."""
+    if orjson is not None:
+        return orjson.dumps(
+            content, default=_encode_default, option=orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(
+        content,
+        default=_encode_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that serializes DynamoDB items directly.
+
+    Decimals are encoded by the serializer itself, so responses built from
+    raw items do not need a recursive conversion pass first. Uses orjson
+    when it is installed and the stdlib encoder otherwise.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
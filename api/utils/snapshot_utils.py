@@ -0,0 +1,556 @@
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+from utils.raw_read_utils import get_raw_client
+from constants.database import (
+    DATA_TABLE,
+    DEVICE_TABLE,
+    ISSUE_TABLE,
+    AIR_PACKED_TABLE,
+    DYNAMODB_IN_MEMORY,
+    SNAPSHOT_PATH,
+    SNAPSHOT_INTERVAL_SECONDS,
+    SNAPSHOT_FULL_INTERVAL_SECONDS,
+    SNAPSHOT_KEEP,
+    SNAPSHOT_DELTA_MAX_KEYS,
+    SNAPSHOT_MIN_RETAINED,
+    SNAPSHOT_SHRINK_MIN_ITEMS,
+    SNAPSHOT_RESTORE_TIMEOUT,
+)
+
+logger = logging.getLogger("pat_api")
+
+SNAPSHOT_TABLES = (DEVICE_TABLE, DATA_TABLE, ISSUE_TABLE, AIR_PACKED_TABLE)
+SNAPSHOT_KEYS = {
+    DEVICE_TABLE: ("DeviceID", "DeviceName"),
+    DATA_TABLE: ("DeviceID", "Timestamp"),
+    ISSUE_TABLE: ("DeviceID", "EventID"),
+    AIR_PACKED_TABLE: ("DeviceID", "Bucket"),
+}
+BATCH_WRITE_SIZE = 25  # batch_write_item accepts up to 25 requests per call
+BATCH_GET_SIZE = 100  # batch_get_item accepts up to 100 keys per call
+
+
+class WriteJournal:
+    """Keys written to the PAT tables since the last snapshot.
+
+    Filled from the DynamoDB clients' after-call events (see
+    _journal_request), so every write this process makes is seen whichever
+    module makes it. A delta snapshot re-reads just these keys. Table
+    creates and drops, unreadable requests and more than
+    SNAPSHOT_DELTA_MAX_KEYS keys ask for a full snapshot instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._keys = {}  # Table name -> {key JSON: wire-format key}
+        self._size = 0
+        self._needs_full = False
+        self._deleted = False  # Something was deleted through the API
+
+    def add(self, writes):
+        with self._lock:
+            for table_name, key, deleted in writes:
+                self._deleted = self._deleted or deleted
+                if key is None:
+                    self._needs_full = True
+                    continue
+                if self._needs_full:
+                    continue
+                keys = self._keys.setdefault(table_name, {})
+                key_json = json.dumps(key, sort_keys=True)
+                if key_json not in keys:
+                    keys[key_json] = key
+                    self._size += 1
+            if self._size > SNAPSHOT_DELTA_MAX_KEYS:
+                self._keys, self._size, self._needs_full = {}, 0, True
+
+    def take(self):
+        """Return and clear (keys per table, needs full snapshot, deleted)."""
+        with self._lock:
+            taken = (
+                {name: list(keys.values()) for name, keys in self._keys.items()},
+                self._needs_full,
+                self._deleted,
+            )
+            self._reset()
+            return taken
+
+    def put_back(self, taken):
+        """Re-add what take() returned, after a snapshot failed."""
+        keys, needs_full, deleted = taken
+        self.add(
+            [
+                (name, key, False)
+                for name, table_keys in keys.items()
+                for key in table_keys
+            ]
+        )
+        with self._lock:
+            self._needs_full = self._needs_full or needs_full
+            self._deleted = self._deleted or deleted
+
+
+_journal = WriteJournal()
+
+
+def _item_key(table_name, item):
+    return {name: item[name] for name in SNAPSHOT_KEYS[table_name]}
+
+
+def _written_keys(operation, body):
+    """(table, key or None, deleted) for each item a write request touches.
+
+    A None key stands for a whole-table change.
+    """
+    if operation in ("CreateTable", "DeleteTable"):
+        return [(body["TableName"], None, operation == "DeleteTable")]
+    if operation == "PutItem":
+        return [(body["TableName"], _item_key(body["TableName"], body["Item"]), False)]
+    if operation in ("UpdateItem", "DeleteItem"):
+        return [(body["TableName"], body["Key"], operation == "DeleteItem")]
+
+    if operation == "BatchWriteItem":
+        requests = [
+            (table_name, request)
+            for table_name, table_requests in body["RequestItems"].items()
+            for request in table_requests
+        ]
+    else:  # TransactWriteItems
+        requests = [
+            (action["TableName"], {name: action})
+            for transact_item in body["TransactItems"]
+            for name, action in transact_item.items()
+            if name != "ConditionCheck"
+        ]
+
+    writes = []
+    for table_name, request in requests:
+        if table_name not in SNAPSHOT_KEYS:
+            continue
+        for name, action in request.items():
+            if "Item" in action:
+                writes.append(
+                    (table_name, _item_key(table_name, action["Item"]), False)
+                )
+            else:
+                writes.append((table_name, action["Key"], name.startswith("Delete")))
+    return writes
+
+
+WRITE_OPERATIONS = (
+    "PutItem",
+    "UpdateItem",
+    "DeleteItem",
+    "BatchWriteItem",
+    "TransactWriteItems",
+    "CreateTable",
+    "DeleteTable",
+)
+
+
+def _journal_request(params, context, model, **kwargs):
+    if model.name not in WRITE_OPERATIONS:
+        return
+    try:
+        writes = _written_keys(model.name, json.loads(params["body"]))
+    except Exception as e:
+        logger.warning(f"Could not read {model.name} request for snapshots: {e}")
+        writes = [(None, None, False)]
+    context["pat_snapshot_writes"] = [
+        write for write in writes if write[0] in SNAPSHOT_KEYS or write[0] is None
+    ]
+
+
+def _journal_response(http_response, context, **kwargs):
+    # Recorded once the write has been applied, so a snapshot taken after
+    # the journal is emptied always reads it back
+    writes = context.pop("pat_snapshot_writes", None)
+    if writes and http_response.status_code < 300:
+        _journal.add(writes)
+
+
+def _journal_marker(**kwargs):
+    return True
+
+
+def register_write_journal(session):
+    """Journal the DynamoDB writes of clients created from session afterwards.
+
+    Clients copy their session's handlers when they are created, so any
+    session that builds PAT clients must be registered before it does. A
+    no-op unless DynamoDB Local runs in memory.
+    """
+    if not DYNAMODB_IN_MEMORY:
+        return
+    session.events.register(
+        "before-call.dynamodb", _journal_request, unique_id="pat-snapshot-request"
+    )
+    session.events.register(
+        "after-call.dynamodb", _journal_response, unique_id="pat-snapshot-response"
+    )
+    session.events.register(
+        "pat-write-journal.dynamodb", _journal_marker, unique_id="pat-snapshot-marker"
+    )
+
+
+def is_write_journaled(resource):
+    """Whether writes through a DynamoDB resource or client reach the journal."""
+    client = getattr(resource.meta, "client", resource)
+    responses = client.meta.events.emit("pat-write-journal.dynamodb")
+    return any(response for _, response in responses)
+
+
+# boto3.client and boto3.resource build on the default session;
+# initialize_dynamodb registers the session it creates itself
+register_write_journal(boto3._get_default_session())
+
+
+def list_snapshots():
+    """Full and delta snapshot file paths, oldest first."""
+    try:
+        names = os.listdir(SNAPSHOT_PATH)
+    except FileNotFoundError:
+        return []
+    return [
+        os.path.join(SNAPSHOT_PATH, name)
+        for name in sorted(names)
+        if name.startswith("snapshot-") and name.endswith(".jsonl.gz")
+    ]
+
+
+def is_delta_snapshot(path):
+    return path.endswith("-delta.jsonl.gz")
+
+
+def _prune_snapshots():
+    """Keep the newest SNAPSHOT_KEEP full snapshots and the deltas after them.
+
+    Only complete snapshots ever get their final name, so the newest full
+    snapshot is never pruned.
+    """
+    snapshots = list_snapshots()
+    full = [path for path in snapshots if not is_delta_snapshot(path)]
+    if len(full) <= SNAPSHOT_KEEP:
+        return
+    oldest_kept = full[-SNAPSHOT_KEEP]
+    for path in snapshots[: snapshots.index(oldest_kept)]:
+        os.remove(path)
+
+
+def _snapshot_path(kind):
+    now = time.time()
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now))
+    return os.path.join(
+        SNAPSHOT_PATH, f"snapshot-{stamp}{int(now * 1000) % 1000:03d}Z-{kind}.jsonl.gz"
+    )
+
+
+def table_item_counts(client=None):
+    """DescribeTable ItemCount per PAT table, raising if any table is missing."""
+    client = client or get_raw_client()
+    counts = {}
+    for table_name in SNAPSHOT_TABLES:
+        try:
+            description = client.describe_table(TableName=table_name)["Table"]
+        except client.exceptions.ResourceNotFoundException:
+            raise RuntimeError(f"Table '{table_name}' is missing, not snapshotting")
+        counts[table_name] = description.get("ItemCount", 0)
+    return counts
+
+
+def check_snapshot_counts(counts, previous_counts):
+    """Raise if a table has lost most of its items since the last snapshot.
+
+    That is what a restarted in-memory DynamoDB Local looks like once its
+    tables have been recreated empty, and snapshotting it would replace
+    the good snapshots with an empty one.
+    """
+    for table_name, previous in (previous_counts or {}).items():
+        count = counts.get(table_name, 0)
+        if previous >= SNAPSHOT_SHRINK_MIN_ITEMS and count < previous * (
+            SNAPSHOT_MIN_RETAINED
+        ):
+            raise RuntimeError(
+                f"Table '{table_name}' dropped from {previous} to {count} items, "
+                f"not snapshotting"
+            )
+
+
+def write_snapshot(client=None, previous_counts=None):
+    """Export every PAT table to a new gzip'd JSON-lines full snapshot.
+
+    Each table is a {"table": ...} line holding its name and key schema,
+    followed by one {"item": ...} line per item in DynamoDB wire format, so
+    a restore writes items back without converting them. Refuses (raising
+    RuntimeError) when a table is missing or, given the counts of the last
+    snapshot, has lost most of its items. Returns the path and the item
+    count per table.
+    """
+    client = client or get_raw_client()
+    check_snapshot_counts(table_item_counts(client), previous_counts)
+    os.makedirs(SNAPSHOT_PATH, exist_ok=True)
+    path = _snapshot_path("full")
+
+    counts = {}
+    with gzip.open(f"{path}.tmp", "wt", compresslevel=6) as file:
+        for table_name in SNAPSHOT_TABLES:
+            description = client.describe_table(TableName=table_name)["Table"]
+            header = {
+                "name": table_name,
+                "KeySchema": description["KeySchema"],
+                "AttributeDefinitions": description["AttributeDefinitions"],
+            }
+            file.write(json.dumps({"table": header}) + "\n")
+
+            count = 0
+            scan_params = {"TableName": table_name}
+            while True:
+                response = client.scan(**scan_params)
+                for item in response.get("Items", []):
+                    file.write(json.dumps({"item": item}) + "\n")
+                    count += 1
+
+                last_evaluated_key = response.get("LastEvaluatedKey")
+                if not last_evaluated_key:
+                    break
+                scan_params["ExclusiveStartKey"] = last_evaluated_key
+            counts[table_name] = count
+
+    os.replace(f"{path}.tmp", path)
+    _prune_snapshots()
+    return path, counts
+
+
+def write_delta_snapshot(keys, client=None):
+    """Write the current state of the given keys as a delta snapshot.
+
+    keys maps table names to wire-format keys. Each is read back with
+    batch_get_item and written as an {"item": ...} line, or as a
+    {"delete": key} line when it no longer exists. A missing table raises
+    before anything is written. Returns the path and the line count per
+    table.
+    """
+    client = client or get_raw_client()
+    os.makedirs(SNAPSHOT_PATH, exist_ok=True)
+    path = _snapshot_path("delta")
+
+    counts = {}
+    with gzip.open(f"{path}.tmp", "wt", compresslevel=6) as file:
+        for table_name, table_keys in keys.items():
+            file.write(json.dumps({"table": {"name": table_name}}) + "\n")
+            key_names = SNAPSHOT_KEYS[table_name]
+            for i in range(0, len(table_keys), BATCH_GET_SIZE):
+                batch = table_keys[i : i + BATCH_GET_SIZE]
+                found = {}
+                request = {table_name: {"Keys": batch}}
+                while request:
+                    response = client.batch_get_item(RequestItems=request)
+                    for item in response.get("Responses", {}).get(table_name, []):
+                        found[
+                            json.dumps(_item_key(table_name, item), sort_keys=True)
+                        ] = item
+                    request = response.get("UnprocessedKeys")
+
+                for key in batch:
+                    key = {name: key[name] for name in key_names}
+                    item = found.get(json.dumps(key, sort_keys=True))
+                    entry = {"item": item} if item else {"delete": key}
+                    file.write(json.dumps(entry) + "\n")
+            counts[table_name] = len(table_keys)
+
+    os.replace(f"{path}.tmp", path)
+    _prune_snapshots()
+    return path, counts
+
+
+def _batch_write(client, table_name, requests):
+    while requests:
+        response = client.batch_write_item(RequestItems={table_name: requests})
+        requests = response.get("UnprocessedItems", {}).get(table_name, [])
+
+
+def wait_for_dynamodb_local(client=None, timeout=SNAPSHOT_RESTORE_TIMEOUT):
+    """Block until DynamoDB Local answers requests, as it starts asynchronously."""
+    client = client or get_raw_client()
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return client.list_tables(Limit=1)
+        except (BotoCoreError, ClientError) as e:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"DynamoDB Local did not start: {e}")
+            time.sleep(0.5)
+
+
+def restore_snapshot(path=None, client=None):
+    """Recreate missing tables from the newest full snapshot and its deltas.
+
+    path picks a full snapshot instead of the newest one; the deltas
+    written after it are applied in order either way. Tables that already
+    exist are left untouched, so restarting the API against a DynamoDB
+    Local that is still running never replaces live data. Returns the item
+    count per restored table in the full snapshot.
+    """
+    client = client or get_raw_client()
+    snapshots = list_snapshots()
+    full = [snapshot for snapshot in snapshots if not is_delta_snapshot(snapshot)]
+    path = path or (full or [None])[-1]
+    if not path:
+        logger.info("No DynamoDB snapshot found, starting with empty tables.")
+        return {}
+    chain = [path] + [
+        snapshot
+        for snapshot in snapshots
+        if snapshot > path and is_delta_snapshot(snapshot)
+    ]
+
+    wait_for_dynamodb_local(client)
+    existing = set(client.list_tables()["TableNames"])
+    logger.info(
+        f"Restoring DynamoDB tables from snapshot {path} + {len(chain) - 1} deltas"
+    )
+
+    counts = {}
+    for snapshot in chain:
+        table_name = None
+        batch = []
+        with gzip.open(snapshot, "rt") as file:
+            for line in file:
+                entry = json.loads(line)
+                if "table" in entry:
+                    if batch:
+                        _batch_write(client, table_name, batch)
+                        batch = []
+                    header = entry["table"]
+                    table_name = header["name"]
+                    if snapshot != path:
+                        # Deltas only apply to tables this restore created
+                        table_name = table_name if table_name in counts else None
+                        continue
+                    if table_name in existing:
+                        logger.info(f"Table '{table_name}' exists, not restoring it.")
+                        table_name = None
+                        continue
+                    client.create_table(
+                        TableName=table_name,
+                        KeySchema=header["KeySchema"],
+                        AttributeDefinitions=header["AttributeDefinitions"],
+                        BillingMode="PAY_PER_REQUEST",
+                    )
+                    client.get_waiter("table_exists").wait(TableName=table_name)
+                    counts[table_name] = 0
+                elif table_name:
+                    if "item" in entry:
+                        batch.append({"PutRequest": {"Item": entry["item"]}})
+                        if snapshot == path:
+                            counts[table_name] += 1
+                    else:
+                        batch.append({"DeleteRequest": {"Key": entry["delete"]}})
+                    if len(batch) == BATCH_WRITE_SIZE:
+                        _batch_write(client, table_name, batch)
+                        batch = []
+        if batch:
+            _batch_write(client, table_name, batch)
+
+    logger.info(f"Restored DynamoDB snapshot: {counts}")
+    return counts
+
+
+class SnapshotWriter:
+    """Background job persisting in-memory DynamoDB Local to SNAPSHOT_PATH.
+
+    Every SNAPSHOT_INTERVAL_SECONDS the items written since the previous
+    snapshot are re-read and written as a delta file, typically a few
+    readings per device; nothing is written when nothing changed. A full
+    snapshot rewrites every table, the whole database, so it is only taken
+    on the first run after startup, every SNAPSHOT_FULL_INTERVAL_SECONDS,
+    and after table resets or very large imports. Writes made by other
+    processes, such as the migrations, are only captured by full
+    snapshots. Stopping writes one last snapshot.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_full = None  # Monotonic time of the last full snapshot
+        self._counts = None  # Item counts when the last full snapshot was taken
+        self._full_only = False  # Writes are not journaled, so deltas would miss them
+
+    def snapshot(self):
+        start = time.perf_counter()
+        taken = _journal.take()
+        keys, needs_full, deleted = taken
+        full = (
+            needs_full
+            or self._full_only
+            or self._last_full is None
+            or time.monotonic() - self._last_full >= SNAPSHOT_FULL_INTERVAL_SECONDS
+        )
+        if not full and not keys:
+            return None
+
+        try:
+            if full:
+                # Deletes made through the API explain a shrinking table
+                path, counts = write_snapshot(
+                    previous_counts=None if deleted else self._counts
+                )
+                self._last_full, self._counts = time.monotonic(), counts
+            else:
+                path, counts = write_delta_snapshot(keys)
+        except Exception as e:
+            _journal.put_back(taken)
+            logger.error(f"Error writing DynamoDB snapshot: {e}")
+            return None
+        logger.info(
+            f"Wrote {'full' if full else 'delta'} DynamoDB snapshot {path} "
+            f"({sum(counts.values())} items) in {time.perf_counter() - start:.1f}s"
+        )
+        return path
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(SNAPSHOT_INTERVAL_SECONDS):
+            self.snapshot()
+
+    def start(self, dynamodb=None):
+        """Start snapshotting; dynamodb is the resource the API writes through."""
+        if self._thread and self._thread.is_alive():
+            return
+        if dynamodb is not None and not is_write_journaled(dynamodb):
+            logger.error(
+                "DynamoDB writes are not journaled, taking only full snapshots."
+            )
+            self._full_only = True
+        try:
+            self._counts = table_item_counts()
+        except Exception as e:
+            logger.error(f"Error reading DynamoDB table sizes: {e}")
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._snapshot_loop, name="dynamodb-snapshot", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self.snapshot()
+
+
+_writer = SnapshotWriter()
+
+
+def get_snapshot_writer():
+    return _writer
@@ -1,4 +1,13 @@
-from datetime import datetime, timezone
+import threading
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+
+# Recent sort-key milliseconds per device, used to keep same-second events apart
+_RECENT_SORT_KEYS = 256
+_recent_sort_keys = defaultdict(lambda: deque(maxlen=_RECENT_SORT_KEYS))
+_sort_key_lock = threading.Lock()
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 
 def get_current_utc_datetime():
@@ -6,3 +15,88 @@ def get_current_utc_datetime():
     Returns the current datetime in UTC formatted as an ISO 8601 string.
     """
     return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_utc_timestamp(timestamp_str: str) -> datetime:
+    """
+    Parses an ISO 8601 timestamp into an aware UTC datetime.
+
+    Accepts the API's own 'YYYY-MM-DDTHH:MM:SSZ', millisecond sort keys
+    ('YYYY-MM-DDTHH:MM:SS.fffZ') and isoformat() output with '+00:00' or
+    microseconds as sent by some devices. Naive timestamps are taken as UTC.
+    """
+    if timestamp_str.endswith("Z"):
+        timestamp_str = timestamp_str[:-1] + "+00:00"
+    timestamp = datetime.fromisoformat(timestamp_str)
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+def format_sort_timestamp(timestamp: datetime) -> str:
+    """
+    Formats a datetime as a millisecond-precision sort key, 'YYYY-MM-DDTHH:MM:SS.fffZ'.
+    """
+    return (
+        timestamp.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.")
+        + f"{timestamp.microsecond // 1000:03d}Z"
+    )
+
+
+def unique_sort_ms(device_id: str, timestamp_ms: int = None) -> int:
+    """
+    Returns collision-free epoch milliseconds for a device's next event.
+
+    PATData items are keyed by device and time, so two events for one
+    device in the same millisecond would overwrite each other. timestamp_ms
+    (now if not given) is returned as is unless it was already handed out
+    for the device, in which case it is bumped by 1 ms until free. Only the
+    last _RECENT_SORT_KEYS values per device are remembered. Callers format
+    the result with ms_to_timestamp for the Timestamp key and store it as
+    EpochMs.
+    """
+    if timestamp_ms is None:
+        timestamp_ms = (datetime.now(timezone.utc) - EPOCH) // timedelta(milliseconds=1)
+
+    with _sort_key_lock:
+        recent = _recent_sort_keys[device_id]
+        while timestamp_ms in recent:
+            timestamp_ms += 1
+        recent.append(timestamp_ms)
+
+    return timestamp_ms
+
+
+def timestamp_to_ms(timestamp_str: str) -> int:
+    """
+    Converts an ISO 8601 timestamp to integer epoch milliseconds.
+    """
+    return (parse_utc_timestamp(timestamp_str) - EPOCH) // timedelta(milliseconds=1)
+
+
+def ms_to_timestamp(millis: int) -> str:
+    """
+    Converts epoch milliseconds to a millisecond-precision sort key.
+    """
+    return format_sort_timestamp(EPOCH + timedelta(milliseconds=millis))
+
+
+def sort_key_bounds(start_ms: int, end_ms: int) -> tuple[str, str]:
+    """
+    Returns Timestamp key bounds covering start_ms..end_ms in every stored format.
+
+    Older items carry second-resolution ('...SSZ') or device-formatted
+    ('...SS.ffffff+00:00') keys, which sort around the millisecond keys of
+    the same second. The bounds are widened to whole seconds so that none
+    are missed; callers filter exactly on item_epoch_ms.
+    """
+    return ms_to_timestamp(start_ms)[:19], ms_to_timestamp(end_ms)[:19] + "Z"
+
+
+def item_epoch_ms(item) -> int:
+    """
+    Returns a PATData item's epoch milliseconds, from EpochMs when it is stored.
+    """
+    if item.get("EpochMs") is not None:
+        return int(item["EpochMs"])
+    return timestamp_to_ms(item["Timestamp"])
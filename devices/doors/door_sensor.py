@@ -5,6 +5,8 @@ import os
 import json
 import requests
 import argparse
+import queue
+import threading
 from datetime import datetime, timezone
 
 # Configure logging
@@ -34,6 +36,8 @@ device_id = config.get("device_id", "default_door_sensor")
 server_url = config.get("server_url", "http://pat.local:5000")
 GPIO_PIN = config.get("gpio_pin", 11)
 POLL_INTERVAL = config.get("poll_interval", 0.5)
+DEBOUNCE_MS = config.get("debounce_ms", 50)
+SETTLE_WINDOW = config.get("settle_window", 0.25)
 
 logging.info(
     f"Starting Door Sensor with Device ID: {device_id}, GPIO Pin: {GPIO_PIN}, Server URL: {server_url}"
@@ -41,20 +45,34 @@ logging.info(
 
 
 class DoorSensor:
-    def __init__(self, pin, poll_interval, debug=False):
+    def __init__(
+        self,
+        pin,
+        poll_interval,
+        debug=False,
+        debounce_ms=DEBOUNCE_MS,
+        settle_window=SETTLE_WINDOW,
+    ):
         self.pin = pin
         self.poll_interval = poll_interval
         self.current_state = None
         self.debug = debug
+        self.debounce_ms = debounce_ms
+        self.settle_window = settle_window
+
+        # Interrupt mode state
+        self._edge_event = threading.Event()
+        self._last_edge = 0.0
+        self._send_queue = queue.Queue()
 
         GPIO.setmode(GPIO.BOARD)
         GPIO.setup(self.pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
         logging.info(f"Magnetic sensor initialized on GPIO pin {self.pin}.")
 
-    def send_state(self, state):
+    def send_state(self, state, timestamp=None):
         payload = {
             "device_id": device_id,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": timestamp or datetime.now(timezone.utc).isoformat(),
             "door_status": "CLOSED" if state == GPIO.LOW else "OPEN",
             "battery": 100,
         }
@@ -91,6 +109,80 @@ class DoorSensor:
             GPIO.cleanup()
             logging.info("GPIO cleanup complete. Program terminated.")
 
+    def _on_edge(self, channel):
+        """GPIO callback: record the edge and wake the settle loop."""
+        self._last_edge = time.monotonic()
+        self._edge_event.set()
+
+    def _send_worker(self):
+        """Send queued state changes so a slow POST never blocks detection."""
+        while True:
+            state, timestamp = self._send_queue.get()
+            try:
+                self.send_state(state, timestamp)
+            except Exception as e:
+                logging.error(f"Unexpected error sending state: {e}")
+            finally:
+                self._send_queue.task_done()
+
+    def _wait_for_settle(self):
+        """Block until no edge has been seen for settle_window seconds."""
+        while True:
+            remaining = self.settle_window - (time.monotonic() - self._last_edge)
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def run_interrupt(self):
+        """Edge-triggered monitoring.
+
+        Edges are debounced by RPi.GPIO (bouncetime), then any burst of
+        open/close bounces is coalesced into the final state once the pin has
+        been quiet for settle_window seconds.
+        """
+        try:
+            logging.info(
+                f"Starting interrupt-driven sensor monitoring "
+                f"(debounce: {self.debounce_ms}ms, settle window: {self.settle_window}s)..."
+            )
+            threading.Thread(target=self._send_worker, daemon=True).start()
+
+            # Report the initial state so the server is in sync at startup
+            self.current_state = GPIO.input(self.pin)
+            self._send_queue.put(
+                (self.current_state, datetime.now(timezone.utc).isoformat())
+            )
+
+            GPIO.add_event_detect(
+                self.pin,
+                GPIO.BOTH,
+                callback=self._on_edge,
+                bouncetime=self.debounce_ms,
+            )
+
+            while True:
+                # Wait with a timeout so KeyboardInterrupt is still delivered
+                if not self._edge_event.wait(timeout=1):
+                    continue
+                self._edge_event.clear()
+                self._wait_for_settle()
+
+                state = GPIO.input(self.pin)
+                if state != self.current_state:
+                    self.current_state = state
+                    state_str = "CLOSED" if state == GPIO.LOW else "OPEN"
+                    logging.info(f"Door is {state_str}.")
+                    self._send_queue.put(
+                        (state, datetime.now(timezone.utc).isoformat())
+                    )
+                else:
+                    logging.debug("Edge burst settled back to the previous state.")
+        except KeyboardInterrupt:
+            logging.info("Keyboard interrupt detected. Exiting...")
+        finally:
+            GPIO.cleanup()
+            logging.info("GPIO cleanup complete. Program terminated.")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Door Sensor Logger")
@@ -99,7 +191,15 @@ if __name__ == "__main__":
         action="store_true",
         help="Enable debug mode to print payload instead of sending data",
     )
+    parser.add_argument(
+        "--interrupt",
+        action="store_true",
+        help="Use edge-triggered GPIO interrupts instead of polling",
+    )
     args = parser.parse_args()
 
     sensor = DoorSensor(pin=GPIO_PIN, poll_interval=POLL_INTERVAL, debug=args.debug)
-    sensor.run()
+    if args.interrupt or config.get("mode") == "interrupt":
+        sensor.run_interrupt()
+    else:
+        sensor.run()
@@ -5,6 +5,8 @@ import urequests as requests
 import time
 import gc
 import sys
+import socket
+from array import array
 
 # Load configuration from file
 CONFIG_FILE = "door_config.json"
@@ -14,9 +16,13 @@ WATCHDOG_TIMEOUT = 8  # Reset if no activity for 8 seconds (max allowed is ~8.4s
 MEMORY_CHECK_INTERVAL = 30  # Check memory every 30 seconds
 MIN_FREE_MEMORY = 50000  # Reboot if free memory below 50KB
 RESTART_INTERVAL = 43200  # Restart device every 12 hours (in seconds)
-REQUEST_TIMEOUT = 10  # HTTP request timeout in seconds
+REQUEST_TIMEOUT = 5  # HTTP timeout per socket operation, below WATCHDOG_TIMEOUT
 CONSECUTIVE_FAILURES_LIMIT = 10  # Reboot after 10 consecutive failures
 
+# IRQ mode configuration
+EVENT_QUEUE_SIZE = 32  # Transitions buffered while a send is in flight
+WDT_FEED_INTERVAL_MS = 4000  # Wake at least this often to feed the watchdog
+
 # Initialize watchdog
 wdt = machine.WDT(timeout=WATCHDOG_TIMEOUT * 1000)  # Convert to milliseconds
 
@@ -28,8 +34,16 @@ Config file format:
     "wifi_password": "wifi_password",
     "server_url": "http://pat.local:5000",
     "gpio_pin": 16,
-    "poll_interval": 0.5
+    "poll_interval": 0.5,
+    "mode": "poll",
+    "debounce_ms": 50,
+    "settle_ms": 200,
+    "use_lightsleep": false,
+    "wifi_powersave": false
 }
+
+"mode" is "poll" (default) or "irq". IRQ mode is configured with
+"debounce_ms", "settle_ms", "use_lightsleep" and "wifi_powersave".
 """
 
 try:
@@ -45,6 +59,11 @@ wifi_password = config.get("wifi_password", "your_wifi_password")
 server_url = config.get("server_url", "http://pat.local:5000")
 GPIO_PIN = config.get("gpio_pin", 16)
 POLL_INTERVAL = config.get("poll_interval", 0.5)
+MODE = config.get("mode", "poll")
+DEBOUNCE_MS = config.get("debounce_ms", 50)
+SETTLE_MS = config.get("settle_ms", 200)
+USE_LIGHTSLEEP = config.get("use_lightsleep", False)
+WIFI_POWERSAVE = config.get("wifi_powersave", False)
 
 # Runtime tracking
 start_time = time.time()
@@ -57,23 +76,145 @@ print(
 
 
 # Connect to Wi-Fi
-def connect_wifi():
+def connect_wifi(reset_on_failure=True):
+    """Connect to Wi-Fi, feeding the watchdog while waiting.
+
+    On failure the device restarts, unless reset_on_failure is False; the
+    IRQ loop then keeps its queued transitions and tries again later.
+    """
     wlan = network.WLAN(network.STA_IF)
     wlan.active(True)
     wlan.connect(wifi_ssid, wifi_password)
 
     print(f"Connecting to Wi-Fi: {wifi_ssid}")
     for _ in range(10):
+        wdt.feed()
         if wlan.isconnected():
             break
         time.sleep(1)
         print("Connecting...")
+    wdt.feed()
 
     if wlan.isconnected():
         print("Connected to Wi-Fi:", wlan.ifconfig())
-    else:
+    elif reset_on_failure:
         print("Failed to connect to Wi-Fi. Restarting...")
         machine.reset()  # Restart the device if Wi-Fi fails
+    else:
+        print("Failed to connect to Wi-Fi, will retry.")
+
+    return wlan
+
+
+def sync_time():
+    """Set the RTC from NTP so queued transitions keep their real timestamps."""
+    try:
+        import ntptime
+
+        ntptime.settime()
+        print("RTC synced from NTP.")
+        return True
+    except Exception as e:
+        print(f"NTP sync failed, server time will be used: {e}")
+        return False
+
+
+class PersistentHTTP:
+    """Minimal HTTP/1.1 client that keeps one socket open between requests."""
+
+    def __init__(self, url):
+        host_port = url.split("://", 1)[-1].split("/", 1)[0]
+        if ":" in host_port:
+            self.host, port = host_port.split(":", 1)
+            self.port = int(port)
+        else:
+            self.host, self.port = host_port, 80
+        self.addr = None
+        self.sock = None
+        self.body_buf = bytearray(128)
+
+    def connect(self):
+        if self.addr is None:
+            self.addr = socket.getaddrinfo(self.host, self.port, 0, socket.SOCK_STREAM)[
+                0
+            ][-1]
+            wdt.feed()
+        self.sock = socket.socket()
+        self.sock.settimeout(REQUEST_TIMEOUT)
+        self.sock.connect(self.addr)
+        wdt.feed()
+
+    def close(self):
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+
+    def post(self, path, body):
+        """POST a JSON body and return the status code.
+
+        A keep-alive socket the server already closed fails on first use, so
+        the request is retried once on a fresh connection. Each socket
+        operation times out within REQUEST_TIMEOUT and the watchdog is fed
+        between them, so a slow server cannot trigger a watchdog reset.
+        """
+        for attempt in range(2):
+            try:
+                if self.sock is None:
+                    self.connect()
+                if isinstance(body, str):
+                    body = body.encode()
+                self.sock.write(
+                    "POST %s HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\n"
+                    "Content-Length: %d\r\nConnection: keep-alive\r\n\r\n"
+                    % (path, self.host, len(body))
+                )
+                self.sock.write(body)
+                wdt.feed()
+                return self._read_response()
+            except OSError:
+                self.close()
+                if attempt:
+                    raise
+            except Exception:
+                # e.g. a malformed status line; the stream is out of sync
+                self.close()
+                raise
+
+    def _read_response(self):
+        status_line = self.sock.readline()
+        if not status_line:
+            raise OSError("connection closed")
+        status = int(status_line.split(None, 2)[1])
+        content_length = 0
+        keep_alive = True
+        while True:
+            wdt.feed()
+            line = self.sock.readline()
+            if not line or line == b"\r\n":
+                break
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                content_length = int(value)
+            elif name == b"connection" and value.strip().lower() == b"close":
+                keep_alive = False
+
+        # Drain the body into a reused buffer; we only need the status code
+        view = memoryview(self.body_buf)
+        while content_length > 0:
+            wdt.feed()
+            n = self.sock.readinto(view[: min(content_length, len(self.body_buf))])
+            if not n:
+                keep_alive = False
+                break
+            content_length -= n
+
+        if not keep_alive:
+            self.close()
+        return status
 
 
 # Door Sensor Class
@@ -84,6 +225,13 @@ class DoorSensor:
         self.current_state = self.pin.value()
         self.debug = debug
         self.consecutive_failures = 0
+
+        # IRQ mode ring buffer, preallocated so the handler never allocates
+        self._q_states = array("b", [0] * EVENT_QUEUE_SIZE)
+        self._q_ticks = array("i", [0] * EVENT_QUEUE_SIZE)
+        # head, tail, dropped count, last queued state, last IRQ tick
+        self._q_meta = array("i", [0, 0, 0, self.current_state, 0])
+        self._irq_handler = self._on_irq  # Bound once; binding allocates
         print(f"Magnetic sensor initialized on GPIO pin {pin}.")
 
     def send_state(self, state):
@@ -123,13 +271,11 @@ class DoorSensor:
                     )
                     machine.reset()
 
-    def check_memory_and_uptime(self):
-        """Check memory usage and uptime, reboot if needed"""
-        global last_memory_check, start_time
+    def check_memory(self):
+        """Check memory usage every MEMORY_CHECK_INTERVAL seconds, reboot if low"""
+        global last_memory_check
 
         current_time = time.time()
-
-        # Check memory every MEMORY_CHECK_INTERVAL seconds
         if current_time - last_memory_check > MEMORY_CHECK_INTERVAL:
             last_memory_check = current_time
             gc.collect()
@@ -141,14 +287,169 @@ class DoorSensor:
                 print(f"Critical memory low: {free_mem} bytes. Rebooting...")
                 machine.reset()
 
+    def check_memory_and_uptime(self):
+        """Check memory usage and uptime, reboot if needed"""
+        self.check_memory()
+
         # Check if device has been running too long
-        uptime = current_time - start_time
+        uptime = time.time() - start_time
         if uptime > RESTART_INTERVAL:
             print(
                 f"Uptime {uptime}s exceeded {RESTART_INTERVAL}s. Performing scheduled restart..."
             )
             machine.reset()
 
+    def _on_irq(self, pin):
+        """Hard IRQ handler: record the transition without allocating."""
+        meta = self._q_meta
+        state = pin.value()
+        if state == meta[3]:
+            return
+        meta[3] = state
+        meta[4] = time.ticks_ms()
+        head = meta[0]
+        next_head = (head + 1) % EVENT_QUEUE_SIZE
+        if next_head == meta[1]:
+            # Full: states alternate, so this transition cancels the newest
+            # queued one and the slot before it already holds this state
+            meta[0] = (head - 1) % EVENT_QUEUE_SIZE
+            meta[2] += 1
+            return
+        self._q_states[head] = state
+        self._q_ticks[head] = meta[4]
+        meta[0] = next_head
+
+    def _pending(self):
+        return self._q_meta[0] != self._q_meta[1]
+
+    def _format_timestamp(self, event_ticks):
+        age_s = time.ticks_diff(time.ticks_ms(), event_ticks) // 1000
+        t = time.gmtime(time.time() - age_s)
+        return "%04d-%02d-%02dT%02d:%02d:%02dZ" % t[:6]
+
+    def _send_pending(self, client, timestamps):
+        """Send queued transitions oldest first, leaving them queued on failure."""
+        meta = self._q_meta
+        while meta[0] != meta[1]:
+            tail = meta[1]
+            state = self._q_states[tail]
+            ticks = self._q_ticks[tail]
+            next_tail = (tail + 1) % EVENT_QUEUE_SIZE
+
+            # Coalesce bounces: a transition reversed within DEBOUNCE_MS cancels
+            # out together with its reversal
+            if next_tail != meta[0] and (
+                time.ticks_diff(self._q_ticks[next_tail], ticks) < DEBOUNCE_MS
+            ):
+                meta[1] = (next_tail + 1) % EVENT_QUEUE_SIZE
+                continue
+
+            state_str = "CLOSED" if state == 0 else "OPEN"
+            if timestamps:
+                body = (
+                    '{"device_name":"%s","door_status":"%s","battery":100,"timestamp":"%s"}'
+                    % (device_name, state_str, self._format_timestamp(ticks))
+                )
+            else:
+                body = '{"device_name":"%s","door_status":"%s","battery":100}' % (
+                    device_name,
+                    state_str,
+                )
+
+            if self.debug:
+                print(f"[DEBUG] Payload: {body}")
+            else:
+                try:
+                    status = client.post("/doors/add_data/door_status", body)
+                    print(f"Door is {state_str}. Data sent with status code: {status}")
+                    self.consecutive_failures = 0
+                except Exception as e:
+                    print(f"Failed to send data: {e}")
+                    self.consecutive_failures += 1
+                    return False
+            meta[1] = next_tail
+            wdt.feed()
+
+        if meta[2]:
+            print(f"Event queue overflowed, {meta[2]} transitions coalesced")
+            meta[2] = 0
+        return True
+
+    def _sleep_until_event(self, timeout_ms):
+        """Sleep until a transition is queued or timeout_ms has elapsed."""
+        if USE_LIGHTSLEEP:
+            machine.lightsleep(timeout_ms)
+            return
+        start = time.ticks_ms()
+        while (
+            not self._pending() and time.ticks_diff(time.ticks_ms(), start) < timeout_ms
+        ):
+            machine.idle()  # WFI until the next interrupt
+
+    def run_irq(self, wlan):
+        """IRQ-driven monitoring.
+
+        Transitions are captured by Pin.irq into a fixed ring buffer and sent
+        from this loop over a persistent socket, so no transition is lost
+        while a send is in flight. Between events the CPU sleeps (WFI, or
+        machine.lightsleep when use_lightsleep is set), waking at least every
+        WDT_FEED_INTERVAL_MS to feed the watchdog. There is no scheduled
+        restart in this mode and failed sends stay queued instead of rebooting.
+        """
+        print("Starting IRQ-driven sensor monitoring...")
+        if WIFI_POWERSAVE:
+            try:
+                wlan.config(pm=network.WLAN.PM_POWERSAVE)
+            except Exception as e:
+                print(f"Wi-Fi power save unavailable: {e}")
+
+        timestamps = sync_time()
+        client = PersistentHTTP(server_url)
+
+        # Queue the initial state so the server is in sync at boot
+        self._q_states[0] = self.current_state
+        self._q_ticks[0] = time.ticks_ms()
+        self._q_meta[0] = 1
+
+        self.pin.irq(
+            handler=self._irq_handler,
+            trigger=machine.Pin.IRQ_RISING | machine.Pin.IRQ_FALLING,
+            hard=True,
+        )
+        try:
+            while True:
+                wdt.feed()
+                self.check_memory()
+
+                if self._pending():
+                    # Let the door settle so a bounce burst goes out as one event
+                    while time.ticks_diff(time.ticks_ms(), self._q_meta[4]) < SETTLE_MS:
+                        wdt.feed()  # A contact that keeps bouncing never settles
+                        time.sleep_ms(SETTLE_MS)
+                    if not self._send_pending(client, timestamps):
+                        if self.consecutive_failures >= CONSECUTIVE_FAILURES_LIMIT:
+                            # Keep the queued transitions; reconnect instead of rebooting
+                            print(
+                                "Consecutive failures limit reached. Reconnecting Wi-Fi..."
+                            )
+                            client.close()
+                            if not wlan.isconnected():
+                                wlan = connect_wifi(reset_on_failure=False)
+                            self.consecutive_failures = 0
+                        # Back off; transitions keep queueing from the IRQ meanwhile
+                        time.sleep_ms(
+                            min(1000 * self.consecutive_failures, WDT_FEED_INTERVAL_MS)
+                        )
+                    continue
+
+                self._sleep_until_event(WDT_FEED_INTERVAL_MS)
+        except KeyboardInterrupt:
+            print("Keyboard interrupt detected. Exiting...")
+        finally:
+            self.pin.irq(handler=None)
+            client.close()
+            print("Program terminated.")
+
     def run(self):
         print("Starting sensor monitoring...")
         try:
@@ -174,6 +475,9 @@ class DoorSensor:
 
 # Main execution
 if __name__ == "__main__":
-    connect_wifi()
+    wlan = connect_wifi()
     sensor = DoorSensor(pin=GPIO_PIN, poll_interval=POLL_INTERVAL, debug=False)
-    sensor.run()
+    if MODE == "irq":
+        sensor.run_irq(wlan)
+    else:
+        sensor.run()
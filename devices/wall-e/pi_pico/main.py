@@ -1,14 +1,19 @@
 import machine
 import network
 import json
-import urequests as requests
+import socket
 import time
 import gc
+from array import array
 from machine import UART, Pin
 
 # Load configuration from file
 CONFIG_FILE = "wall-e_sampler_config.json"
 
+UART_TIMEOUT_MS = 1500  # SDS011 emits a frame every second in active mode
+REQUEST_TIMEOUT = 10  # HTTP request timeout in seconds
+MIN_FREE_MEMORY = 50000  # Reboot if free memory below 50KB
+
 """
 Config file format:
 {
@@ -18,9 +23,18 @@ Config file format:
     "server_url": "http://pat.local:5000",
     "poll_interval": 300,
     "tx_pin": 4,
-    "rx_pin": 5
+    "rx_pin": 5,
+    "mode": "poll",
+    "min_report_interval": 60,
+    "max_report_interval": 900,
+    "change_threshold": 5.0
 }
 
+"mode" is "poll" (default) or "aggregate". Aggregate mode reads the sensor
+continuously and reports mean/min/max/count per window, starting at
+"poll_interval" seconds and adapting between "min_report_interval" and
+"max_report_interval" depending on whether PM moved by "change_threshold".
+
 Connections between SDS011 Sensor and Raspberry Pi Pico W:
 
 SDS011 Sensor  | Raspberry Pi Pico W
@@ -45,6 +59,18 @@ server_url = config.get("server_url", "http://pat.local:5000")
 POLL_INTERVAL = config.get("poll_interval", 300)
 TX_PIN = config.get("tx_pin", 4)
 RX_PIN = config.get("rx_pin", 5)
+MODE = config.get("mode", "poll")
+MIN_REPORT_INTERVAL = config.get("min_report_interval", 60)
+MAX_REPORT_INTERVAL = config.get("max_report_interval", 900)
+CHANGE_THRESHOLD = config.get("change_threshold", 5.0)
+
+# JSON keys for the aggregate fields, in the order of AirQualitySensor.stats
+AGGREGATE_KEYS = (
+    b',"pm25_min":',
+    b',"pm25_max":',
+    b',"pm10_min":',
+    b',"pm10_max":',
+)
 
 print(
     f"Starting Air Quality Sensor with Device ID: {device_name}, Server URL: {server_url}"
@@ -72,89 +98,276 @@ def connect_wifi():
 
 
 class AirQualitySensor:
+    """SDS011 reader and reporter built around preallocated buffers.
+
+    The hot path (read a frame, build the payload, POST it) reuses the same
+    buffers and socket every cycle, so the heap stays flat and the board no
+    longer needs a scheduled reboot to escape fragmentation.
+    """
+
     def __init__(self, poll_interval, tx_pin, rx_pin, debug=False):
         self.device_name = device_name
         self.server_url = server_url
         self.poll_interval = poll_interval
         self.debug = debug
-        self.uart = UART(1, baudrate=9600, tx=Pin(tx_pin), rx=Pin(rx_pin))
-        self.poll_count = 0
-        self.reboot_interval = (
-            144  # Reboot after 144 polls (12 hours with 300s interval)
+        self.uart = UART(
+            1,
+            baudrate=9600,
+            tx=Pin(tx_pin),
+            rx=Pin(rx_pin),
+            timeout=UART_TIMEOUT_MS,
+            timeout_char=10,
         )
+
+        # SDS011 frame: AA C0 PM25L PM25H PM10L PM10H ID1 ID2 CHK AB
+        self.frame = bytearray(10)
+        self.frame_mv = memoryview(self.frame)
+
+        # Connection details, resolved once
+        host_port = server_url.split("://", 1)[-1].split("/", 1)[0]
+        if ":" in host_port:
+            self.host, port = host_port.split(":", 1)
+            self.port = int(port)
+        else:
+            self.host, self.port = host_port, 80
+        self.addr = None
+        self.sock = None
+
+        # Prebuilt request template; only the numbers are written per send
+        self.body_prefix = ('{"device_name":"%s","pm25":' % self.device_name).encode()
+        self.header_prefix = (
+            "POST /air/add_data HTTP/1.1\r\nHost: %s\r\n"
+            "Content-Type: application/json\r\nConnection: keep-alive\r\n"
+            "Content-Length: " % self.host
+        ).encode()
+        self.body = bytearray(len(self.body_prefix) + 160)
+        self.body[: len(self.body_prefix)] = self.body_prefix
+        self.body_mv = memoryview(self.body)
+        self.header = bytearray(len(self.header_prefix) + 16)
+        self.header[: len(self.header_prefix)] = self.header_prefix
+        self.header_mv = memoryview(self.header)
+        self.response = bytearray(512)
+        self.response_mv = memoryview(self.response)
+
+        # Aggregate mode window state, in tenths:
+        # pm25 min, pm25 max, pm10 min, pm10 max, count, pm25 sum, pm10 sum
+        self.stats = array("i", [0] * 7)
+
         print("Air Quality Sensor initialized.")
 
     def read_pm_sensor(self):
-        """Read data from the PM sensor."""
-        gc.collect()
-        self.uart.write(b"\xaa\xc0")
-        time.sleep(1)
-
-        if self.uart.any():
-            data = self.uart.read(10)
-            if data and len(data) == 10 and data[0] == 0xAA and data[1] == 0xC0:
-                pm25 = (data[2] + data[3] * 256) / 10.0
-                pm10 = (data[4] + data[5] * 256) / 10.0
-                return pm25, pm10
+        """Read one frame from the PM sensor.
+
+        Returns (pm25, pm10) in tenths of a microgram per m3, or (None, None)
+        if no valid frame arrived within the UART timeout.
+        """
+        frame = self.frame
+        mv = self.frame_mv
+
+        # Drop anything stale so the reading is fresh
+        while self.uart.any():
+            self.uart.readinto(frame)
+
+        # Sync on the AA C0 header; the UART timeout bounds the wait
+        for _ in range(20):
+            if not self.uart.readinto(mv[0:1]):
+                return None, None
+            if frame[0] != 0xAA:
+                continue
+            if not self.uart.readinto(mv[1:2]) or frame[1] != 0xC0:
+                continue
+            if self.uart.readinto(mv[2:10]) != 8 or frame[9] != 0xAB:
+                return None, None
+            checksum = 0
+            for i in range(2, 8):
+                checksum += frame[i]
+            if checksum & 0xFF != frame[8]:
+                print("[WARN] SDS011 checksum mismatch")
+                return None, None
+            return frame[2] + frame[3] * 256, frame[4] + frame[5] * 256
         return None, None
 
-    def send_data(self, pm25, pm10):
-        """Send air quality data to the server."""
-        gc.collect()
-
-        payload = {
-            "device_name": self.device_name,
-            "pm25": round(pm25, 1),
-            "pm10": round(pm10, 1),
-        }
-
-        print(f"[INFO] Sending data payload: {payload}")
+    def _write_tenths(self, buf, pos, value):
+        """Write value/10 as a decimal ("123.4") into buf at pos without allocating."""
+        whole = value // 10
+        divisor = 1
+        while divisor * 10 <= whole:
+            divisor *= 10
+        while divisor:
+            buf[pos] = 48 + (whole // divisor) % 10
+            pos += 1
+            divisor //= 10
+        buf[pos] = 46  # "."
+        buf[pos + 1] = 48 + value % 10
+        return pos + 2
+
+    def _write_int(self, buf, pos, value):
+        return self._write_tenths(buf, pos, value * 10) - 2
+
+    def _connect(self):
+        if self.addr is None:
+            self.addr = socket.getaddrinfo(self.host, self.port, 0, socket.SOCK_STREAM)[
+                0
+            ][-1]
+        self.sock = socket.socket()
+        self.sock.settimeout(REQUEST_TIMEOUT)
+        self.sock.connect(self.addr)
+
+    def _close(self):
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+
+    def _read_status(self):
+        """Read the HTTP response into the reused buffer and return the status."""
+        buf = self.response
+        mv = self.response_mv
+        filled = 0
+        header_end = -1
+        while header_end < 0:
+            if filled == len(buf):
+                raise OSError("response headers too large")
+            n = self.sock.readinto(mv[filled:])
+            if not n:
+                raise OSError("connection closed")
+            filled += n
+            for i in range(3, filled):
+                if (
+                    buf[i] == 10
+                    and buf[i - 1] == 13
+                    and buf[i - 2] == 10
+                    and buf[i - 3] == 13
+                ):
+                    header_end = i + 1
+                    break
+
+        status = (buf[9] - 48) * 100 + (buf[10] - 48) * 10 + (buf[11] - 48)
+
+        # Find content-length (case-insensitive) to drain the body
+        content_length = 0
+        key = b"content-length:"
+        for i in range(header_end - len(key)):
+            if buf[i - 1] != 10:
+                continue
+            j = 0
+            while j < len(key) and (buf[i + j] | 0x20) == (key[j] | 0x20):
+                j += 1
+            if j == len(key):
+                i += j
+                while buf[i] == 32:
+                    i += 1
+                while 48 <= buf[i] <= 57:
+                    content_length = content_length * 10 + buf[i] - 48
+                    i += 1
+                break
+
+        remaining = content_length - (filled - header_end)
+        while remaining > 0:
+            n = self.sock.readinto(mv[: min(remaining, len(buf))])
+            if not n:
+                self._close()
+                break
+            remaining -= n
+        return status
+
+    def _post(self, header_len, body_len):
+        """POST the prepared header/body, retrying once if the kept-alive socket died."""
+        for attempt in range(2):
+            try:
+                if self.sock is None:
+                    self._connect()
+                self.sock.write(self.header_mv[:header_len])
+                self.sock.write(self.body_mv[:body_len])
+                return self._read_status()
+            except OSError:
+                self._close()
+                if attempt:
+                    raise
+            except Exception:
+                # e.g. a malformed status line; the stream is out of sync
+                self._close()
+                raise
+
+    def _write_bytes(self, buf, pos, data):
+        for c in data:
+            buf[pos] = c
+            pos += 1
+        return pos
+
+    def send_data(self, pm25, pm10, aggregate=False):
+        """Send air quality data (in tenths) to the server.
+
+        With aggregate set, the window min/max/count from self.stats are
+        appended to the payload.
+        """
+        body = self.body
+        pos = len(self.body_prefix)
+        pos = self._write_tenths(body, pos, pm25)
+        pos = self._write_bytes(body, pos, b',"pm10":')
+        pos = self._write_tenths(body, pos, pm10)
+        if aggregate:
+            stats = self.stats
+            for i in range(4):
+                pos = self._write_bytes(body, pos, AGGREGATE_KEYS[i])
+                pos = self._write_tenths(body, pos, stats[i])
+            pos = self._write_bytes(body, pos, b',"sample_count":')
+            pos = self._write_int(body, pos, stats[4])
+        body[pos] = 125  # "}"
+        body_len = pos + 1
+
+        header = self.header
+        pos = self._write_int(header, len(self.header_prefix), body_len)
+        pos = self._write_bytes(header, pos, b"\r\n\r\n")
+
+        if self.debug:
+            print(f"[DEBUG] Payload: {bytes(self.body_mv[:body_len])}")
+            return
 
         try:
-            url = f"{self.server_url}/air/add_data"
-            headers = {"Content-Type": "application/json"}
-
-            gc.collect()
-            response = requests.post(url, json=payload, headers=headers)
-
-            print(f"[INFO] Response status code: {response.status_code}")
-            print(f"[INFO] Response body: {response.text}")
-
-            response.close()
-            gc.collect()
+            status = self._post(pos, body_len)
+            print(f"[INFO] Response status code: {status}")
         except Exception as e:
             print(f"[ERROR] Failed to send data: {e}")
-            import traceback
-            traceback.print_exc()
 
     def send_issue(self, exception_type, exception_message):
         """Send sensor issue report to the server."""
-        gc.collect()
-
-        payload = {
-            "device_name": self.device_name,
-            "exception": exception_type,
-            "exception_message": exception_message,
-        }
+        payload = json.dumps(
+            {
+                "device_name": self.device_name,
+                "exception": exception_type,
+                "exception_message": exception_message,
+            }
+        ).encode()
 
         print(f"[INFO] Sending issue payload: {payload}")
 
-        try:
-            url = f"{self.server_url}/air/add_issue"
-            headers = {"Content-Type": "application/json"}
-
-            gc.collect()
-            response = requests.post(url, json=payload, headers=headers)
-
-            print(f"[INFO] Issue response status code: {response.status_code}")
-            print(f"[INFO] Issue response body: {response.text}")
-
-            response.close()
-            gc.collect()
-        except Exception as e:
-            print(f"[ERROR] Failed to send issue report: {e}")
-            import traceback
-            traceback.print_exc()
+        if self.debug:
+            return
+
+        header = (
+            "POST /air/add_issue HTTP/1.1\r\nHost: %s\r\n"
+            "Content-Type: application/json\r\nConnection: keep-alive\r\n"
+            "Content-Length: %d\r\n\r\n" % (self.host, len(payload))
+        ).encode()
+        for attempt in range(2):
+            try:
+                if self.sock is None:
+                    self._connect()
+                self.sock.write(header)
+                self.sock.write(payload)
+                status = self._read_status()
+                print(f"[INFO] Issue response status code: {status}")
+                return
+            except OSError as e:
+                self._close()
+                if attempt:
+                    print(f"[ERROR] Failed to send issue report: {e}")
+            except Exception:
+                self._close()
+                raise
 
     def run(self):
         print("Starting air quality monitoring...")
@@ -162,27 +375,102 @@ class AirQualitySensor:
             while True:
                 pm25, pm10 = self.read_pm_sensor()
                 if pm25 is not None and pm10 is not None:
-                    print(f"PM2.5: {pm25}, PM10: {pm10}")
+                    print(f"PM2.5: {pm25 / 10}, PM10: {pm10 / 10}")
                     self.send_data(pm25, pm10)
                 else:
                     print("Failed to read sensor data")
                     self.send_issue("SensorReadError", "Failed to read sensor data")
 
-                self.poll_count += 1
+                self.check_memory()
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            print("Keyboard interrupt detected. Exiting...")
+        finally:
+            self._close()
+            print("Program terminated.")
 
-                # Check if we need to reboot to refresh system resources
-                if self.poll_count >= self.reboot_interval:
+    def check_memory(self):
+        """Safety net only; the hot path does not grow the heap."""
+        free_mem = gc.mem_free()
+        print(f"Memory status: {free_mem} bytes free")
+        if free_mem < MIN_FREE_MEMORY:
+            gc.collect()
+            if gc.mem_free() < MIN_FREE_MEMORY:
+                print(f"Critical memory low: {gc.mem_free()} bytes. Rebooting...")
+                machine.reset()
+
+    def _reset_window(self):
+        stats = self.stats
+        stats[0] = stats[2] = 0x7FFFFFFF
+        stats[1] = stats[3] = 0
+        stats[4] = stats[5] = stats[6] = 0
+
+    def run_aggregate(self):
+        """Read at the sensor's native rate and report adaptive window aggregates.
+
+        A reading that moves change_threshold away from the last reported
+        mean closes the window early (after min_report_interval) and halves
+        the next one; a stable window doubles the next one, up to
+        max_report_interval.
+        """
+        print("Starting aggregated air quality monitoring...")
+        stats = self.stats
+        threshold = int(CHANGE_THRESHOLD * 10)
+        interval_ms = self.poll_interval * 1000
+        min_ms = MIN_REPORT_INTERVAL * 1000
+        max_ms = MAX_REPORT_INTERVAL * 1000
+        last_pm25 = last_pm10 = -1
+        self._reset_window()
+        window_start = time.ticks_ms()
+        changed = False
+        try:
+            while True:
+                pm25, pm10 = self.read_pm_sensor()
+                if pm25 is not None and pm10 is not None:
+                    stats[0] = min(stats[0], pm25)
+                    stats[1] = max(stats[1], pm25)
+                    stats[2] = min(stats[2], pm10)
+                    stats[3] = max(stats[3], pm10)
+                    stats[4] += 1
+                    stats[5] += pm25
+                    stats[6] += pm10
+                    if last_pm25 >= 0 and (
+                        abs(pm25 - last_pm25) >= threshold
+                        or abs(pm10 - last_pm10) >= threshold
+                    ):
+                        changed = True
+
+                elapsed = time.ticks_diff(time.ticks_ms(), window_start)
+                if elapsed < interval_ms and not (changed and elapsed >= min_ms):
+                    continue
+
+                count = stats[4]
+                if count:
+                    last_pm25 = (stats[5] + count // 2) // count
+                    last_pm10 = (stats[6] + count // 2) // count
                     print(
-                        f"Reboot interval ({self.reboot_interval} polls) reached. Rebooting..."
+                        f"Window of {count} readings - PM2.5: {last_pm25 / 10}, PM10: {last_pm10 / 10}"
                     )
-                    gc.collect()
-                    time.sleep(2)  # Brief pause before reboot
-                    machine.reset()
+                    self.send_data(last_pm25, last_pm10, aggregate=True)
+                    if changed:
+                        interval_ms = max(min_ms, interval_ms // 2)
+                    elif (
+                        stats[1] - stats[0] < threshold
+                        and stats[3] - stats[2] < threshold
+                    ):
+                        interval_ms = min(max_ms, interval_ms * 2)
+                else:
+                    print("No valid sensor readings in window")
+                    self.send_issue("SensorReadError", "Failed to read sensor data")
 
-                time.sleep(self.poll_interval)
+                self.check_memory()
+                self._reset_window()
+                window_start = time.ticks_ms()
+                changed = False
         except KeyboardInterrupt:
             print("Keyboard interrupt detected. Exiting...")
         finally:
+            self._close()
             print("Program terminated.")
 
 
@@ -192,4 +480,7 @@ if __name__ == "__main__":
     sensor = AirQualitySensor(
         poll_interval=POLL_INTERVAL, tx_pin=TX_PIN, rx_pin=RX_PIN, debug=False
     )
-    sensor.run()
+    if MODE == "aggregate":
+        sensor.run_aggregate()
+    else:
+        sensor.run()
@@ -32,6 +32,11 @@ with open(CONFIG_FILE, "r") as f:
 
 device_name = config.get("device_name", "default_device")
 server_url = config.get("server_url", "http://pat.local:5000")
+MODE = config.get("mode", "poll")
+REPORT_INTERVAL = config.get("report_interval", 300)
+MIN_REPORT_INTERVAL = config.get("min_report_interval", 60)
+MAX_REPORT_INTERVAL = config.get("max_report_interval", 900)
+CHANGE_THRESHOLD = config.get("change_threshold", 5.0)
 
 logging.info(
     f"Starting WALL-E Sampler with Device ID: {device_name}, Server URL: {server_url}"
@@ -53,7 +58,103 @@ def read_pm_sensor(port):
     return None, None
 
 
-def send_data(device_name, pm25, pm10, debug):
+def read_frame(ser):
+    """Read the next valid SDS011 frame from an open serial port.
+
+    Syncs on the AA C0 header and validates the AB tail and checksum.
+    Returns (pm25, pm10), or (None, None) if no valid frame arrived.
+    """
+    for _ in range(20):
+        header = ser.read(1)
+        if not header:
+            return None, None
+        if header[0] != 0xAA:
+            continue
+        data = header + ser.read(9)
+        if len(data) != 10 or data[1] != 0xC0 or data[9] != 0xAB:
+            continue
+        if sum(data[2:8]) & 0xFF != data[8]:
+            logging.warning("SDS011 checksum mismatch, discarding frame.")
+            continue
+        pm25 = (data[2] + data[3] * 256) / 10.0
+        pm10 = (data[4] + data[5] * 256) / 10.0
+        return pm25, pm10
+    return None, None
+
+
+class WindowAggregator:
+    """Aggregate SDS011 readings into mean/min/max/count per reporting window.
+
+    The window length adapts to the air: a sharp change in PM2.5 or PM10
+    against the last reported mean closes the window early and shortens the
+    next one, while a stable window lengthens the next one, between
+    min_interval and max_interval seconds.
+    """
+
+    def __init__(self, interval, min_interval, max_interval, change_threshold):
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.change_threshold = change_threshold
+        self.last_reported = None
+        self.reset()
+
+    def reset(self):
+        self.window_start = time.monotonic()
+        self.count = 0
+        self.sums = [0.0, 0.0]
+        self.mins = [float("inf"), float("inf")]
+        self.maxs = [float("-inf"), float("-inf")]
+        self.changed = False
+
+    def add(self, pm25, pm10):
+        for i, value in enumerate((pm25, pm10)):
+            self.sums[i] += value
+            self.mins[i] = min(self.mins[i], value)
+            self.maxs[i] = max(self.maxs[i], value)
+            if (
+                self.last_reported is not None
+                and abs(value - self.last_reported[i]) >= self.change_threshold
+            ):
+                self.changed = True
+        self.count += 1
+
+    def should_report(self):
+        """Return True once the window is due, or early on a sharp change."""
+        if not self.count:
+            return False
+        elapsed = time.monotonic() - self.window_start
+        if self.changed and elapsed >= self.min_interval:
+            return True
+        return elapsed >= self.interval
+
+    def summary(self):
+        """Close the window, adapt the next interval and return the aggregate."""
+        means = [total / self.count for total in self.sums]
+        stable = all(
+            high - low < self.change_threshold
+            for low, high in zip(self.mins, self.maxs)
+        )
+        if self.changed:
+            self.interval = max(self.min_interval, self.interval / 2)
+        elif stable:
+            self.interval = min(self.max_interval, self.interval * 2)
+
+        aggregate = {
+            "pm25": round(means[0], 1),
+            "pm10": round(means[1], 1),
+            "pm25_min": self.mins[0],
+            "pm25_max": self.maxs[0],
+            "pm10_min": self.mins[1],
+            "pm10_max": self.maxs[1],
+            "sample_count": self.count,
+        }
+        self.last_reported = means
+        self.reset()
+        return aggregate
+
+
+def send_data(device_name, pm25, pm10, debug, aggregate=None):
     """Send air quality data to the server or print in debug mode."""
     payload = {
         "device_name": device_name,
@@ -61,9 +162,11 @@ def send_data(device_name, pm25, pm10, debug):
         "pm25": pm25,
         "pm10": pm10,
     }
+    if aggregate:
+        payload.update(aggregate)
     if debug:
         logging.info(f"[DEBUG] Payload: {json.dumps(payload, indent=2)}")
-        return 200
+        return 200, "debug"
     else:
         headers = {"Content-Type": "application/json"}
         response = requests.post(
@@ -72,6 +175,56 @@ def send_data(device_name, pm25, pm10, debug):
         return response.status_code, response.content
 
 
+def run_aggregate(port, debug):
+    """Read continuously at the sensor's native rate and report window aggregates."""
+    aggregator = WindowAggregator(
+        REPORT_INTERVAL, MIN_REPORT_INTERVAL, MAX_REPORT_INTERVAL, CHANGE_THRESHOLD
+    )
+    logging.info(
+        f"Aggregating readings (interval: {REPORT_INTERVAL}s, "
+        f"range: {MIN_REPORT_INTERVAL}-{MAX_REPORT_INTERVAL}s)"
+    )
+    while True:
+        try:
+            with serial.Serial(port, baudrate=9600, timeout=2) as ser:
+                while True:
+                    pm25, pm10 = read_frame(ser)
+                    if pm25 is None or pm10 is None:
+                        logging.warning("No valid frame from sensor.")
+                        continue
+                    aggregator.add(pm25, pm10)
+                    if not aggregator.should_report():
+                        continue
+
+                    aggregate = aggregator.summary()
+                    logging.info(
+                        f"Window of {aggregate['sample_count']} readings - "
+                        f"PM2.5: {aggregate['pm25']}, PM10: {aggregate['pm10']}; "
+                        f"next window {aggregator.interval:.0f}s"
+                    )
+                    try:
+                        status_code, message = send_data(
+                            device_name,
+                            aggregate["pm25"],
+                            aggregate["pm10"],
+                            debug,
+                            aggregate,
+                        )
+                        logging.info(
+                            f"Data {'printed (debug mode)' if debug else 'sent'} with status code: {status_code} and message: {message}"
+                        )
+                    except requests.exceptions.ConnectionError:
+                        logging.error(
+                            "Failed to connect to the server. The server might be down."
+                        )
+        except serial.SerialException as e:
+            logging.error(f"Serial error, reopening port: {e}")
+            time.sleep(5)
+        except Exception as e:
+            logging.error(f"An error occurred: {e}")
+            time.sleep(5)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="WALL-E Air Sampler")
     parser.add_argument(
@@ -82,12 +235,20 @@ if __name__ == "__main__":
         action="store_true",
         help="Enable debug mode to print payload instead of sending data",
     )
+    parser.add_argument(
+        "--aggregate",
+        action="store_true",
+        help="Read continuously and send adaptive per-window aggregates",
+    )
     args = parser.parse_args()
 
     # Select the appropriate port
     port = "/dev/serial0" if args.pins else "/dev/ttyUSB0"
     logging.info(f"Using port: {port}")
 
+    if args.aggregate or MODE == "aggregate":
+        run_aggregate(port, args.debug)
+
     while True:
         try:
             pm25, pm10 = read_pm_sensor(port)